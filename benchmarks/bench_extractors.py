@@ -0,0 +1,83 @@
+"""
+Compares the throughput of the main content extractors on a fixed corpus of saved HTML pages.
+
+    python benchmarks/bench_extractors.py [--corpus DIR] [--repeat N]
+
+Every page is parsed once and extracted with rule 0 and rule 1, like
+WebScraper.scrape_url_with_fallback does when rule 0 returns too little text.
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from online_research_engine.content_extractors import (
+    LxmlContentExtractor,
+    SoupContentExtractor,
+)
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def load_corpus(corpus_dir):
+    # Read every saved HTML page of the corpus
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            pages[os.path.basename(path)] = file.read()
+    return pages
+
+
+def run_extractor(extractor, html_string):
+    # Parse once and extract with both crawl rules
+    document = extractor.parse(html_string)
+    return (
+        extractor.extract_main_content(document, 0),
+        extractor.extract_main_content(document, 1),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="directory of .html pages")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        raise SystemExit(f"No .html pages found in {args.corpus}")
+    corpus_mb = sum(len(html.encode("utf-8")) for html in pages.values()) / 1e6
+
+    extractors = {
+        "soup": SoupContentExtractor(),
+        "lxml": LxmlContentExtractor(),
+    }
+
+    # Every backend must produce exactly the reference output
+    for name, html in pages.items():
+        expected = run_extractor(extractors["soup"], html)
+        for backend, extractor in extractors.items():
+            if run_extractor(extractor, html) != expected:
+                raise SystemExit(f"{backend} output differs from soup on {name}")
+
+    print(f"Corpus: {len(pages)} pages, {corpus_mb:.2f} MB, {args.repeat} passes")
+    baseline = None
+    for backend, extractor in extractors.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for html in pages.values():
+                run_extractor(extractor, html)
+        elapsed = time.perf_counter() - start
+
+        pages_per_second = len(pages) * args.repeat / elapsed
+        baseline = baseline or pages_per_second
+        print(
+            f"{backend:>5}: {pages_per_second:8.1f} pages/s "
+            f"{corpus_mb * args.repeat / elapsed:7.2f} MB/s "
+            f"({pages_per_second / baseline:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
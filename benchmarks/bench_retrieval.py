@@ -0,0 +1,100 @@
+"""
+Compares per-query retrieval with a temporary Chroma collection and with NumpyVectorIndex.
+
+    python benchmarks/bench_retrieval.py [--chunks 100 300 1000 3000] [--dim 1536] [--repeat N]
+
+Embeddings are precomputed random vectors, so the timings only cover building the index,
+searching it and tearing it down, which is what EmbeddingRetriever pays for on every query.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from langchain.schema import Document
+from langchain.schema.embeddings import Embeddings
+from langchain.vectorstores import Chroma
+
+from online_research_engine.retrieval import EmbeddingRetriever
+from online_research_engine.vector_index import NumpyVectorIndex
+
+
+class PrecomputedEmbeddings(Embeddings):
+    # Looks embeddings up instead of calling a model
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+def make_workload(chunks, dim, seed=0):
+    # Random unit vectors for the chunks and the query
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((chunks + 1, dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    documents = [
+        Document(
+            page_content=f"chunk {i}", metadata={"url": f"https://{i % 10}.example"}
+        )
+        for i in range(chunks)
+    ]
+    vectors = {
+        document.page_content: row.tolist() for document, row in zip(documents, matrix)
+    }
+    vectors["query"] = matrix[-1].tolist()
+    return documents, PrecomputedEmbeddings(vectors)
+
+
+def search_chroma(documents, embedding_model, k):
+    # The per-query Chroma path of EmbeddingRetriever
+    db = Chroma.from_documents(documents, embedding_model)
+    relevant_documents = db.as_retriever(search_kwargs={"k": k}).get_relevant_documents(
+        "query"
+    )
+    db.delete_collection()
+    return relevant_documents
+
+
+def search_numpy(documents, embedding_model, k):
+    return NumpyVectorIndex.from_documents(
+        documents, embedding_model
+    ).similarity_search("query", k=k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[100, 300, 1000, 3000])
+    parser.add_argument("--dim", type=int, default=1536, help="embedding dimensions")
+    parser.add_argument("--repeat", type=int, default=5, help="queries per setting")
+    args = parser.parse_args()
+
+    k = EmbeddingRetriever.TOP_K
+    print(f"top-{k}, {args.dim} dimensions, {args.repeat} queries per setting")
+    for chunks in args.chunks:
+        documents, embedding_model = make_workload(chunks, args.dim)
+        timings, results = {}, {}
+        for backend, search in (("chroma", search_chroma), ("numpy", search_numpy)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                results[backend] = search(documents, embedding_model, k)
+            timings[backend] = (time.perf_counter() - start) / args.repeat * 1000
+
+        # Share of Chroma's approximate top-k found by the exact search
+        overlap = len(
+            {d.page_content for d in results["chroma"]}
+            & {d.page_content for d in results["numpy"]}
+        )
+        print(
+            f"{chunks:6d} chunks: chroma {timings['chroma']:8.1f} ms  "
+            f"numpy {timings['numpy']:7.1f} ms  "
+            f"({timings['chroma'] / timings['numpy']:5.1f}x)  "
+            f"top-{k} overlap {overlap}/{len(results['numpy'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
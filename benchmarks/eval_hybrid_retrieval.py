@@ -0,0 +1,143 @@
+"""
+Measures how much recall the BM25 prefilter of hybrid retrieval gives up for the embeddings it saves.
+
+    python benchmarks/eval_hybrid_retrieval.py [--corpus DIR] [--queries N] [--top-n 10 20 50 100]
+                                                [--config config.yaml]
+
+Pages of the corpus are extracted and split like EmbeddingRetriever does. Each query is a
+window of words taken from a random chunk. The reference result is the exhaustive dense
+top-k over every chunk. For each prefilter size the harness reports the share of it that
+survives the BM25 prefilter (candidate recall) and the share returned by hybrid retrieval
+after rank fusion (recall@k).
+
+Without --config, a local hashed bag-of-words embedding is used, which runs offline but is
+lexical itself and so flatters the prefilter. Pass a config.yaml with the Azure OpenAI
+settings of example.py to evaluate with the real embedding model.
+"""
+
+import argparse
+import hashlib
+import random
+import sys
+
+import yaml
+from bench_extractors import CORPUS_DIR, load_corpus
+from langchain.schema.embeddings import Embeddings
+
+from online_research_engine.bm25 import BM25Index
+from online_research_engine.content_extractors import LxmlContentExtractor
+from online_research_engine.retrieval import EmbeddingRetriever
+from online_research_engine.vector_index import NumpyVectorIndex
+
+
+class HashedBagOfWords(Embeddings):
+    # Offline embedding: normalized counts of hashed words and word pairs
+    model = "hashed-bag-of-words"
+
+    def __init__(self, size=512):
+        self.size = size
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        vector = [0.0] * self.size
+        for feature in words + [" ".join(pair) for pair in zip(words, words[1:])]:
+            digest = hashlib.sha256(feature.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "big") % self.size] += 1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def load_embedding_model(config_path):
+    if not config_path:
+        return HashedBagOfWords()
+    from langchain.embeddings import AzureOpenAIEmbeddings
+
+    with open(config_path, "r") as file:
+        config = yaml.safe_load(file)
+    return AzureOpenAIEmbeddings(
+        model=config["azure_embed_deployment"],
+        azure_endpoint=config["azure_endpoint"],
+        openai_api_key=config["azure_openai_api_key"],
+        openai_api_version=config["azure_openai_api_version"],
+    )
+
+
+def make_queries(texts, count, seed=0):
+    # Windows of 3 to 8 words from random chunks
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        words = rng.choice(texts).page_content.split()
+        if len(words) < 8:
+            continue
+        size = rng.randint(3, 8)
+        start = rng.randrange(len(words) - size + 1)
+        queries.append(" ".join(words[start : start + size]))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="directory of .html pages")
+    parser.add_argument("--queries", type=int, default=200, help="number of queries")
+    parser.add_argument("--top-n", type=int, nargs="+", default=[10, 20, 50, 100])
+    parser.add_argument("--config", help="config.yaml with Azure OpenAI settings")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        raise SystemExit(f"No .html pages found in {args.corpus}")
+    extractor = LxmlContentExtractor()
+    contents = [
+        extractor.extract_main_content(extractor.parse(html), 1)
+        for html in pages.values()
+    ]
+    links = [f"https://example.com/{name}" for name in pages]
+
+    embedding_model = load_embedding_model(args.config)
+    retriever = EmbeddingRetriever(embedding_model, backend="numpy")
+    texts = retriever.text_splitter.create_documents(
+        contents, metadatas=[{"url": link} for link in links]
+    )
+    queries = make_queries(texts, args.queries)
+
+    # Reference: exhaustive dense retrieval over every chunk
+    index = NumpyVectorIndex(retriever.embedding_model)
+    index.add_documents(texts)
+    query_vectors = retriever.embedding_model.embed_documents(queries)
+    k = EmbeddingRetriever.TOP_K
+    references = [
+        index.similarity_search_by_vector(vector, k) for vector in query_vectors
+    ]
+
+    lexical_index = BM25Index([text.page_content for text in texts])
+    print(f"{len(pages)} pages, {len(texts)} chunks, {len(queries)} queries, top-{k}")
+    for top_n in args.top_n:
+        hybrid = EmbeddingRetriever(
+            embedding_model, backend="numpy", hybrid=True, prefilter_top_n=top_n
+        )
+        candidate_recall = recall = 0.0
+        for query, reference in zip(queries, references):
+            # Chunks are compared by text, since nested pages repeat the same chunk
+            expected = {document.page_content for document in reference}
+            candidates = {
+                texts[i].page_content for i in lexical_index.rank(query, top_n)
+            }
+            found = {d.page_content for d in hybrid._retrieve_hybrid(texts, query)}
+            candidate_recall += len(expected & candidates) / len(expected)
+            recall += len(expected & found) / len(expected)
+
+        embedded = min(top_n, len(texts))
+        print(
+            f"top-n {top_n:4d}: candidate recall {candidate_recall / len(queries):.3f}  "
+            f"recall@{k} {recall / len(queries):.3f}  "
+            f"chunks embedded {embedded}/{len(texts)} "
+            f"({len(texts) / embedded:.1f}x fewer)"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,13 @@ import os
 import time
 
 import yaml
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.chat_models import AzureChatOpenAI
 from langchain.embeddings import AzureOpenAIEmbeddings
 
+from online_research_engine.deadline import Deadline
 from online_research_engine.fetch_web_content import WebContentFetcher
 from online_research_engine.llm_answer import GPTAnswer
-from online_research_engine.locate_reference import ReferenceLocator
+from online_research_engine.locate_reference import IncrementalReferenceLocator
 from online_research_engine.retrieval import EmbeddingRetriever
 
 if __name__ == "__main__":
@@ -24,7 +24,6 @@ if __name__ == "__main__":
         azure_endpoint=config["azure_endpoint"],
         openai_api_key=config["azure_openai_api_key"],
         openai_api_version=config["azure_openai_api_version"],
-        callbacks=[StreamingStdOutCallbackHandler()],
     )
 
     embedding_model = AzureOpenAIEmbeddings(
@@ -38,14 +37,18 @@ if __name__ == "__main__":
     output_format = ""  # User can specify output format
     profile = ""  # User can define the role for LLM
 
+    # Search, crawling and retrieval share a time budget; pages still loading when it
+    # runs out are dropped
+    deadline = Deadline(20)
+
     # Fetch web content based on the query
     web_contents_fetcher = WebContentFetcher(query, config_path=config_path)
-    web_contents, services_response = web_contents_fetcher.fetch()
+    web_contents, services_response = web_contents_fetcher.fetch(deadline=deadline)
 
     # Retrieve relevant documents using embeddings
     retriever = EmbeddingRetriever(embedding_model=embedding_model)
     relevant_docs_list = retriever.retrieve_embeddings(
-        web_contents, services_response["links"], query
+        web_contents, services_response["links"], query, deadline=deadline
     )
     content_processor = GPTAnswer(llm=llm, config_path=config_path)
     formatted_relevant_docs = content_processor._format_reference(
@@ -56,24 +59,26 @@ if __name__ == "__main__":
     # Measure the time taken to get an answer from the GPT model
     start = time.time()
 
-    # Generate answer from ChatOpenAI
-    ai_message_obj = content_processor.get_answer(
+    # Stream the answer from ChatOpenAI, locating the reference sources of the quoted
+    # sentences as soon as each of them is complete
+    print("\n\n", "=" * 30, "GPT's Answer: ", "=" * 30, "\n")
+    locator = IncrementalReferenceLocator(services_response)
+    reference_cards = []
+    for chunk in content_processor.stream_answer(
         query,
         formatted_relevant_docs,
         services_response["language"],
         output_format,
         profile,
-    )
-    answer = ai_message_obj.content + "\n"
+    ):
+        print(chunk, end="", flush=True)
+        reference_cards.extend(locator.feed(chunk))
+    reference_cards.extend(locator.close())
     end = time.time()
 
-    print(answer)
-
     print("\n\nGPT Answer time:", end - start, "s")
 
     # Optional Part: display the reference sources of the quoted sentences in LLM's answer
     print("\n\n", "=" * 30, "Reference Cards: ", "=" * 30, "\n")
-    locator = ReferenceLocator(answer, services_response)
-    reference_cards = locator.locate_source()
     json_formatted_cards = json.dumps(reference_cards, indent=4)
     print(json_formatted_cards)
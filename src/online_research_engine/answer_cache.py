@@ -0,0 +1,262 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+
+import numpy as np
+
+from .search_cache import SearchCache
+
+
+@dataclass(slots=True)
+class CachedAnswer:
+    """An answer found in the AnswerCache for a query similar to an earlier one."""
+
+    query: str  # The earlier query the answer was computed for
+    answer: str
+    reference_cards: list | None
+    similarity: float  # Cosine similarity of the two query embeddings
+    age: float  # Seconds since the answer was computed
+
+
+@dataclass(slots=True)
+class _Entry:
+    query: str
+    answer: str
+    reference_cards: list | None
+    vector: np.ndarray  # Normalized query embedding
+    created_at: float
+    expires_at: float
+    latency: float  # Seconds it took to compute the answer
+
+
+class AnswerCache:
+    """
+    Semantic cache of research answers keyed on the embedding of the query.
+    A query whose embedding has a cosine similarity of at least threshold with a cached
+    query, asked with the same settings (language, output format, profile, date range...),
+    gets the cached answer and reference cards back instead of running search, crawling,
+    retrieval and the LLM again. Answers to searches restricted to a recent date range
+    expire sooner, with the same TTLs as SearchCache.
+    Entries live in memory, where only the max_entries most recent ones are kept.
+    """
+
+    THRESHOLD = 0.95  # Cosine similarity from which two queries share an answer
+    DEFAULT_TTL = 6 * 60 * 60  # Seconds an answer without date range stays cached
+    MAX_ENTRIES = 1024
+
+    def __init__(
+        self,
+        embedding_model,
+        threshold=THRESHOLD,
+        default_ttl=DEFAULT_TTL,
+        freshness_ttls=None,
+        max_entries=MAX_ENTRIES,
+    ):
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.default_ttl = default_ttl
+        self.freshness_ttls = {**SearchCache.FRESHNESS_TTLS, **(freshness_ttls or {})}
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._scopes = {}  # Settings key -> entries and the matrix of their vectors
+        self._size = 0
+        self._counters = dict.fromkeys(
+            ["hits", "misses", "stores", "expirations", "evictions"], 0
+        )
+        self._saved_seconds = 0.0  # Computation time of the answers served from cache
+
+    def _normalize_freshness(self, freshness):
+        # Accept SerperClient.DateRanges and Bing Freshness members as well as their values
+        if isinstance(freshness, Enum):
+            freshness = freshness.value
+        return freshness or None
+
+    def _make_scope(self, freshness, settings):
+        # Only answers computed with equivalent settings may be shared, as in SearchCache
+        normalized = {
+            key: str(value.value if isinstance(value, Enum) else value)
+            for key, value in settings.items()
+            if value is not None and value != ""
+        }
+        return json.dumps([freshness, normalized], sort_keys=True, ensure_ascii=False)
+
+    def _normalize(self, query_vector):
+        vector = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get_ttl(self, freshness=None):
+        """Returns the seconds an answer computed with this date range stays cached."""
+        return self.freshness_ttls.get(
+            self._normalize_freshness(freshness), self.default_ttl
+        )
+
+    def lookup(self, query, freshness=None, query_vector=None, **settings):
+        """
+        Returns the CachedAnswer of the cached query most similar to this one, if its
+        similarity reaches the threshold and it has not expired, else None.
+        The query embedding is computed unless query_vector is given.
+        """
+        if query_vector is None:
+            query_vector = self.embedding_model.embed_query(query)
+        vector = self._normalize(query_vector)
+        scope_key = self._make_scope(self._normalize_freshness(freshness), settings)
+
+        with self._lock:
+            entry, similarity = None, 0.0
+            scope = self._scopes.get(scope_key)
+            if scope is not None and self._drop_expired(scope_key, scope):
+                entry, similarity = self._most_similar(scope, vector)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            self._saved_seconds += entry.latency
+        return CachedAnswer(
+            entry.query,
+            entry.answer,
+            entry.reference_cards,
+            similarity,
+            time.time() - entry.created_at,
+        )
+
+    def store(
+        self,
+        query,
+        answer,
+        reference_cards=None,
+        freshness=None,
+        latency=0.0,
+        query_vector=None,
+        **settings,
+    ):
+        """
+        Caches the answer to the query, and optionally its reference cards, for the TTL of
+        its date range. latency is the time it took to compute, counted as saved on hits.
+        """
+        if query_vector is None:
+            query_vector = self.embedding_model.embed_query(query)
+        freshness = self._normalize_freshness(freshness)
+        now = time.time()
+        entry = _Entry(
+            query,
+            answer,
+            reference_cards,
+            self._normalize(query_vector),
+            now,
+            now + self.get_ttl(freshness),
+            latency,
+        )
+        scope_key = self._make_scope(freshness, settings)
+        with self._lock:
+            scope = self._scopes.setdefault(scope_key, {"entries": [], "matrix": None})
+            scope["entries"].append(entry)
+            scope["matrix"] = None
+            self._size += 1
+            self._counters["stores"] += 1
+            while self._size > self.max_entries:
+                self._evict_oldest()
+
+    def _most_similar(self, scope, vector):
+        # Return the entry of the scope most similar to the vector if it reaches the
+        # threshold, with its similarity; the caller must hold the lock
+        if scope["matrix"] is None:
+            scope["matrix"] = np.stack([entry.vector for entry in scope["entries"]])
+        similarities = scope["matrix"] @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None, 0.0
+        return scope["entries"][best], float(similarities[best])
+
+    def _drop_expired(self, scope_key, scope):
+        # Remove the expired entries of a scope and return whether any are left;
+        # the caller must hold the lock
+        now = time.time()
+        entries = [entry for entry in scope["entries"] if entry.expires_at > now]
+        expired = len(scope["entries"]) - len(entries)
+        if expired:
+            self._counters["expirations"] += expired
+            self._size -= expired
+            scope["entries"], scope["matrix"] = entries, None
+        if not entries:
+            del self._scopes[scope_key]
+        return bool(entries)
+
+    def _evict_oldest(self):
+        # Remove the oldest entry of all scopes; the caller must hold the lock
+        scope_key, scope = min(
+            self._scopes.items(), key=lambda item: item[1]["entries"][0].created_at
+        )
+        scope["entries"].pop(0)
+        scope["matrix"] = None
+        if not scope["entries"]:
+            del self._scopes[scope_key]
+        self._size -= 1
+        self._counters["evictions"] += 1
+
+    def get_or_compute(self, query, compute, freshness=None, **settings):
+        """
+        Returns (answer, reference cards) for the query from the cache, or from compute()
+        on a miss, which is then cached. compute() may run anything from GPTAnswer.get_answer
+        alone to the whole search, crawl, retrieval and answer pipeline, and must return
+        (answer, reference cards).
+        """
+        query_vector = self.embedding_model.embed_query(query)
+        cached = self.lookup(query, freshness, query_vector, **settings)
+        if cached is not None:
+            return cached.answer, cached.reference_cards
+
+        start = time.monotonic()
+        answer, reference_cards = compute()
+        self.store(
+            query,
+            answer,
+            reference_cards,
+            freshness,
+            time.monotonic() - start,
+            query_vector,
+            **settings,
+        )
+        return answer, reference_cards
+
+    async def aget_or_compute(self, query, acompute, freshness=None, **settings):
+        # Coroutine counterpart of get_or_compute, where acompute() is awaited
+        query_vector = await self.embedding_model.aembed_query(query)
+        cached = self.lookup(query, freshness, query_vector, **settings)
+        if cached is not None:
+            return cached.answer, cached.reference_cards
+
+        start = time.monotonic()
+        answer, reference_cards = await acompute()
+        self.store(
+            query,
+            answer,
+            reference_cards,
+            freshness,
+            time.monotonic() - start,
+            query_vector,
+            **settings,
+        )
+        return answer, reference_cards
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+            self._size = 0
+
+    def stats(self):
+        """
+        Returns the hit, miss, store, expiration and eviction counters, the hit rate, the
+        seconds of computation saved by hits and the number of cached answers.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["hits"] + stats["misses"]
+            stats.update(
+                hit_rate=stats["hits"] / lookups if lookups else 0.0,
+                saved_seconds=self._saved_seconds,
+                entries=self._size,
+            )
+            return stats
@@ -0,0 +1,296 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .deadline import as_deadline
+from .fetch_web_content import WebContentFetcher
+from .llm_answer import GPTAnswer
+from .locate_reference import ReferenceLocator
+from .retrieval import EmbeddingRetriever
+from .urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ResearchResult:
+    """Outcome of one query of a batch."""
+
+    query: str
+    answer: str | None = None
+    reference_cards: list | int | None = None  # As returned by locate_source
+    services_response: dict | None = None  # None for cached answers
+    cached: bool = False  # Whether the answer came from the AnswerCache
+    error: str | None = None  # Why the query has no answer, if it has none
+    reference_error: str | None = None  # Why the references of an answer were not found
+
+
+@dataclass(slots=True)
+class BatchResearchResult:
+    """Results of a batch in the order of its queries, with its throughput statistics."""
+
+    results: list
+    stats: dict = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+
+class BatchResearcher:
+    """
+    Answers many queries as one job, sharing the work between them. The searches run
+    concurrently, every page found by any query is crawled and embedded once, each query
+    is embedded once for both the cache and retrieval, and the LLM answers at most
+    llm_concurrency queries at a time. Identical queries in a batch are answered once.
+    With an AnswerCache, which must use the same embedding model, queries similar to
+    earlier ones are answered from it and skip the rest of the pipeline.
+    """
+
+    SEARCH_CONCURRENCY = 8  # Maximum number of queries searched at the same time
+    LLM_CONCURRENCY = 4  # Maximum number of LLM calls in flight
+
+    def __init__(
+        self,
+        llm,
+        embedding_model,
+        search_services=[WebContentFetcher.SearchServices.SERPER],
+        search_args={},
+        config_path=None,
+        crawl_executor=None,
+        browser_pool=None,
+        content_cache=None,
+        search_cache=None,
+        embedding_cache=None,
+        answer_cache=None,
+        politeness=None,
+        search_concurrency=SEARCH_CONCURRENCY,
+        llm_concurrency=LLM_CONCURRENCY,
+        context_tokens=GPTAnswer.CONTEXT_TOKENS,
+    ):
+        self.search_services = search_services
+        self.search_args = search_args
+        self.config_path = config_path
+        self.crawl_executor = crawl_executor
+        self.browser_pool = browser_pool
+        self.content_cache = content_cache
+        self.search_cache = search_cache
+        self.answer_cache = answer_cache
+        self.politeness = politeness
+        self.search_concurrency = search_concurrency
+        self.llm_concurrency = llm_concurrency
+        # One retriever and one answerer serve every query of every batch
+        self.retriever = EmbeddingRetriever(
+            embedding_model, embedding_cache=embedding_cache, backend="numpy"
+        )
+        self.gpt_answer = GPTAnswer(
+            llm, config_path=config_path, context_tokens=context_tokens
+        )
+
+    def _make_fetcher(self, query):
+        # Build a fetcher sharing the batch's services, caches and crawl executor
+        return WebContentFetcher(
+            query,
+            search_services=self.search_services,
+            search_args=self.search_args,
+            config_path=self.config_path,
+            crawl_executor=self.crawl_executor,
+            browser_pool=self.browser_pool,
+            content_cache=self.content_cache,
+            search_cache=self.search_cache,
+            politeness=self.politeness,
+        )
+
+    def _get_freshness(self):
+        # Date range or freshness restriction of the searches, which sets the cache TTL
+        for args in self.search_args.values():
+            freshness = args.get("date_range") or args.get("freshness")
+            if freshness:
+                return freshness
+        return None
+
+    def run(self, queries, output_format="", profile="", deadline=None):
+        """
+        Answers every query and returns a BatchResearchResult with a ResearchResult per
+        query, in the order of the queries. A deadline, a Deadline or a timeout in seconds,
+        bounds the searches, crawling and embedding like it does for a single query.
+        """
+        start = time.monotonic()
+        deadline = as_deadline(deadline)
+        unique_queries = list(dict.fromkeys(queries))
+        results = {query: ResearchResult(query) for query in unique_queries}
+        cache_settings = {
+            "freshness": self._get_freshness(),
+            "output_format": output_format,
+            "profile": profile,
+            "search_services": sorted(service.name for service in self.search_services),
+            "search_args": self.search_args,
+        }
+
+        # Embed the queries concurrently, for the answer cache and for retrieval
+        # Without their vectors by the deadline, the cache is skipped and chunks are
+        # ranked by BM25
+        query_vectors = self.retriever.embed_queries(unique_queries, deadline)
+        if query_vectors is not None:
+            query_vectors = dict(zip(unique_queries, query_vectors))
+        pending = unique_queries
+        if self.answer_cache is not None and query_vectors is not None:
+            pending = []
+            for query in unique_queries:
+                cached = self.answer_cache.lookup(
+                    query, query_vector=query_vectors[query], **cache_settings
+                )
+                if cached is None:
+                    pending.append(query)
+                    continue
+                results[query].answer = cached.answer
+                results[query].reference_cards = cached.reference_cards
+                results[query].cached = True
+
+        # Search for all the queries concurrently
+        search_start = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.search_concurrency, len(pending))),
+            thread_name_prefix="batch-search",
+        ) as executor:
+            responses = executor.map(
+                lambda query: self._make_fetcher(query).search(deadline), pending
+            )
+            searched = []
+            for query, response in zip(pending, responses):
+                if response is None:
+                    results[query].error = "No search service answered"
+                    continue
+                results[query].services_response = response
+                searched.append(query)
+        search_seconds = time.monotonic() - search_start
+
+        # Crawl every page found by any query once, by canonical URL
+        crawl_start = time.monotonic()
+        pages = {}  # Canonical URL -> first link to the page
+        for query in searched:
+            for link in results[query].services_response["links"]:
+                pages.setdefault(canonicalize_url(link), link)
+        page_links = list(pages.values())
+        contents = self._make_fetcher(None).crawl(page_links, deadline)
+        contents_by_url = {
+            link: content for link, content in zip(page_links, contents) if content
+        }
+        crawl_seconds = time.monotonic() - crawl_start
+
+        # Embed every page once and rank the pages of each query
+        retrieval_start = time.monotonic()
+        relevant_documents = self.retriever.retrieve_embeddings_batch(
+            contents_by_url,
+            [results[query].services_response["links"] for query in searched],
+            searched,
+            deadline,
+            (
+                None
+                if query_vectors is None
+                else [query_vectors[query] for query in searched]
+            ),
+        )
+        retrieval_seconds = time.monotonic() - retrieval_start
+
+        # Answer with a bounded number of LLM calls in flight
+        answer_start = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=self.llm_concurrency, thread_name_prefix="batch-llm"
+        ) as executor:
+            list(
+                executor.map(
+                    lambda args: self._answer(
+                        results[args[0]], args[1], output_format, profile
+                    ),
+                    zip(searched, relevant_documents),
+                )
+            )
+        answer_seconds = time.monotonic() - answer_start
+
+        answered = [query for query in searched if results[query].error is None]
+        if self.answer_cache is not None and query_vectors is not None and answered:
+            # Each computed answer is credited with its share of the batch's time
+            latency = (time.monotonic() - start) / len(answered)
+            for query in answered:
+                self.answer_cache.store(
+                    query,
+                    results[query].answer,
+                    results[query].reference_cards,
+                    latency=latency,
+                    query_vector=query_vectors[query],
+                    **cache_settings,
+                )
+
+        elapsed = time.monotonic() - start
+        stats = {
+            "queries": len(queries),
+            "unique_queries": len(unique_queries),
+            "cached": len(unique_queries) - len(pending),
+            "answered": len(answered),
+            "failed": sum(result.error is not None for result in results.values()),
+            "links": sum(
+                len(results[query].services_response["links"]) for query in searched
+            ),
+            "unique_pages": len(page_links),
+            "crawled_pages": len(contents_by_url),
+            "search_seconds": search_seconds,
+            "crawl_seconds": crawl_seconds,
+            "retrieval_seconds": retrieval_seconds,
+            "answer_seconds": answer_seconds,
+            "elapsed_seconds": elapsed,
+            "queries_per_second": len(queries) / elapsed if elapsed else 0.0,
+        }
+        logger.info(
+            "Answered %d queries in %.1fs (%.2f queries/s): %d cached, %d failed, "
+            "%d pages crawled for %d links",
+            stats["queries"],
+            elapsed,
+            stats["queries_per_second"],
+            stats["cached"],
+            stats["failed"],
+            stats["crawled_pages"],
+            stats["links"],
+            extra={"batch_stats": stats},
+        )
+        return BatchResearchResult([results[query] for query in queries], stats)
+
+    def _answer(self, result, relevant_documents, output_format, profile):
+        # Ask the LLM for the answer to one query and locate its references
+        services_response = result.services_response
+        try:
+            formatted_relevant_docs = self.gpt_answer._format_reference(
+                relevant_documents, services_response["links"]
+            )
+            answer = self.gpt_answer.get_answer(
+                result.query,
+                formatted_relevant_docs,
+                services_response["language"],
+                output_format,
+                profile,
+            ).content
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            logger.warning(
+                "Query %r failed: %s", result.query, result.error, exc_info=True
+            )
+            return
+        result.answer = answer
+
+        # An answer whose citations cannot be matched, e.g. to a URL that is not among
+        # the links, is still an answer
+        try:
+            result.reference_cards = ReferenceLocator(
+                answer + "\n", services_response
+            ).locate_source()
+        except Exception as e:
+            result.reference_error = f"{type(e).__name__}: {e}"
+            logger.warning(
+                "References of query %r not located: %s",
+                result.query,
+                result.reference_error,
+                exc_info=True,
+            )
@@ -0,0 +1,87 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.schema.embeddings import Embeddings
+
+from .tokens import count_tokens as count_tiktoken_tokens
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Wraps a LangChain embedding model to control how documents are sent to it.
+    Texts are packed in order into batches of at most max_batch_tokens tokens and
+    max_batch_size texts, the batches are embedded concurrently with at most
+    max_concurrency requests in flight across all callers, and failed batches are retried
+    with exponential backoff.
+    """
+
+    MAX_BATCH_TOKENS = 8192  # Token budget of a single embedding request
+    MAX_BATCH_SIZE = 256  # Maximum number of texts in a single embedding request
+    MAX_CONCURRENCY = 8  # Maximum number of embedding requests in flight
+    MAX_RETRIES = 3  # Retries of a failed batch before giving up
+    RETRY_DELAY = 0.5  # Seconds before the first retry, doubled after every failure
+
+    def __init__(
+        self,
+        embedding_model,
+        max_batch_tokens=MAX_BATCH_TOKENS,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_concurrency=MAX_CONCURRENCY,
+        max_retries=MAX_RETRIES,
+        count_tokens=None,
+    ):
+        self.embedding_model = embedding_model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        # Callable returning the number of tokens of a text, tiktoken by default
+        self.count_tokens = count_tokens or count_tiktoken_tokens
+        self._request_slots = threading.BoundedSemaphore(max_concurrency)
+
+    def make_batches(self, texts):
+        """Splits texts, in order, into lists that fit the token budget and batch size."""
+        batches, batch, batch_tokens = [], [], 0
+        for text in texts:
+            tokens = self.count_tokens(text)
+            if batch and (
+                batch_tokens + tokens > self.max_batch_tokens
+                or len(batch) >= self.max_batch_size
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _with_retries(self, embed, argument):
+        # Call the model within the concurrency limit, retrying failures with backoff
+        for attempt in range(self.max_retries + 1):
+            with self._request_slots:
+                try:
+                    return embed(argument)
+                except Exception:
+                    if attempt == self.max_retries:
+                        raise
+            time.sleep(self.RETRY_DELAY * 2**attempt)
+
+    def _embed_batch(self, batch):
+        return self._with_retries(self.embedding_model.embed_documents, batch)
+
+    def embed_documents(self, texts):
+        batches = self.make_batches(texts)
+        if len(batches) <= 1:
+            results = map(self._embed_batch, batches)
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_concurrency, len(batches)),
+                thread_name_prefix="embeddings",
+            ) as executor:
+                results = list(executor.map(self._embed_batch, batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def embed_query(self, text):
+        return self._with_retries(self.embedding_model.embed_query, text)
@@ -0,0 +1,75 @@
+import math
+import re
+from collections import Counter
+
+# Runs of letters and digits, except that every CJK ideograph is a token of its own
+TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff]|[^\W\u4e00-\u9fff]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 index over a fixed list of texts, backed by an inverted index
+    so that scoring a query only touches the texts containing its terms.
+    """
+
+    K1 = 1.5  # Term frequency saturation
+    B = 0.75  # Document length normalization
+
+    def __init__(self, texts, k1=K1, b=B):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> list of (text index, term frequency)
+        self.lengths = []
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            self.lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((i, frequency))
+        self.average_length = sum(self.lengths) / len(self.lengths) if texts else 0.0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def scores(self, query):
+        """Returns the BM25 score of every text for the query."""
+        scores = [0.0] * len(self.lengths)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (len(self.lengths) - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for i, frequency in postings:
+                length_norm = (
+                    1 - self.b + self.b * self.lengths[i] / self.average_length
+                )
+                scores[i] += (
+                    idf
+                    * frequency
+                    * (self.k1 + 1)
+                    / (frequency + self.k1 * length_norm)
+                )
+        return scores
+
+    def rank(self, query, n=None):
+        """Returns the indices of the n best scoring texts, best first, ties in text order."""
+        scores = self.scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: -scores[i])
+        return ranked if n is None else ranked[:n]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuses several rankings of the same items into one, scoring each item by the sum of
+    1 / (k + rank) over the rankings it appears in. Ties keep the order of first appearance.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda item: -scores[item])
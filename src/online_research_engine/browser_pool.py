@@ -0,0 +1,206 @@
+import asyncio
+import atexit
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+
+class BrowserPool:
+    """
+    A long-lived headless Chromium shared by all scrapers.
+    The browser runs on its own event loop thread, so any thread can render pages through it.
+    Every render gets a fresh browser context, at most max_pages of them at a time, and the
+    context is always closed afterwards, including on timeouts and errors.
+    Renders that fail, including when Chromium cannot be launched, return "" so callers
+    keep the content they already have. A failed launch is not retried for
+    LAUNCH_RETRY_INTERVAL seconds, so pages rendered meanwhile fail at once.
+    """
+
+    MAX_PAGES = 4  # Maximum number of pages rendering at the same time
+    NAVIGATION_TIMEOUT = 15  # Seconds allowed for a page navigation
+    LAUNCH_RETRY_INTERVAL = 300  # Seconds before launching again after a failed launch
+    BLOCKED_RESOURCE_TYPES = frozenset(["image", "font", "media"])
+
+    _shared = None  # Process-wide pool reused by all scrapers
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_pages=MAX_PAGES,
+        navigation_timeout=NAVIGATION_TIMEOUT,
+        blocked_resource_types=BLOCKED_RESOURCE_TYPES,
+        user_agent=None,
+    ):
+        self.max_pages = max_pages
+        self.navigation_timeout = navigation_timeout
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.user_agent = user_agent
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._semaphore = None
+        self._relaunch_lock = None
+        self._closed = False
+        self._launch_error = None  # Error of the last failed launch
+        self._launch_failed_at = None  # time.monotonic() of the last failed launch
+
+    @classmethod
+    def get_shared(cls):
+        # Return the process-wide pool, creating it on first use
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def shutdown_shared(cls):
+        # Close the process-wide pool if it was ever created
+        with cls._shared_lock:
+            previous, cls._shared = cls._shared, None
+        if previous is not None:
+            previous.close()
+
+    def _ensure_started(self):
+        # Start the event loop thread and launch the browser on first use
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(
+                    "cannot render pages after the browser pool is closed"
+                )
+            if self._thread is not None:
+                return self._loop
+            if (
+                self._launch_error is not None
+                and time.monotonic() - self._launch_failed_at
+                < self.LAUNCH_RETRY_INTERVAL
+            ):
+                raise self._launch_error
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="browser-pool", daemon=True
+            )
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._launch(), loop).result()
+            except BaseException as e:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+                if isinstance(e, PlaywrightError):
+                    self._launch_error, self._launch_failed_at = e, time.monotonic()
+                raise
+            self._launch_error = None
+            self._loop, self._thread = loop, thread
+            return loop
+
+    async def _launch(self):
+        # Start Playwright and Chromium on the pool's event loop
+        self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=True)
+        except BaseException:
+            await self._playwright.stop()
+            raise
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._relaunch_lock = asyncio.Lock()
+
+    async def _relaunch(self):
+        # Replace a browser that crashed or was killed
+        async with self._relaunch_lock:
+            if not self._browser.is_connected():
+                self._browser = await self._playwright.chromium.launch(headless=True)
+
+    async def _block_resources(self, route):
+        # Skip downloads that never contribute text to the page
+        if route.request.resource_type in self.blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, url):
+        # Render a page in its own context and return its HTML
+        async with self._semaphore:
+            if not self._browser.is_connected():
+                await self._relaunch()
+
+            context = await self._browser.new_context(user_agent=self.user_agent)
+            try:
+                if self.blocked_resource_types:
+                    await context.route("**/*", self._block_resources)
+                page = await context.new_page()
+                page.set_default_navigation_timeout(self.navigation_timeout * 1000)
+                try:
+                    response = await page.goto(url)
+                    if response is not None:
+                        await response.finished()
+                    return await page.content()
+                except PlaywrightError:
+                    # Timeouts, net::ERR_* navigation failures and crashed pages
+                    return ""
+            finally:
+                await context.close()
+
+    def submit(self, url):
+        """Schedules a render of the URL and returns a concurrent.futures.Future of its HTML."""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._render(url), loop)
+
+    def render(self, url, timeout=None):
+        """
+        Renders the URL in the shared browser and returns the page HTML, or "" if the
+        render failed or Chromium could not be launched.
+        With a timeout in seconds, the render is cancelled if it takes longer.
+        """
+        try:
+            future = self.submit(url)
+        except PlaywrightError:
+            return ""
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            return ""
+        except PlaywrightError:
+            return ""
+
+    async def arender(self, url):
+        # Awaitable counterpart of render for coroutines running on another event loop
+        loop = asyncio.get_running_loop()
+        try:
+            future = await loop.run_in_executor(None, self.submit, url)
+            return await asyncio.wrap_future(future)
+        except PlaywrightError:
+            return ""
+
+    async def _shutdown(self):
+        # Close the browser and stop Playwright
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+        finally:
+            if self._playwright is not None:
+                await self._playwright.stop()
+
+    def close(self):
+        """Closes the browser and stops the event loop thread."""
+        with self._lock:
+            self._closed = True
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=30)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+atexit.register(BrowserPool.shutdown_shared)
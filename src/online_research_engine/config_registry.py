@@ -0,0 +1,66 @@
+import os
+import threading
+
+import yaml
+from langchain.prompts import PromptTemplate
+
+# Configuration used when no config_path is given
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config", "config.yaml")
+
+
+class ConfigRegistry:
+    """
+    Process-wide cache of parsed YAML configuration files and of the prompt templates they
+    define. Each file is parsed once and parsed again only after its modification time or
+    size changes, so building clients and answering queries never re-reads an unchanged
+    file, while edits still take effect without a restart.
+    Returned configurations are shared and must not be modified.
+    """
+
+    _shared = None  # Process-wide registry reused by all clients and answerers
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # Absolute path -> (file stamp, configuration, templates)
+
+    @classmethod
+    def get_shared(cls):
+        # Return the process-wide registry, creating it on first use
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _get_entry(self, config_path):
+        # Return the cached entry of the file, reloading it if the file changed
+        path = os.path.abspath(config_path or DEFAULT_CONFIG_PATH)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != stamp:
+                with open(path, "r") as file:
+                    config = yaml.safe_load(file)
+                entry = (stamp, config, {})
+                self._entries[path] = entry
+            return entry
+
+    def get_config(self, config_path=None):
+        """Returns the parsed configuration file, the packaged config.yaml by default."""
+        return self._get_entry(config_path)[1]
+
+    def get_template(self, input_variables, config_path=None, key="template"):
+        """
+        Returns the PromptTemplate stored under key in the configuration file, built and
+        validated once per version of the file.
+        """
+        _, config, templates = self._get_entry(config_path)
+        with self._lock:
+            template = templates.get(key)
+            if template is None:
+                template = PromptTemplate(
+                    input_variables=input_variables, template=config[key]
+                )
+                templates[key] = template
+            return template
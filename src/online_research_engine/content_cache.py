@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+CachedContent = namedtuple(
+    "CachedContent", ["content", "etag", "last_modified", "fresh"]
+)
+
+
+class ContentCache:
+    """
+    On-disk cache of extracted main content, keyed by URL and extraction variant.
+    Entries expire after a per-domain TTL and the least recently used entries are evicted
+    once the cache grows past its size budget. Expired entries keep their ETag and
+    Last-Modified validators so they can be revalidated with a conditional request.
+    The cache lives in a SQLite database in WAL mode, so any number of threads and
+    processes can share it.
+    """
+
+    DEFAULT_TTL = (
+        24 * 60 * 60
+    )  # Seconds an entry stays fresh unless its domain says otherwise
+    MAX_SIZE_BYTES = 256 * 1024 * 1024  # Size budget of the stored content
+
+    def __init__(
+        self,
+        path=None,
+        default_ttl=DEFAULT_TTL,
+        domain_ttls=None,
+        max_size_bytes=MAX_SIZE_BYTES,
+    ):
+        if not path:
+            path = os.path.join(
+                os.path.expanduser("~"),
+                ".cache",
+                "online_research_engine",
+                "content_cache.sqlite3",
+            )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.default_ttl = default_ttl
+        # Maps a domain (e.g. "wikipedia.org") to the TTL of its pages and subdomains
+        self.domain_ttls = dict(domain_ttls or {})
+        self.max_size_bytes = max_size_bytes
+
+        self._local = threading.local()  # SQLite connections cannot cross threads
+        self._counters_lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ["hits", "misses", "revalidations", "stores", "evictions"], 0
+        )
+
+        connection = self._connect()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS content (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """)
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS content_accessed_at ON content (accessed_at)"
+        )
+
+    def _connect(self):
+        # Return this thread's connection, opening it on first use
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, counter, amount=1):
+        with self._counters_lock:
+            self._counters[counter] += amount
+
+    def get_ttl(self, url):
+        # Use the TTL of the most specific configured domain the URL belongs to
+        host = (urlsplit(url).hostname or "").lower()
+        while host:
+            if host in self.domain_ttls:
+                return self.domain_ttls[host]
+            host = host.partition(".")[2]
+        return self.default_ttl
+
+    def get(self, key):
+        """
+        Returns the CachedContent stored under key, or None. Expired entries are returned
+        with fresh=False so their validators can be used for revalidation.
+        """
+        now = time.time()
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT content, etag, last_modified, expires_at FROM content WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+
+        content, etag, last_modified, expires_at = row
+        fresh = expires_at > now
+        self._count("hits" if fresh else "misses")
+        connection.execute(
+            "UPDATE content SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        return CachedContent(content, etag, last_modified, fresh)
+
+    def put(self, key, url, content, etag=None, last_modified=None):
+        """Stores extracted content and evicts least recently used entries over the budget."""
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO content VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    content,
+                    etag,
+                    last_modified,
+                    now + self.get_ttl(url),
+                    now,
+                    size,
+                ),
+            )
+            evicted = self._evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._count("stores")
+        self._count("evictions", evicted)
+
+    def _evict(self, connection):
+        # Delete least recently used entries until the cache fits its size budget
+        total_size = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM content"
+        ).fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return 0
+
+        evicted_keys = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM content ORDER BY accessed_at"
+        ):
+            if total_size <= self.max_size_bytes:
+                break
+            evicted_keys.append((key,))
+            total_size -= size
+        connection.executemany("DELETE FROM content WHERE key = ?", evicted_keys)
+        return len(evicted_keys)
+
+    def refresh(self, key, url):
+        """Marks an entry as fresh again after the server confirmed it did not change."""
+        now = time.time()
+        self._connect().execute(
+            "UPDATE content SET expires_at = ?, accessed_at = ? WHERE key = ?",
+            (now + self.get_ttl(url), now, key),
+        )
+        self._count("revalidations")
+
+    def clear(self):
+        """Deletes every cached entry."""
+        self._connect().execute("DELETE FROM content")
+
+    def stats(self):
+        """
+        Returns this process's hit, miss, revalidation, store and eviction counters,
+        along with the number of entries and bytes currently stored by all processes.
+        """
+        entries, size = (
+            self._connect()
+            .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM content")
+            .fetchone()
+        )
+        with self._counters_lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update(
+            entries=entries,
+            size_bytes=size,
+            hit_rate=(
+                (stats["hits"] + stats["revalidations"]) / lookups if lookups else 0.0
+            ),
+        )
+        return stats
@@ -0,0 +1,206 @@
+import re
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+
+class ContentExtractorInterface:
+    def parse(self, html_string: str):
+        """Parse an HTML string into the document representation used by the extractor."""
+        pass
+
+    def extract_main_content(self, document, rule: int = 0) -> str:
+        """Extract the main content of a parsed document using crawl rule 0 or 1."""
+        pass
+
+    def create_chunk_parser(self):
+        """
+        Return a parser that is fed HTML text chunks as they arrive and whose close()
+        returns a tree for finish_chunks, or None if only whole strings are supported.
+        The parser must be fed and closed on a single thread.
+        """
+        return None
+
+    def finish_chunks(self, tree):
+        """Turn the tree of a closed chunk parser into the document parse() returns."""
+        return tree
+
+    def _get_tag_rule(self, rule):
+        # Rule 0 collects headings and paragraphs, rule 1 also collects divs
+        return re.compile("^(h[1-6]|p|div)" if rule == 1 else "^(h[1-6]|p)")
+
+
+class SoupContentExtractor(ContentExtractorInterface):
+    """
+    Reference extractor built on BeautifulSoup find_all + get_text.
+    Nested matching tags are re-read at every level, so it is quadratic on deeply nested pages.
+    """
+
+    def parse(self, html_string: str):
+        # Convert the HTML string to a BeautifulSoup object for parsing
+        return BeautifulSoup(html_string, "lxml")
+
+    def extract_main_content(self, document, rule: int = 0) -> str:
+        # Extract the main content from a BeautifulSoup object
+        main_content = []
+        tag_rule = self._get_tag_rule(rule)
+        # Iterate through specified tags and collect their text
+        for tag in document.find_all(tag_rule):
+            tag_text = tag.get_text().strip()
+            if tag_text and len(tag_text.split()) > 10:
+                main_content.append(tag_text)
+        return "\n".join(main_content).strip()
+
+
+class _TextIndex:
+    # Text of a document visited once: every string in document order, plus the
+    # slice of strings covered by each tag matching rule 0 or rule 1
+    __slots__ = ("strings", "spans")
+
+    def __init__(self):
+        self.strings = []
+        self.spans = (
+            []
+        )  # [start, end, matches rule 0] per matching tag, in document order
+
+
+class _ChunkParser:
+    # Incremental lxml HTML parser; close() returns the document root, or None for a
+    # document without any element
+    # lxml aborts the process if a feed parser is used from more than one thread
+    # lxml never closes a script or style element whose end tag is split across two
+    # feeds, so the text from the last "<" of a chunk on is held back for the next one
+
+    def __init__(self):
+        # Same parser settings BeautifulSoup uses for its "lxml" tree builder; huge_tree
+        # lifts the depth limit that only applies when lxml builds the tree itself
+        self._parser = etree.HTMLParser(recover=True, strip_cdata=False, huge_tree=True)
+        self._first = True
+        self._pending = ""  # Tail of the chunks that may end inside a tag
+
+    def feed(self, chunk):
+        if self._first and chunk:
+            # BeautifulSoup drops a leading byte order mark before parsing
+            if chunk[0] == "\N{BYTE ORDER MARK}":
+                chunk = chunk[1:]
+            self._first = False
+        text = self._pending + chunk
+        split = text.rfind("<")
+        if split == -1:
+            split = len(text)
+        self._pending = text[split:]
+        if split:
+            self._parser.feed(text[:split])
+
+    def close(self):
+        try:
+            if self._pending:
+                self._parser.feed(self._pending)
+            return self._parser.close()
+        except etree.XMLSyntaxError:
+            return None
+
+
+class LxmlContentExtractor(ContentExtractorInterface):
+    """
+    Fast extractor that parses with lxml directly and walks the tree once.
+    Each text node is visited a single time and every matching tag only records the slice
+    of text nodes it covers, so nested tags cost one join instead of a subtree traversal.
+    The output is identical to SoupContentExtractor for both rules.
+    """
+
+    ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+    # Tags whose whitespace-only strings BeautifulSoup keeps as they are
+    PRESERVE_WHITESPACE_TAGS = frozenset(["pre", "textarea"])
+    # Tags whose strings BeautifulSoup stores as special types that get_text skips
+    STRING_CONTAINER_TAGS = frozenset(["rt", "rp", "style", "script", "template"])
+
+    def parse(self, html_string: str):
+        # Parse the HTML string and index its text in a single walk
+        return self.index_document(self.parse_chunks([html_string]))
+
+    def parse_chunks(self, chunks):
+        """
+        Feeds HTML text chunks to lxml as they arrive and returns the document root,
+        or None for a document without any element.
+        """
+        parser = _ChunkParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.close()
+
+    def create_chunk_parser(self):
+        return _ChunkParser()
+
+    def finish_chunks(self, tree):
+        # The text is indexed once the last chunk is in, on any thread
+        return self.index_document(tree)
+
+    def index_document(self, root):
+        # Walk the tree once, recording strings and the spans of matching tags
+        text_index = _TextIndex()
+        if root is None:
+            return text_index
+
+        rule_0 = self._get_tag_rule(0)
+        rule_1 = self._get_tag_rule(1)
+        strings, spans = text_index.strings, text_index.spans
+        preserve_depth = 0  # Number of open pre/textarea ancestors
+        container_depth = 0  # Number of open script/style/... ancestors
+
+        def add_string(string):
+            # Mirror BeautifulSoup: collapse whitespace-only strings, skip special containers
+            if not string or container_depth:
+                return
+            if not preserve_depth and not string.strip(self.ASCII_SPACES):
+                string = "\n" if "\n" in string else " "
+            strings.append(string)
+
+        # Each stack entry is (element, span or None, entered)
+        stack = [(root, None, False)]
+        while stack:
+            element, span, entered = stack.pop()
+            tag = element.tag
+
+            if entered:
+                # Leaving the element: close its span, then handle the text after it
+                if span is not None:
+                    span[1] = len(strings)
+                if tag in self.PRESERVE_WHITESPACE_TAGS:
+                    preserve_depth -= 1
+                if tag in self.STRING_CONTAINER_TAGS:
+                    container_depth -= 1
+                add_string(element.tail)
+                continue
+
+            if not isinstance(tag, str):
+                # Comments and processing instructions only contribute their tail
+                add_string(element.tail)
+                continue
+
+            span = None
+            if rule_1.search(tag):
+                span = [len(strings), None, bool(rule_0.search(tag))]
+                spans.append(span)
+            if tag in self.PRESERVE_WHITESPACE_TAGS:
+                preserve_depth += 1
+            if tag in self.STRING_CONTAINER_TAGS:
+                container_depth += 1
+            add_string(element.text)
+
+            stack.append((element, span, True))
+            stack.extend((child, None, False) for child in reversed(element))
+
+        return text_index
+
+    def extract_main_content(self, document, rule: int = 0) -> str:
+        # Join the strings covered by each matching tag and keep the long ones
+        main_content = []
+        strings = document.strings
+        for start, end, matches_rule_0 in document.spans:
+            if rule != 1 and not matches_rule_0:
+                continue
+            tag_text = "".join(strings[start:end]).strip()
+            if tag_text and len(tag_text.split()) > 10:
+                main_content.append(tag_text)
+        return "\n".join(main_content).strip()
@@ -0,0 +1,144 @@
+import atexit
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+class CrawlExecutor:
+    MAX_WORKERS = 16  # Maximum number of crawl tasks running at the same time
+    MAX_PER_HOST = 4  # Maximum number of concurrent crawl tasks against a single host
+    MAX_PENDING = 1024  # Maximum number of scheduled but unfinished crawl tasks
+
+    _shared = None  # Process-wide executor reused by all fetcher instances
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_workers=MAX_WORKERS,
+        max_per_host=MAX_PER_HOST,
+        max_pending=MAX_PENDING,
+    ):
+        # Initialize a bounded worker pool with per-host concurrency limits
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="crawler"
+        )
+        self._lock = threading.Lock()
+        self._state_changed = threading.Condition(self._lock)
+        self._queued = {}  # Tasks waiting for a free slot on their host
+        self._active = {}  # Number of running tasks per host
+        self._pending = 0  # Number of scheduled tasks that have not finished yet
+        self._shutdown = False
+
+    @classmethod
+    def get_shared(cls):
+        # Return the process-wide executor, creating it on first use
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def configure_shared(cls, **kwargs):
+        # Replace the process-wide executor with one using the given limits
+        with cls._shared_lock:
+            previous, cls._shared = cls._shared, cls(**kwargs)
+        if previous is not None:
+            previous.shutdown(wait=True)
+        return cls._shared
+
+    @classmethod
+    def shutdown_shared(cls, wait=True, cancel_futures=False):
+        # Shut down the process-wide executor if it was ever created
+        with cls._shared_lock:
+            previous, cls._shared = cls._shared, None
+        if previous is not None:
+            previous.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def _get_host(self, url):
+        # Group tasks by network location so limits apply per host
+        return urlsplit(url).netloc.lower()
+
+    def submit(self, url, fn, *args, **kwargs):
+        """
+        Schedules fn(*args, **kwargs) as a crawl task for the given URL and returns a Future.
+        Blocks while the executor already holds max_pending unfinished tasks.
+        """
+        future = Future()
+        host = self._get_host(url)
+        with self._state_changed:
+            while not self._shutdown and self._pending >= self.max_pending:
+                self._state_changed.wait()
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new crawl tasks after shutdown")
+
+            self._pending += 1
+            task = (future, fn, args, kwargs)
+            if self._active.get(host, 0) < self.max_per_host:
+                self._start(host, task)
+            else:
+                self._queued.setdefault(host, deque()).append(task)
+        return future
+
+    def _start(self, host, task):
+        # Hand a task to the worker pool; the caller must hold the lock
+        try:
+            self._pool.submit(self._run, host, task)
+        except RuntimeError:
+            # The pool is gone (e.g. interpreter shutdown), so the task can never run
+            task[0].cancel()
+            self._pending -= 1
+            return
+        self._active[host] = self._active.get(host, 0) + 1
+
+    def _run(self, host, task):
+        # Worker body: run the task, then release its host slot
+        future, fn, args, kwargs = task
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            self._finish(host)
+
+    def _finish(self, host):
+        # Start the next queued task for the host, if any
+        with self._state_changed:
+            self._pending -= 1
+            self._active[host] -= 1
+            queued = self._queued.get(host)
+            if not self._active[host]:
+                del self._active[host]
+            while queued and self._active.get(host, 0) < self.max_per_host:
+                self._start(host, queued.popleft())
+            if queued is not None and not queued:
+                del self._queued[host]
+            if self._shutdown and not self._pending:
+                self._pool.shutdown(wait=False)
+            self._state_changed.notify_all()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        # Stop accepting tasks, optionally cancel queued ones, and release the worker threads
+        with self._state_changed:
+            self._shutdown = True
+            if cancel_futures:
+                # Cancelled tasks still pass through the pool to release their slot
+                for queued in self._queued.values():
+                    for future, _, _, _ in queued:
+                        future.cancel()
+            self._state_changed.notify_all()
+            if wait:
+                while self._pending:
+                    self._state_changed.wait()
+            elif self._pending:
+                # The last finishing task shuts the pool down
+                return
+        self._pool.shutdown(wait=wait)
+
+
+atexit.register(CrawlExecutor.shutdown_shared, wait=False, cancel_futures=True)
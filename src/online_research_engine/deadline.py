@@ -0,0 +1,50 @@
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is started after its deadline has passed."""
+
+
+class Deadline:
+    """
+    A point in time by which a query must be answered, shared by every stage of the pipeline.
+    Each stage bounds its own waits with remaining() and abandons work once expired.
+    A Deadline without a timeout never expires.
+    """
+
+    def __init__(self, timeout=None):
+        # Monotonic time at which the deadline passes, or None for no deadline
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+
+    def remaining(self, cap=None):
+        """
+        Returns the seconds left, never negative, and at most cap if given.
+        Returns cap (possibly None) when there is no deadline.
+        """
+        if self.expires_at is None:
+            return cap
+        remaining = max(0.0, self.expires_at - time.monotonic())
+        return remaining if cap is None else min(remaining, cap)
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self):
+        """Raises DeadlineExceeded if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceeded("the query deadline has passed")
+
+    def limit(self, timeout):
+        """Returns a Deadline timeout seconds from now, or this one if it passes sooner."""
+        limited = Deadline(timeout)
+        if self.expires_at is not None and self.expires_at < limited.expires_at:
+            limited.expires_at = self.expires_at
+        return limited
+
+
+def as_deadline(deadline):
+    # Accept a Deadline, a timeout in seconds or None for no deadline
+    if isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(deadline)
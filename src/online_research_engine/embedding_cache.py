@@ -0,0 +1,160 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+
+from langchain.schema.embeddings import Embeddings
+
+
+class EmbeddingCache:
+    """
+    Persistent store of text embeddings keyed by embedding model id and the SHA-256 of the text.
+    Vectors are stored as float32 blobs in a SQLite database in WAL mode, so threads and
+    processes can share one cache file.
+    """
+
+    # Keys looked up per SQL statement, below SQLite's variable limit
+    MAX_VARIABLES = 500
+
+    def __init__(self, path=None):
+        if not path:
+            path = os.path.join(
+                os.path.expanduser("~"),
+                ".cache",
+                "online_research_engine",
+                "embedding_cache.sqlite3",
+            )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._local = threading.local()  # SQLite connections cannot cross threads
+        self._counters_lock = threading.Lock()
+        self._counters = dict.fromkeys(["hits", "misses"], 0)
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+            """)
+
+    def _connect(self):
+        # Return this thread's connection, opening it on first use
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model_id, texts):
+        """Returns the cached vector of each text, or None for texts not embedded yet."""
+        hashes = [self.hash_text(text) for text in texts]
+        found = {}
+        connection = self._connect()
+        for start in range(0, len(hashes), self.MAX_VARIABLES):
+            batch = hashes[start : start + self.MAX_VARIABLES]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(
+                "SELECT text_hash, vector FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                (model_id, *batch),
+            )
+            for text_hash, vector in rows:
+                found[text_hash] = array("f", vector).tolist()
+
+        vectors = [found.get(text_hash) for text_hash in hashes]
+        hits = sum(vector is not None for vector in vectors)
+        with self._counters_lock:
+            self._counters["hits"] += hits
+            self._counters["misses"] += len(vectors) - hits
+        return vectors
+
+    def put_many(self, model_id, texts, vectors):
+        """Stores the vector of each text for the given embedding model."""
+        rows = [
+            (model_id, self.hash_text(text), array("f", vector).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        """Deletes every cached vector."""
+        self._connect().execute("DELETE FROM embeddings")
+
+    def stats(self):
+        """Returns this process's hit and miss counters and the number of stored vectors."""
+        (entries,) = (
+            self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        )
+        with self._counters_lock:
+            return {**self._counters, "entries": entries}
+
+
+def get_model_id(embedding_model):
+    # Identify the embedding model by its class and model or deployment name,
+    # looking through wrappers such as CachedEmbeddings and BatchedEmbeddings
+    while isinstance(getattr(embedding_model, "embedding_model", None), Embeddings):
+        embedding_model = embedding_model.embedding_model
+    name = (
+        getattr(embedding_model, "deployment", None)
+        or getattr(embedding_model, "model", None)
+        or getattr(embedding_model, "model_name", None)
+        or ""
+    )
+    return f"{type(embedding_model).__name__}:{name}"
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps a LangChain embedding model so that only texts missing from the EmbeddingCache
+    are sent to it. Query embeddings are cached separately from document embeddings,
+    since some models embed the two differently.
+    """
+
+    def __init__(self, embedding_model, cache, model_id=None):
+        self.embedding_model = embedding_model
+        self.cache = cache
+        self.model_id = model_id or get_model_id(embedding_model)
+
+    def embed_documents(self, texts):
+        vectors = self.cache.get_many(self.model_id, texts)
+
+        # Embed each missing text once, even if it appears several times
+        missing = list(
+            dict.fromkeys(
+                text for text, vector in zip(texts, vectors) if vector is None
+            )
+        )
+        if missing:
+            new_vectors = self.embedding_model.embed_documents(missing)
+            self.cache.put_many(self.model_id, missing, new_vectors)
+            embedded = dict(zip(missing, new_vectors))
+            vectors = [
+                embedded[text] if vector is None else vector
+                for text, vector in zip(texts, vectors)
+            ]
+        return vectors
+
+    def embed_query(self, text):
+        query_model_id = self.model_id + "#query"
+        (vector,) = self.cache.get_many(query_model_id, [text])
+        if vector is None:
+            vector = self.embedding_model.embed_query(text)
+            self.cache.put_many(query_model_id, [text], [vector])
+        return vector
@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+
+from .urls import index_urls
+
+
+@dataclass(slots=True)
+class FetchResult:
+    """
+    Result of a fetch: the content fetched for each link, in the order of the links, with an
+    index of the position of each link. The links default to those of services_response.
+    It also records the links dropped at the deadline and the search services that failed.
+    Unpacks, indexes and has the length of the (contents, services_response) tuple fetch
+    used to return, so callers of the tuple keep working.
+    """
+
+    contents: list
+    services_response: dict | None
+    links: list | None = None
+    dropped_urls: list = field(default_factory=list)  # Crawls abandoned at the deadline
+    failed_services: list = field(default_factory=list)  # Failed or timed out services
+    url_index: dict = field(init=False, repr=False)  # Link -> position in links
+
+    def __post_init__(self):
+        if self.links is None:
+            self.links = (self.services_response or {}).get("links", [])
+        self.url_index = index_urls(self.links)
+
+    def __iter__(self):
+        return iter((self.contents, self.services_response))
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return (self.contents, self.services_response)[index]
+
+    def position(self, url):
+        """Returns the position of the URL in links, or None if it is not one of them."""
+        return self.url_index.get(url)
+
+    def content_of(self, url):
+        """Returns the content fetched for the URL, "" if there is none."""
+        position = self.url_index.get(url)
+        return "" if position is None else self.contents[position]
@@ -1,16 +1,25 @@
+import asyncio
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed, wait
 from copy import deepcopy
 from enum import Enum
 
 import trafilatura.sitemaps
 
+from .crawl_executor import CrawlExecutor
+from .deadline import DeadlineExceeded, as_deadline
+from .fetch_result import FetchResult
+from .http_sessions import get_async_session
+from .near_duplicates import MinHashLSH, collapse_near_duplicates
+from .politeness import PolitenessPolicy
 from .search_services import (
     BingNewsSearchClient,
     BingWebSearchClient,
     SerperClient,
     SerperPlacesClient,
 )
+from .urls import canonicalize_url
 from .web_scraper import WebScraper
 
 
@@ -25,14 +34,37 @@ class WebContentFetcher:
         search_services=[SearchServices.SERPER],
         search_args={},
         config_path=None,
+        crawl_executor=None,
+        browser_pool=None,
+        content_cache=None,
+        search_cache=None,
+        deduplicate=False,
+        politeness=None,
     ):
         # Initialize the fetcher with a search query
         self.query = query
         self.search_services = search_services
         self.search_args = search_args
         self.config_path = config_path
+        # Crawl tasks run on a bounded executor shared by all fetchers unless one is given
+        self.crawl_executor = crawl_executor or CrawlExecutor.get_shared()
+        # Optional BrowserPool used to render pages whose static HTML has too little text
+        self.browser_pool = browser_pool
+        # Optional ContentCache that keeps extracted pages across fetches and processes
+        self.content_cache = content_cache
+        # Optional SearchCache that answers repeated and concurrent identical searches
+        self.search_cache = search_cache
+        # Whether pages that are near-duplicates of another page, such as syndicated
+        # stories, are emptied so they are not embedded and cited twice
+        self.deduplicate = deduplicate
+        # Optional PolitenessPolicy that paces and retries requests per host and checks
+        # robots.txt; search results rarely share a host, so crawls are not paced by default
+        self.politeness = politeness
         self.web_contents = []  # Stores the fetched web contents
         self.error_urls = []  # Stores URLs that resulted in an error during fetching
+        self.dropped_urls = []  # Stores URLs abandoned when the deadline passed
+        self.failed_services = []  # Stores search services that failed or timed out
+        self.services_response = None  # Combined search response of the last fetch_iter
         self.web_contents_lock = (
             threading.Lock()
         )  # Lock for thread-safe operations on web_contents
@@ -40,164 +72,522 @@ class WebContentFetcher:
             threading.Lock()
         )  # Lock for thread-safe operations on error_urls
 
-    def _web_crawler_thread(self, thread_id: int, urls: list):
+    def _web_crawler_thread(
+        self,
+        thread_id: int,
+        urls: list,
+        deadline=None,
+        web_contents=None,
+        error_urls=None,
+    ):
         # Thread function to crawl each URL
+        # Results go to the lists of the fetch that scheduled the crawl, so a crawl left
+        # running at its deadline cannot add pages to a later fetch
+        web_contents = self.web_contents if web_contents is None else web_contents
+        error_urls = self.error_urls if error_urls is None else error_urls
         try:
             print(f"Starting web crawler thread {thread_id}")
             start_time = time.time()
 
             url = urls[thread_id]
-            scraper = WebScraper()
-            content = scraper.scrape_url(url, 0)
-
-            # If the scraped content is too short, try extending the crawl rules
-            if 0 <= len(content) < 800:
-                content = scraper.scrape_url(url, 1)
+            scraper = WebScraper(
+                browser_pool=self.browser_pool,
+                cache=self.content_cache,
+                politeness=self.politeness,
+            )
+            # If the scraped content is too short, the crawl rules are extended on the same page
+            deadline = as_deadline(deadline)
+            content = scraper.scrape_url_with_fallback(
+                url, min_length=800, deadline=deadline
+            )
 
             # If the content length is sufficient, add it to the shared list
             if len(content) > 300:
                 with self.web_contents_lock:
-                    self.web_contents.append({"url": url, "content": content})
+                    web_contents.append({"url": url, "content": content})
+            elif deadline.expired:
+                # The download was cut short by the deadline, so the page counts as dropped
+                raise DeadlineExceeded(f"{url} was not crawled before the deadline")
+            else:
+                content = None
 
             end_time = time.time()
             print(
                 f"Thread {thread_id} completed! Time consumed: {end_time - start_time:.2f}s"
             )
+            # The stored content, or None, is the result of the crawl task
+            return content
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             # Handle any exceptions, log the error, and store the URL
             with self.error_urls_lock:
-                self.error_urls.append(url)
+                error_urls.append(url)
             print(f"Thread {thread_id}: Error crawling {url}: {e}")
 
-    def _serper_launcher(self):
+    def _serper_launcher(self, deadline=None):
         # Function to launch the Serper client and get search results
-        serper_client = SerperClient(config_path=self.config_path)
+        serper_client = SerperClient(
+            config_path=self.config_path, cache=self.search_cache
+        )
         serper_args = self.search_args.get(WebContentFetcher.SearchServices.SERPER, {})
-        serper_results = serper_client.serper(self.query, **serper_args)
+        serper_results = serper_client.serper(
+            self.query, deadline=deadline, **serper_args
+        )
         return serper_client.extract_components(serper_results)
 
-    def _bing_web_search_launcher(self):
+    def _bing_web_search_launcher(self, deadline=None):
         # Function to launch the Bing Web Search client and get search results
-        bing_web_search_client = BingWebSearchClient(config_path=self.config_path)
+        bing_web_search_client = BingWebSearchClient(
+            config_path=self.config_path, cache=self.search_cache
+        )
         bing_web_search_args = self.search_args.get(
             WebContentFetcher.SearchServices.BING_WEB_SEARCH, {}
         )
         bing_web_search_results = bing_web_search_client.bing_web_search(
-            self.query, **bing_web_search_args
+            self.query, deadline=deadline, **bing_web_search_args
         )
         return bing_web_search_client.extract_components(bing_web_search_results)
 
-    def _bing_news_search_launcher(self):
+    def _bing_news_search_launcher(self, deadline=None):
         # Function to launch the Bing News Search client and get search results
-        bing_news_search_client = BingNewsSearchClient(config_path=self.config_path)
+        bing_news_search_client = BingNewsSearchClient(
+            config_path=self.config_path, cache=self.search_cache
+        )
         bing_news_search_args = self.search_args.get(
             WebContentFetcher.SearchServices.BING_NEWS_SEARCH, {}
         )
         bing_news_search_results = bing_news_search_client.bing_news_search(
-            self.query, **bing_news_search_args
+            self.query, deadline=deadline, **bing_news_search_args
         )
         return bing_news_search_client.extract_components(bing_news_search_results)
 
-    def _crawl_threads_launcher(self, url_list):
-        # Create and start threads for each URL in the list
-        threads = []
-        for i in range(len(url_list)):
-            thread = threading.Thread(
-                target=self._web_crawler_thread, args=(i, url_list)
+    def _crawl_threads_launcher(self, url_list, deadline=None):
+        # Schedule a crawl task for each URL in the list on the shared crawl executor
+        deadline = as_deadline(deadline)
+        futures = {
+            self.crawl_executor.submit(
+                url,
+                self._web_crawler_thread,
+                i,
+                url_list,
+                deadline,
+                self.web_contents,
+                self.error_urls,
+            ): url
+            for i, url in enumerate(url_list)
+        }
+        # Wait for all crawl tasks to finish execution, or until the deadline passes
+        wait(futures, timeout=deadline.remaining())
+        self._drop_stragglers(futures)
+
+    def _drop_stragglers(self, futures):
+        # Give up on crawls unfinished at the deadline: queued ones are cancelled and
+        # running ones are left to stop on their own, since their results are not awaited
+        # Crawls that ended with DeadlineExceeded were cut short and are dropped as well
+        dropped = [
+            url
+            for future, url in futures.items()
+            if future.cancel()
+            or not future.done()
+            or isinstance(future.exception(), DeadlineExceeded)
+        ]
+        self.dropped_urls.extend(dropped)
+        if dropped:
+            print(f"Crawl deadline reached, dropped {len(dropped)} pages")
+
+    def _get_launchers(self, asynchronous=False):
+        # Return the launchers of the selected search services, in the fixed merge order
+        launchers = {
+            self.SearchServices.SERPER: (
+                self._aserper_launcher if asynchronous else self._serper_launcher
+            ),
+            self.SearchServices.BING_WEB_SEARCH: (
+                self._abing_web_search_launcher
+                if asynchronous
+                else self._bing_web_search_launcher
+            ),
+            self.SearchServices.BING_NEWS_SEARCH: (
+                self._abing_news_search_launcher
+                if asynchronous
+                else self._bing_news_search_launcher
+            ),
+        }
+        return [
+            (service, launcher)
+            for service, launcher in launchers.items()
+            if service in self.search_services
+        ]
+
+    def _search_failed(self, service, error):
+        # Record a search service that failed, so the query goes on with the others
+        self.failed_services.append(service)
+        print(f"Search service {service.name} failed: {error!r}")
+
+    def _search_launcher(self, deadline=None):
+        # Query the selected search services concurrently and return a dict of the responses
+        # of those that succeeded by service, in launcher order whichever finishes first
+        deadline = as_deadline(deadline)
+        launchers = self._get_launchers()
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, len(launchers)), thread_name_prefix="search"
+        )
+        try:
+            futures = [
+                (service, executor.submit(launcher, deadline))
+                for service, launcher in launchers
+            ]
+            wait([future for _, future in futures], timeout=deadline.remaining())
+        finally:
+            # Services still running at the deadline are abandoned, not waited for
+            executor.shutdown(wait=False)
+
+        service_responses = {}
+        for service, future in futures:
+            if not future.done():
+                self._search_failed(service, DeadlineExceeded("search timed out"))
+            elif future.exception() is not None:
+                self._search_failed(service, future.exception())
+            else:
+                service_responses[service] = future.result()
+        return service_responses
+
+    def fetch(self, deadline=None):
+        """
+        Main method to fetch web content based on the query and search service.
+        Returns a FetchResult, which unpacks into (contents, services_response).
+        The search services are queried concurrently; one that fails or times out is
+        recorded in failed_services and the query goes on with the results of the others.
+        With a deadline, a Deadline or a timeout in seconds, searches and downloads are
+        bounded by it and pages still crawling when it passes are left out as empty
+        content, with their URLs in dropped_urls.
+        Links to the same page from several services are crawled once, see _combine_responses.
+        The dropped URLs and failed services of this fetch are recorded in the FetchResult.
+        """
+        deadline = as_deadline(deadline)
+        combined_response = self.search(deadline)
+        self._reset_crawl()
+
+        if combined_response is None:
+            return self._make_result([], None)
+
+        url_list = combined_response["links"]
+        self._crawl_threads_launcher(url_list, deadline)
+        return self._make_result(
+            self._finish_contents(url_list, combined_response), combined_response
+        )
+
+    def _reset_search(self):
+        # Forget the outcome of the previous search, so each fetch reports its own
+        # New lists are used, so results of earlier fetches keep theirs
+        self.failed_services = []
+        self.services_response = None
+
+    def _reset_crawl(self):
+        # Forget the pages crawled by the previous fetch
+        # New lists are used, so crawls of earlier fetches still running keep theirs
+        self.web_contents = []
+        self.error_urls = []
+        self.dropped_urls = []
+
+    def _make_result(self, contents, combined_response):
+        # Wrap the contents with the dropped URLs and failed services of this fetch
+        return FetchResult(
+            contents,
+            combined_response,
+            dropped_urls=self.dropped_urls,
+            failed_services=self.failed_services,
+        )
+
+    def search(self, deadline=None):
+        """
+        Queries the selected search services concurrently and returns their combined
+        response, or None if none of them answered. This is the first step of fetch.
+        """
+        self._reset_search()
+        service_responses = self._search_launcher(as_deadline(deadline))
+        if not service_responses:
+            return None
+        return self._combine_responses(service_responses)
+
+    def crawl(self, url_list, deadline=None):
+        """
+        Crawls the URLs on the crawl executor and returns their contents in the same order,
+        with "" for pages that failed, had too little content or were dropped at the
+        deadline. This is the second step of fetch, without near-duplicate collapsing.
+        """
+        self._reset_crawl()
+        self._crawl_threads_launcher(url_list, deadline)
+        return self._order_contents(url_list)
+
+    def fetch_iter(self, deadline=None):
+        """
+        Streaming counterpart of fetch: yields (url, content) for each page as soon as its
+        crawl finishes, in completion order, skipping pages with too little content.
+        With a deadline, it stops waiting for slow pages once the deadline passes: their
+        URLs go to dropped_urls and queued crawls are cancelled.
+        With deduplicate, pages that are near-duplicates of a page already yielded are
+        skipped and recorded in services_response like collapse_near_duplicates does.
+        The combined search response is stored in services_response before the first page.
+        """
+        deadline = as_deadline(deadline)
+        services_response = self.search(deadline)
+        self._reset_crawl()
+        if services_response is None:
+            return
+        self.services_response = services_response
+
+        url_list = self.services_response["links"]
+        futures = {
+            self.crawl_executor.submit(
+                url,
+                self._web_crawler_thread,
+                i,
+                url_list,
+                deadline,
+                self.web_contents,
+                self.error_urls,
+            ): i
+            for i, url in enumerate(url_list)
+        }
+        if self.deduplicate:
+            index = MinHashLSH()
+            sources = self.services_response["sources"]
+            duplicate_of = [None] * len(url_list)
+            self.services_response["duplicate_of"] = duplicate_of
+        try:
+            for future in as_completed(futures, timeout=deadline.remaining()):
+                if future.exception() is not None:
+                    # Cut short by the deadline, dropped below
+                    continue
+                content, i = future.result(), futures[future]
+                if content is None:
+                    continue
+                if self.deduplicate:
+                    original = index.add(i, content)
+                    if original is not None:
+                        duplicate_of[i] = original
+                        sources[original].extend(sources[i])
+                        continue
+                yield url_list[i], content
+        except TimeoutError:
+            # Crawls unfinished at the deadline are dropped below
+            pass
+        self._drop_stragglers({future: url_list[i] for future, i in futures.items()})
+
+    async def _aweb_crawler_task(self, task_id: int, urls: list, session, deadline):
+        # Coroutine counterpart of _web_crawler_thread, running on the event loop
+        try:
+            print(f"Starting web crawler task {task_id}")
+            start_time = time.time()
+
+            url = urls[task_id]
+            scraper = WebScraper(
+                browser_pool=self.browser_pool,
+                cache=self.content_cache,
+                politeness=self.politeness,
+            )
+            # If the scraped content is too short, the crawl rules are extended on the same page
+            content = await scraper.ascrape_url_with_fallback(
+                url, min_length=800, session=session, deadline=deadline
             )
-            threads.append(thread)
-            thread.start()
-        # Wait for all threads to finish execution
-        for thread in threads:
-            thread.join()
 
-    def fetch(self):
-        # Main method to fetch web content based on the query and search service
-        service_responses = []
-
-        if self.SearchServices.SERPER in self.search_services:
-            service_responses.append(self._serper_launcher())
-        if self.SearchServices.BING_WEB_SEARCH in self.search_services:
-            service_responses.append(self._bing_web_search_launcher())
-        if self.SearchServices.BING_NEWS_SEARCH in self.search_services:
-            service_responses.append(self._bing_news_search_launcher())
-
-        if any(service_responses) and len(service_responses) == 1:
-            service_response = service_responses[0]
-            url_list = service_response["links"]
-            self._crawl_threads_launcher(url_list)
-            # Reorder the fetched content to match the order of URLs
-            ordered_contents = [
-                next(
-                    (
-                        item["content"]
-                        for item in self.web_contents
-                        if item["url"] == url
-                    ),
-                    "",
-                )
-                for url in url_list
-            ]
-            return ordered_contents, service_response
+            # If the content length is sufficient, add it to the shared list
+            if len(content) > 300:
+                with self.web_contents_lock:
+                    self.web_contents.append({"url": url, "content": content})
+            elif deadline.expired:
+                # The download was cut short by the deadline, so the page counts as dropped
+                raise DeadlineExceeded(f"{url} was not crawled before the deadline")
 
-        elif any(service_responses) and len(service_responses) > 1:
-            url_list = [
-                link for response in service_responses for link in response["links"]
-            ]
-            self._crawl_threads_launcher(url_list)
-            # Reorder the fetched content to match the order of URLs
-            ordered_contents = [
-                next(
-                    (
-                        item["content"]
-                        for item in self.web_contents
-                        if item["url"] == url
-                    ),
-                    "",
-                )
-                for url in url_list
-            ]
+            end_time = time.time()
+            print(
+                f"Task {task_id} completed! Time consumed: {end_time - start_time:.2f}s"
+            )
 
-            # combine responses from each search service
-            combined_responses = {}
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # Handle any exceptions, log the error, and store the URL
+            with self.error_urls_lock:
+                self.error_urls.append(url)
+            print(f"Task {task_id}: Error crawling {url}: {e}")
 
-            search_queries = set(response["query"] for response in service_responses)
-            if len(search_queries) > 1:
-                raise ValueError(
-                    "Different queries were used across multiple search services."
-                )
-            else:
-                combined_responses["query"] = search_queries.pop()
+    async def _aserper_launcher(self, session, deadline):
+        # Coroutine to launch the Serper client and get search results
+        serper_client = SerperClient(
+            config_path=self.config_path, cache=self.search_cache
+        )
+        serper_args = self.search_args.get(WebContentFetcher.SearchServices.SERPER, {})
+        serper_results = await serper_client.aserper(
+            self.query, session=session, deadline=deadline, **serper_args
+        )
+        return serper_client.extract_components(serper_results)
+
+    async def _abing_web_search_launcher(self, session, deadline):
+        # Coroutine to launch the Bing Web Search client and get search results
+        bing_web_search_client = BingWebSearchClient(
+            config_path=self.config_path, cache=self.search_cache
+        )
+        bing_web_search_args = self.search_args.get(
+            WebContentFetcher.SearchServices.BING_WEB_SEARCH, {}
+        )
+        bing_web_search_results = await bing_web_search_client.abing_web_search(
+            self.query, session=session, deadline=deadline, **bing_web_search_args
+        )
+        return bing_web_search_client.extract_components(bing_web_search_results)
+
+    async def _abing_news_search_launcher(self, session, deadline):
+        # Coroutine to launch the Bing News Search client and get search results
+        bing_news_search_client = BingNewsSearchClient(
+            config_path=self.config_path, cache=self.search_cache
+        )
+        bing_news_search_args = self.search_args.get(
+            WebContentFetcher.SearchServices.BING_NEWS_SEARCH, {}
+        )
+        bing_news_search_results = await bing_news_search_client.abing_news_search(
+            self.query, session=session, deadline=deadline, **bing_news_search_args
+        )
+        return bing_news_search_client.extract_components(bing_news_search_results)
 
-            search_query_languages = set(
-                response["language"] for response in service_responses
+    async def _acrawl_tasks_launcher(self, url_list, session, deadline):
+        # Crawl every URL in the list concurrently on the event loop until the deadline
+        tasks = {
+            asyncio.ensure_future(
+                self._aweb_crawler_task(i, url_list, session, deadline)
+            ): url
+            for i, url in enumerate(url_list)
+        }
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+        self._drop_stragglers(tasks)
+        # Let the cancelled tasks unwind before returning
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def afetch(self, session=None, deadline=None):
+        """
+        Asynchronous counterpart of fetch. All search services are queried concurrently and
+        the results of each service start crawling as soon as that service responds.
+        """
+        deadline = as_deadline(deadline)
+        self._reset_search()
+        self._reset_crawl()
+        session = session or get_async_session()
+        launchers = self._get_launchers(asynchronous=True)
+        # Canonical URLs already being crawled for another service
+        claimed_urls = set()
+
+        async def search_and_crawl(service, launcher):
+            try:
+                service_response = await launcher(session, deadline)
+            except Exception as e:
+                # A failed service leaves the others to answer the query
+                self._search_failed(service, e)
+                return None
+            url_list = []
+            for link in service_response["links"]:
+                canonical_url = canonicalize_url(link)
+                if canonical_url not in claimed_urls:
+                    claimed_urls.add(canonical_url)
+                    url_list.append(link)
+            await self._acrawl_tasks_launcher(url_list, session, deadline)
+            return service_response
+
+        # Results come back in launcher order, whichever service finishes first
+        results = await asyncio.gather(
+            *(search_and_crawl(service, launcher) for service, launcher in launchers)
+        )
+        service_responses = {
+            service: response
+            for (service, _), response in zip(launchers, results)
+            if response is not None
+        }
+
+        if not service_responses:
+            return self._make_result([], None)
+
+        combined_response = self._combine_responses(service_responses)
+        contents = self._finish_contents(combined_response["links"], combined_response)
+        return self._make_result(contents, combined_response)
+
+    def _finish_contents(self, url_list, combined_response):
+        # Order the fetched content like the URLs and collapse near-duplicate pages
+        contents = self._order_contents(url_list)
+        if self.deduplicate:
+            contents = collapse_near_duplicates(contents, combined_response)
+        return contents
+
+    def _order_contents(self, url_list):
+        # Reorder the fetched content to match the order of URLs
+        # Pages are matched by canonical URL, since afetch may have crawled another link
+        # to the same page
+        contents = {
+            canonicalize_url(item["url"]): item["content"] for item in self.web_contents
+        }
+        return [contents.get(canonicalize_url(url), "") for url in url_list]
+
+    def _combine_responses(self, service_responses):
+        """
+        Combines a dict of search service responses by service into a single response.
+        Links to the same page, as told by canonicalize_url, are merged into one entry
+        that keeps the first link, title and snippet in service order, so that each page
+        is crawled once and links[i], titles[i] and snippets[i] still describe the same
+        webpage. sources[i] lists the service, link, title and snippet of every result
+        merged into entry i.
+        """
+        combined_responses = {}
+
+        search_queries = set(
+            response["query"] for response in service_responses.values()
+        )
+        if len(search_queries) > 1:
+            raise ValueError(
+                "Different queries were used across multiple search services."
             )
-            if len(search_query_languages) > 1:
-                raise ValueError(
-                    "Different queries were used across multiple search services."
-                )
-            else:
-                combined_responses["language"] = search_query_languages.pop()
+        else:
+            combined_responses["query"] = search_queries.pop()
 
-            combined_responses["count"] = sum(
-                response["count"] for response in service_responses
+        search_query_languages = set(
+            response["language"] for response in service_responses.values()
+        )
+        if len(search_query_languages) > 1:
+            raise ValueError(
+                "Different queries were used across multiple search services."
             )
-            combined_responses["titles"] = [
-                title for response in service_responses for title in response["titles"]
-            ]
-            combined_responses["links"] = [
-                link for response in service_responses for link in response["links"]
-            ]
-            combined_responses["snippets"] = [
-                snippet
-                for response in service_responses
-                for snippet in response["snippets"]
-            ]
+        else:
+            combined_responses["language"] = search_query_languages.pop()
+
+        titles, links, snippets, sources = [], [], [], []
+        positions = {}  # Canonical URL -> index of its entry
+        for service, response in service_responses.items():
+            for title, link, snippet in zip(
+                response["titles"], response["links"], response["snippets"]
+            ):
+                canonical_url = canonicalize_url(link)
+                if canonical_url not in positions:
+                    positions[canonical_url] = len(links)
+                    titles.append(title)
+                    links.append(link)
+                    snippets.append(snippet)
+                    sources.append([])
+                sources[positions[canonical_url]].append(
+                    {
+                        "service": service.name,
+                        "link": link,
+                        "title": title,
+                        "snippet": snippet,
+                    }
+                )
 
-            return ordered_contents, combined_responses
+        combined_responses["count"] = len(links)
+        combined_responses["titles"] = titles
+        combined_responses["links"] = links
+        combined_responses["snippets"] = snippets
+        combined_responses["sources"] = sources
 
-        return [], None
+        return combined_responses
 
 
 class PlacesContentFetcher:
@@ -206,11 +596,24 @@ class PlacesContentFetcher:
         query,
         search_args={},
         config_path=None,
+        crawl_executor=None,
+        browser_pool=None,
+        content_cache=None,
+        politeness=None,
     ):
         # Initialize the fetcher with a search query
         self.query = query
         self.search_args = search_args
         self.config_path = config_path
+        # Crawl tasks run on a bounded executor shared by all fetchers unless one is given
+        self.crawl_executor = crawl_executor or CrawlExecutor.get_shared()
+        # Optional BrowserPool used to render pages whose static HTML has too little text
+        self.browser_pool = browser_pool
+        # Optional ContentCache that keeps extracted pages across fetches and processes
+        self.content_cache = content_cache
+        # Every page of a place's sitemap is on the same website, so its requests are paced
+        # and checked against robots.txt by the shared policy unless one is given
+        self.politeness = politeness or PolitenessPolicy.get_shared()
         self.web_contents = []  # Stores the fetched web contents
         self.error_urls = []  # Stores URLs that resulted in an error during fetching
         self.web_contents_lock = (
@@ -227,12 +630,15 @@ class PlacesContentFetcher:
             start_time = time.time()
 
             url = urls[thread_id]
-            scraper = WebScraper()
-            content = scraper.scrape_url(url, 0)
-
-            # If the scraped content is too short, try extending the crawl rules
-            if 0 < len(content) < 800:
-                content = scraper.scrape_url(url, 1)
+            scraper = WebScraper(
+                browser_pool=self.browser_pool,
+                cache=self.content_cache,
+                politeness=self.politeness,
+            )
+            # If the scraped content is too short, the crawl rules are extended on the same page
+            content = scraper.scrape_url_with_fallback(
+                url, min_length=800, fallback_on_empty=False
+            )
 
             # If the content length is sufficient, add it to the shared list
             if len(content) > 300:
@@ -260,17 +666,13 @@ class PlacesContentFetcher:
         return serper_places_client.extract_components(serper_results)
 
     def _crawl_threads_launcher(self, url_list):
-        # Create and start threads for each URL in the list
-        threads = []
-        for i in range(len(url_list)):
-            thread = threading.Thread(
-                target=self._web_crawler_thread, args=(i, url_list)
-            )
-            threads.append(thread)
-            thread.start()
-        # Wait for all threads to finish execution
-        for thread in threads:
-            thread.join()
+        # Schedule a crawl task for each URL in the list on the shared crawl executor
+        futures = [
+            self.crawl_executor.submit(url, self._web_crawler_thread, i, url_list)
+            for i, url in enumerate(url_list)
+        ]
+        # Wait for all crawl tasks to finish execution
+        wait(futures)
 
     def fetch(self):
         service_response = self._serper_places_launcher()
@@ -293,16 +695,7 @@ class PlacesContentFetcher:
 
             self._crawl_threads_launcher(url_list)
             # Reorder the fetched content to match the order of URLs
-            ordered_contents = [
-                next(
-                    (
-                        item["content"]
-                        for item in self.web_contents
-                        if item["url"] == url
-                    ),
-                    "",
-                )
-                for url in url_list
-            ]
-            return ordered_contents, filtered_service_response
-        return [], None
+            contents = {item["url"]: item["content"] for item in self.web_contents}
+            ordered_contents = [contents.get(url, "") for url in url_list]
+            return FetchResult(ordered_contents, filtered_service_response, url_list)
+        return FetchResult([], None)
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import weakref
+from http.cookiejar import DefaultCookiePolicy
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = 32  # Number of per-host connection pools kept alive
+POOL_MAXSIZE = 16  # Maximum number of keep-alive connections per host
+ASYNC_POOL_SIZE = 100  # Maximum number of pooled async connections per event loop
+ASYNC_POOL_SIZE_PER_HOST = 8  # Maximum number of pooled async connections per host
+
+# One pooled aiohttp session per event loop, since sessions cannot cross loops
+_async_sessions = weakref.WeakKeyDictionary()
+
+# Process-wide requests session shared by every scraper and search client
+_session = None
+_session_lock = threading.Lock()
+_pool_settings = {
+    "pool_connections": POOL_CONNECTIONS,
+    "pool_maxsize": POOL_MAXSIZE,
+    "host_pool_sizes": {},
+}
+
+
+def _build_session(pool_connections, pool_maxsize, host_pool_sizes):
+    # Create a session whose adapters keep connections alive between requests
+    session = requests.Session()
+    # Never carry cookies from one scraped site or query over to the next request
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # Requests picks the adapter with the longest matching prefix for each URL
+    for prefix, maxsize in host_pool_sizes.items():
+        session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=maxsize))
+    return session
+
+
+def get_session():
+    """
+    Returns the process-wide requests session, creating it on first use.
+    Connections stay alive in per-host pools, so repeated requests skip the TCP and TLS handshakes.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session(**_pool_settings)
+        return _session
+
+
+def configure_session_pool(
+    pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, host_pool_sizes=None
+):
+    """
+    Sets the pool sizes of the process-wide requests session and rebuilds it.
+    host_pool_sizes maps URL prefixes (e.g. "https://google.serper.dev") to their own pool size.
+    """
+    global _session
+    with _session_lock:
+        _pool_settings.update(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            host_pool_sizes=dict(host_pool_sizes or {}),
+        )
+        previous, _session = _session, None
+    if previous is not None:
+        previous.close()
+
+
+def close_session():
+    """Closes the process-wide requests session and its pooled connections."""
+    global _session
+    with _session_lock:
+        previous, _session = _session, None
+    if previous is not None:
+        previous.close()
+
+
+def get_async_session():
+    """
+    Returns the pooled aiohttp session bound to the running event loop, creating it on first use.
+    Every coroutine running on the same loop shares its connections.
+    """
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=ASYNC_POOL_SIZE,
+            limit_per_host=ASYNC_POOL_SIZE_PER_HOST,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session():
+    """Closes the pooled aiohttp session of the running event loop, if there is one."""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
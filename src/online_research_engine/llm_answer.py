@@ -1,71 +1,120 @@
-import os
+import logging
+import re
 
-import yaml
-from langchain.prompts import PromptTemplate
 from langchain.schema import HumanMessage
 
+from .config_registry import ConfigRegistry
+from .tokens import count_tokens as count_tiktoken_tokens
+
+logger = logging.getLogger(__name__)
+
 
 class GPTAnswer:
     TOP_K = 10  # Top K documents to retrieve
+    CONTEXT_TOKENS = 3000  # Token budget of the web search results in the prompt
+    MIN_TRIMMED_TOKENS = 32  # Chunks that would be trimmed below this are left out
+    TEMPLATE_VARIABLES = ["profile", "context_str", "language", "query", "format"]
 
-    def __init__(self, llm, config_path=None):
-        # Load configuration from a YAML file
-        if not config_path:
-            config_path = os.path.join(
-                os.path.dirname(__file__), "config", "config.yaml"
-            )
-        with open(config_path, "r") as file:
-            self.config = yaml.safe_load(file)
+    def __init__(
+        self, llm, config_path=None, context_tokens=CONTEXT_TOKENS, count_tokens=None
+    ):
+        # The configuration and its template are looked up in the process-wide registry on
+        # every use, so they are parsed once and edits to the file still take effect
+        self.config_path = config_path
+        self.config_registry = ConfigRegistry.get_shared()
 
         self.llm = llm
+        self.context_tokens = context_tokens
+        # Callable returning the number of tokens of a text, tiktoken by default
+        self.count_tokens = count_tokens or count_tiktoken_tokens
+
+    @property
+    def config(self):
+        # Shared configuration loaded from the YAML file, which must not be modified
+        return self.config_registry.get_config(self.config_path)
 
     def _format_reference(self, relevant_docs_list, link_list):
-        # Format the references from the retrieved documents for use in the prompt
-        reference_url_list = [
-            (relevant_docs_list[i].metadata)["url"]
-            for i in range(min(self.TOP_K, len(relevant_docs_list)))
-        ]
-        reference_content_list = [
-            relevant_docs_list[i].page_content
-            for i in range(min(self.TOP_K, len(relevant_docs_list)))
-        ]
-        reference_index_list = [
-            link_list.index(link) + 1 for link in reference_url_list
-        ]
-        rearranged_index_list = self._rearrange_index(reference_index_list)
-
-        # Create a formatted string of references
-        formatted_reference = "\n"
-        for i in range(min(self.TOP_K, len(relevant_docs_list))):
-            formatted_reference += (
-                "Webpage["
-                + str(rearranged_index_list[i])
-                + "], url: "
-                + reference_url_list[i]
-                + ":\n"
-                + reference_content_list[i]
-                + "\n\n\n"
+        """
+        Formats the retrieved documents as the web search results of the prompt, within a
+        budget of context_tokens tokens. Documents come ranked by the retriever, best first,
+        and are packed in that order; those that do not fit whole are trimmed, and the
+        chunks of a URL are merged under a single header numbered by first appearance.
+        link_list is no longer needed for the numbering and is kept for existing callers.
+        The tokens of the result are logged with each call rather than stored, since one
+        GPTAnswer may format references for several queries at once.
+        """
+        budget = self.context_tokens
+        pages = {}  # URL -> packed chunks, in order of the URL's best-ranked chunk
+        documents = relevant_docs_list[: self.TOP_K]
+        for document in documents:
+            url = document.metadata["url"]
+            # A new page costs a header and a page separator, a further chunk a separator
+            if url in pages:
+                overhead = self.count_tokens("\n\n")
+            else:
+                overhead = self.count_tokens(
+                    f"Webpage[{len(pages) + 1}], url: {url}:\n\n\n\n"
+                )
+            content = document.page_content
+            tokens = self.count_tokens(content)
+            if overhead + tokens > budget:
+                content = self._trim_to_tokens(content, budget - overhead)
+                if not content:
+                    continue
+                tokens = self.count_tokens(content)
+            pages.setdefault(url, []).append(content)
+            budget -= overhead + tokens
+
+        # Build the string in one pass instead of concatenating every piece
+        parts = ["\n"]
+        for index, (url, chunks) in enumerate(pages.items(), 1):
+            parts.extend(
+                [f"Webpage[{index}], url: {url}:\n", "\n\n".join(chunks), "\n\n\n"]
             )
+        formatted_reference = "".join(parts)
+
+        reference_tokens = self.count_tokens(formatted_reference)
+        packed_chunks = sum(len(chunks) for chunks in pages.values())
+        logger.info(
+            "Packed %d of %d retrieved chunks from %d webpages into %d tokens",
+            packed_chunks,
+            len(documents),
+            len(pages),
+            reference_tokens,
+            extra={
+                "packed_chunks": packed_chunks,
+                "retrieved_chunks": len(documents),
+                "webpages": len(pages),
+                "reference_tokens": reference_tokens,
+            },
+        )
         return formatted_reference
 
-    def _rearrange_index(self, original_index_list):
-        # Rearrange indices to ensure they are unique and sequential
-        index_dict = {}
-        rearranged_index_list = []
-        for index in original_index_list:
-            if index not in index_dict:
-                index_dict.update({index: len(index_dict) + 1})
-                rearranged_index_list.append(len(index_dict))
+    def _trim_to_tokens(self, text, max_tokens):
+        # Return the longest prefix of the text that ends on a word boundary and fits
+        # max_tokens, or "" if less than MIN_TRIMMED_TOKENS would be left
+        if max_tokens < self.MIN_TRIMMED_TOKENS:
+            return ""
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(text[:middle]) <= max_tokens:
+                low = middle
             else:
-                rearranged_index_list.append(index_dict[index])
-        return rearranged_index_list
+                high = middle - 1
+        trimmed = text[:low]
+        if low < len(text) and not text[low].isspace():
+            # Drop the word cut in half
+            trimmed = re.sub(r"\S+$", "", trimmed)
+        trimmed = trimmed.rstrip()
+        if self.count_tokens(trimmed) < self.MIN_TRIMMED_TOKENS:
+            return ""
+        return trimmed
 
-    def get_answer(self, query, relevant_docs, language, output_format, profile):
-        # Use llm instance and generate an answer
-        template = self.config["template"]
-        prompt_template = PromptTemplate(
-            input_variables=["profile", "context_str", "language", "query", "format"],
-            template=template,
+    def _build_prompt(self, query, relevant_docs, language, output_format, profile):
+        # Fill the answer template from the configuration
+        prompt_template = self.config_registry.get_template(
+            self.TEMPLATE_VARIABLES, self.config_path
         )
 
         profile = "conscientious researcher" if not profile else profile
@@ -76,8 +125,55 @@ class GPTAnswer:
             format=output_format,
             profile=profile,
         )
-        print("\n\nThe message sent to LLM:\n", summary_prompt)
-        print("\n\n", "=" * 30, "GPT's Answer: ", "=" * 30, "\n")
+        prompt_tokens = self.count_tokens(summary_prompt)
+        logger.info(
+            "Prompt of %d tokens for query %r",
+            prompt_tokens,
+            query,
+            extra={"query": query, "prompt_tokens": prompt_tokens},
+        )
+        # Prompts are large, so they are only logged at debug level
+        logger.debug(
+            "Prompt sent to the LLM:\n%s",
+            summary_prompt,
+            extra={"query": query, "prompt": summary_prompt},
+        )
+        return summary_prompt
+
+    def get_answer(self, query, relevant_docs, language, output_format, profile):
+        # Use llm instance and generate an answer
+        summary_prompt = self._build_prompt(
+            query, relevant_docs, language, output_format, profile
+        )
         gpt_answer = self.llm([HumanMessage(content=summary_prompt)])
+        logger.debug(
+            "Answer of the LLM:\n%s",
+            gpt_answer.content,
+            extra={"query": query, "answer": gpt_answer.content},
+        )
 
         return gpt_answer
+
+    def stream_answer(self, query, relevant_docs, language, output_format, profile):
+        """
+        Generates the answer like get_answer, but yields its text piece by piece as the LLM
+        produces it, so the first words can be shown after the LLM's first-token latency.
+        Feed the pieces to an IncrementalReferenceLocator to get the reference cards early.
+        """
+        summary_prompt = self._build_prompt(
+            query, relevant_docs, language, output_format, profile
+        )
+        for chunk in self.llm.stream([HumanMessage(content=summary_prompt)]):
+            if chunk.content:
+                yield chunk.content
+
+    async def astream_answer(
+        self, query, relevant_docs, language, output_format, profile
+    ):
+        # Asynchronous counterpart of stream_answer
+        summary_prompt = self._build_prompt(
+            query, relevant_docs, language, output_format, profile
+        )
+        async for chunk in self.llm.astream([HumanMessage(content=summary_prompt)]):
+            if chunk.content:
+                yield chunk.content
@@ -1,5 +1,7 @@
 import re
 
+from .urls import index_urls
+
 
 class ReferenceLocator:
     def __init__(self, gpt_answer: str, serper_response: dict):
@@ -68,12 +70,16 @@ class ReferenceLocator:
             for i in range(len(index_list))
         ]
 
+        # Group the references by index so each sentence finds its own in constant time
+        references_by_index = {}
+        for dict2 in reference_with_index:
+            references_by_index.setdefault(dict2["index"], []).append(dict2)
+
         sentences_with_references = []
         for dict1 in sentences_with_index:
-            for dict2 in reference_with_index:
-                if dict1["index"] == dict2["index"]:
-                    dict1.update({"url": dict2["url"], "source": dict2["source"]})
-                    sentences_with_references.append(dict1)
+            for dict2 in references_by_index.get(dict1["index"], []):
+                dict1.update({"url": dict2["url"], "source": dict2["source"]})
+                sentences_with_references.append(dict1)
 
         return sentences_with_references
 
@@ -82,15 +88,13 @@ class ReferenceLocator:
         Matches the sentences with references to the corresponding web information.
         """
         # Retrieve the web information (titles, timestamps, snippets) for each reference
-        url_index_list = self.serper_response["links"]
+        url_index = index_urls(self.serper_response["links"])
         reference_cards = [
             {
-                "titles": self.serper_response["titles"][
-                    url_index_list.index(reference["url"])
-                ],
-                # 'time': self.serper_response['time'][url_index_list.index(reference['url'])],
+                "titles": self.serper_response["titles"][url_index[reference["url"]]],
+                # 'time': self.serper_response['time'][url_index[reference['url']]],
                 "snippets": self.serper_response["snippets"][
-                    url_index_list.index(reference["url"])
+                    url_index[reference["url"]]
                 ],
                 **reference,
             }
@@ -98,3 +102,56 @@ class ReferenceLocator:
         ]
 
         return reference_cards
+
+
+class IncrementalReferenceLocator(ReferenceLocator):
+    """
+    Locates the sources of the quoted sentences while the GPT answer is still streaming in.
+    feed() takes each new piece of the answer and returns the reference cards it completed:
+    a card is ready as soon as its cited sentence and the matching "Quoted sentence" entry
+    of the references are both complete, instead of after the whole answer.
+    """
+
+    REFERENCES_HEADER = "\nReferences:"
+    # A complete reference entry: its index, its URL line and its quoted sentence line
+    REFERENCE_PATTERN = re.compile(
+        r"\[(\d+)\][^\n]*?(https://[^\n]+)\n[^\n]*?Quoted sentence: (.*?)\n"
+    )
+
+    def __init__(self, serper_response: dict):
+        super().__init__("", serper_response)
+        self._parsed = None  # Position up to which the references part was parsed
+        self._sentences_by_index = {}  # Cited sentences of the content part by index
+
+    def feed(self, chunk: str):
+        """Adds the next piece of the answer and returns the newly completed cards."""
+        self.gpt_answer += chunk
+        return self._locate_new_sources(self.gpt_answer)
+
+    def close(self):
+        """Returns the cards completed by the end of the answer, once it is over."""
+        # The last quoted sentence may end with the answer instead of a line break
+        return self._locate_new_sources(self.gpt_answer + "\n")
+
+    def _locate_new_sources(self, gpt_answer):
+        # Match the reference entries completed since the last call with their sentences
+        if self._parsed is None:
+            # The content part is complete once the references part begins
+            position = gpt_answer.find(self.REFERENCES_HEADER)
+            if position == -1:
+                return []
+            for sentence in self._handle_sentences_in_answer(gpt_answer[:position]):
+                self._sentences_by_index.setdefault(sentence["index"], []).append(
+                    sentence
+                )
+            self._parsed = position + len(self.REFERENCES_HEADER)
+
+        sentences_with_references = []
+        for match in self.REFERENCE_PATTERN.finditer(gpt_answer, self._parsed):
+            index, url, source = int(match[1]), match[2], match[3]
+            sentences_with_references.extend(
+                {**sentence, "url": url, "source": source}
+                for sentence in self._sentences_by_index.get(index, [])
+            )
+            self._parsed = match.end()
+        return self._match_web_info(sentences_with_references)
@@ -0,0 +1,128 @@
+import hashlib
+
+import numpy as np
+
+from .bm25 import tokenize
+
+
+class MinHashLSH:
+    """
+    Incremental near-duplicate index over texts, using MinHash signatures of word shingles
+    and locality-sensitive hashing on bands of the signatures.
+    Each added text is compared only with the indexed texts sharing one of its band
+    buckets, so indexing a corpus takes time linear in its size.
+    """
+
+    THRESHOLD = 0.8  # Estimated Jaccard similarity from which texts are near-duplicates
+    NUM_PERMUTATIONS = 128  # Length of the MinHash signatures
+    BANDS = 32  # LSH bands, of NUM_PERMUTATIONS // BANDS signature rows each
+    SHINGLE_SIZE = 5  # Words per shingle
+    PRIME = (1 << 31) - 1  # Modulus of the permutations, above every shingle hash
+    BLOCK_SIZE = 4096  # Shingles permuted at a time, bounding memory on long pages
+
+    def __init__(
+        self,
+        threshold=THRESHOLD,
+        num_permutations=NUM_PERMUTATIONS,
+        bands=BANDS,
+        shingle_size=SHINGLE_SIZE,
+        seed=1,
+    ):
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.shingle_size = shingle_size
+        # Random permutations h(x) = (a * x + b) mod PRIME; products stay below 2^62
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, self.PRIME, num_permutations, dtype=np.uint64)
+        self._b = rng.integers(0, self.PRIME, num_permutations, dtype=np.uint64)
+        self._buckets = [{} for _ in range(bands)]  # Band hash -> keys of indexed texts
+        self._signatures = {}  # Key -> signature of each indexed text
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def signature(self, text):
+        """Returns the MinHash signature of the text, or None if it has no words."""
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        size = min(self.shingle_size, len(tokens))
+        shingles = {
+            " ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)
+        }
+        hashes = np.fromiter(
+            (
+                int.from_bytes(
+                    hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(),
+                    "big",
+                )
+                % self.PRIME
+                for shingle in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        signature = np.full(len(self._a), self.PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), self.BLOCK_SIZE):
+            block = hashes[start : start + self.BLOCK_SIZE]
+            permuted = (np.outer(self._a, block) + self._b[:, None]) % self.PRIME
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature
+
+    def similarity(self, first, second):
+        """Estimates the Jaccard similarity of two texts from their signatures."""
+        return float(np.mean(first == second))
+
+    def add(self, key, text):
+        """
+        Returns the key of an indexed near-duplicate of the text, if any.
+        Otherwise indexes the text under the key and returns None.
+        Texts without words are neither indexed nor duplicates.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        band_hashes = [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+        candidates = {}  # Keeps the earliest indexed texts first
+        for buckets, band_hash in zip(self._buckets, band_hashes):
+            for candidate in buckets.get(band_hash, ()):
+                candidates[candidate] = None
+        for candidate in candidates:
+            similarity = self.similarity(signature, self._signatures[candidate])
+            if similarity >= self.threshold:
+                return candidate
+
+        # Only texts that are not duplicates are indexed, so buckets stay small
+        self._signatures[key] = signature
+        for buckets, band_hash in zip(self._buckets, band_hashes):
+            buckets.setdefault(band_hash, []).append(key)
+        return None
+
+
+def collapse_near_duplicates(contents, services_response, index=None):
+    """
+    Empties the content of every page that is a near-duplicate of an earlier page, so it is
+    neither embedded nor sent to the LLM twice, and returns the new list of contents.
+    services_response["duplicate_of"][i] is set to the position of the page that page i
+    duplicates, or None, and the sources of a duplicate are added to the sources of that
+    page so every URL stays available for citation.
+    """
+    if index is None:
+        index = MinHashLSH()
+    sources = services_response.get("sources")
+    collapsed_contents, duplicate_of = [], []
+    for i, content in enumerate(contents):
+        original = index.add(i, content) if content else None
+        duplicate_of.append(original)
+        collapsed_contents.append("" if original is not None else content)
+        if original is not None and sources is not None:
+            sources[original].extend(sources[i])
+    services_response["duplicate_of"] = duplicate_of
+    return collapsed_contents
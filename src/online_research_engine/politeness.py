@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from .deadline import as_deadline
+from .http_sessions import get_session
+
+
+class PolitenessPolicy:
+    """
+    Per-host crawl politeness shared by scrapers. Requests to the same host start at least
+    min_interval seconds apart, or the robots.txt Crawl-delay if it is longer, URLs that the
+    host's cached robots.txt disallows are skipped, and a 429 or 503 answer holds the host
+    back for its Retry-After, or an exponential backoff, before the request is retried.
+    Every host is paced on its own, so crawls of different hosts never wait for each other.
+    Limiting the concurrent requests per host is left to CrawlExecutor.
+    """
+
+    MIN_INTERVAL = 0.5  # Seconds between the starts of two requests to the same host
+    MAX_WAIT = 30  # Requests whose turn is further away than this are skipped
+    MAX_RETRIES = 2  # Retries of a request answered with 429 or 503
+    BACKOFF = 1.0  # First retry delay without Retry-After, doubled on every retry
+    ROBOTS_TTL = 3600  # Seconds a host's robots.txt is cached
+    ROBOTS_ERROR_TTL = 60  # Seconds an unreachable robots.txt is cached as allowing all
+    ROBOTS_TIMEOUT = 5  # Seconds a robots.txt download may take
+    RETRY_STATUSES = (429, 503)
+
+    _shared = None  # Process-wide policy, so all scrapers pace each host together
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        min_interval=MIN_INTERVAL,
+        max_wait=MAX_WAIT,
+        max_retries=MAX_RETRIES,
+        backoff=BACKOFF,
+        respect_robots=True,
+        robots_ttl=ROBOTS_TTL,
+    ):
+        self.min_interval = min_interval
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.respect_robots = respect_robots
+        self.robots_ttl = robots_ttl
+        self._lock = threading.Lock()
+        self._next_start = {}  # Host -> earliest start time of its next request
+        self._crawl_delays = {}  # Host -> Crawl-delay from its robots.txt
+        self._robots = {}  # Scheme and host -> (expiry, RobotFileParser or None)
+        self._robots_locks = {}  # Held while a host's robots.txt is downloaded
+        self._counters = {
+            "robots_fetches": 0,
+            "disallowed": 0,
+            "delayed": 0,
+            "retries": 0,
+            "skipped": 0,
+        }
+
+    @classmethod
+    def get_shared(cls):
+        # Return the process-wide policy, creating it on first use
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _get_host(self, url):
+        # Pace requests per network location, like CrawlExecutor limits them
+        return urlsplit(url).netloc.lower()
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def allowed(self, url, user_agent="*", deadline=None):
+        """
+        Returns whether the host's robots.txt allows user_agent to fetch the URL.
+        Each robots.txt is downloaded once per robots_ttl, however many requests ask for it.
+        """
+        parts = urlsplit(url)
+        if not self.respect_robots or parts.scheme not in ("http", "https"):
+            return True
+        parser = self._get_robots(
+            parts.scheme, parts.netloc.lower(), user_agent, deadline
+        )
+        if parser is None or parser.can_fetch(user_agent, url):
+            return True
+        self._count("disallowed")
+        return False
+
+    def _get_robots(self, scheme, host, user_agent, deadline):
+        # Return the cached robots.txt parser of the host, downloading it when expired
+        origin = f"{scheme}://{host}"
+        with self._lock:
+            lock = self._robots_locks.setdefault(origin, threading.Lock())
+        # Concurrent requests to a host wait for a single download
+        with lock:
+            cached = self._robots.get(origin)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+
+            self._count("robots_fetches")
+            ttl = self.robots_ttl
+            try:
+                response = get_session().get(
+                    f"{origin}/robots.txt",
+                    headers={"User-Agent": user_agent},
+                    timeout=as_deadline(deadline).remaining(self.ROBOTS_TIMEOUT),
+                )
+            except requests.exceptions.RequestException:
+                # Crawl the host as if it had no robots.txt, but ask again soon
+                response, ttl = None, min(ttl, self.ROBOTS_ERROR_TTL)
+
+            parser = None
+            # Missing or failing robots.txt files place no restrictions
+            if response is not None and response.status_code == 200:
+                parser = RobotFileParser(f"{origin}/robots.txt")
+                parser.parse(response.text.splitlines())
+                crawl_delay = parser.crawl_delay(user_agent)
+                if crawl_delay:
+                    with self._lock:
+                        self._crawl_delays[host] = float(crawl_delay)
+            self._robots[origin] = (time.monotonic() + ttl, parser)
+            return parser
+
+    def _reserve_turn(self, url, deadline):
+        # Book the next start time of the URL's host and return the seconds to wait for it
+        # Returns None without booking if the turn comes too late
+        host = self._get_host(url)
+        expires_at = as_deadline(deadline).expires_at
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            if start - now > self.max_wait or (
+                expires_at is not None and start >= expires_at
+            ):
+                self._counters["skipped"] += 1
+                return None
+            interval = max(self.min_interval, self._crawl_delays.get(host, 0))
+            self._next_start[host] = start + interval
+            if start > now:
+                self._counters["delayed"] += 1
+            return start - now
+
+    def wait_turn(self, url, deadline=None):
+        """
+        Blocks until a request to the URL's host may start and returns True.
+        Returns False at once if that turn is more than max_wait seconds away or past the
+        deadline, in which case the request should be skipped.
+        """
+        delay = self._reserve_turn(url, deadline)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    async def await_turn(self, url, deadline=None):
+        # Asynchronous counterpart of wait_turn
+        delay = self._reserve_turn(url, deadline)
+        if delay is None:
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+    def retry_delay(self, url, status, headers, attempt):
+        """
+        Returns the seconds to wait before retrying a request answered with 429 or 503, or
+        None if the response is final. The host is held back for that long, so every request
+        to it waits too, and the retry itself waits through wait_turn.
+        """
+        if status not in self.RETRY_STATUSES:
+            return None
+        delay = self._parse_retry_after(headers.get("Retry-After"))
+        if delay is None:
+            delay = self.backoff * 2**attempt
+
+        host = self._get_host(url)
+        with self._lock:
+            self._next_start[host] = max(
+                self._next_start.get(host, 0), time.monotonic() + delay
+            )
+            if attempt >= self.max_retries or delay > self.max_wait:
+                return None
+            self._counters["retries"] += 1
+        return delay
+
+    def _parse_retry_after(self, value):
+        # Retry-After holds either a number of seconds or an HTTP date
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def stats(self):
+        """
+        Returns the counters of robots.txt downloads, disallowed URLs, requests delayed for
+        their host's turn, retries and requests skipped because their turn came too late.
+        """
+        with self._lock:
+            return dict(self._counters)
@@ -1,37 +1,393 @@
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.vectorstores import Chroma
 
+from .batched_embeddings import BatchedEmbeddings
+from .bm25 import BM25Index, reciprocal_rank_fusion
+from .deadline import as_deadline
+from .embedding_cache import CachedEmbeddings, get_model_id
+from .urls import canonicalize_url
+from .vector_index import NumpyVectorIndex
+
 
 class EmbeddingRetriever:
+    """
+    Splits fetched pages into chunks and returns the TOP_K chunks closest to the query.
+    Hybrid retrieval is opt-in because it trades recall for embedding cost: it returns
+    a fusion of the BM25 and dense rankings of the BM25 candidates, not the exhaustive
+    dense top-k. On the benchmark corpus, benchmarks/eval_hybrid_retrieval.py measured a
+    recall@10 against exhaustive dense retrieval of 0.40 at the default 50 candidates,
+    with 51x fewer chunks embedded, 0.42 at 100 candidates (26x fewer) and 0.47 at 400
+    (6x fewer). Even with every chunk as a candidate, recall@10 is only 0.49, because
+    the fusion reorders the dense ranking. Those numbers use the harness's offline
+    embedding; run it with --config to measure a real embedding model.
+    """
+
     TOP_K = 10  # Number of top K documents to retrieve
+    BACKENDS = ("chroma", "numpy")  # Vector search backends for per-query retrieval
+    PREFILTER_TOP_N = 50  # Chunks kept by the BM25 prefilter for dense ranking
+    STREAM_WORKERS = 4  # Pages embedded at the same time by retrieve_embeddings_stream
+
+    def __init__(
+        self,
+        embedding_model,
+        embedding_cache=None,
+        persist_directory=None,
+        backend="chroma",
+        hybrid=False,
+        prefilter_top_n=PREFILTER_TOP_N,
+    ):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown retrieval backend: {backend}")
+        if persist_directory and (backend != "chroma" or hybrid):
+            raise ValueError(
+                "A persistent index requires the non-hybrid chroma backend"
+            )
+        # "numpy" searches an in-process matrix instead of a temporary Chroma collection
+        self.backend = backend
+        # Hybrid retrieval only embeds the prefilter_top_n chunks ranked best by BM25,
+        # then fuses their dense and BM25 rankings with reciprocal rank fusion; see the
+        # class docstring for the recall it gives up
+        self.hybrid = hybrid
+        self.prefilter_top_n = prefilter_top_n
 
-    def __init__(self, embedding_model):
         # Initialize the text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000, chunk_overlap=0
         )
 
+        model_id = get_model_id(embedding_model)
+        # The retriever owns the embedding calls: documents are sent in token-budgeted
+        # batches with bounded concurrency, unless a configured BatchedEmbeddings is given
+        if not isinstance(embedding_model, BatchedEmbeddings):
+            embedding_model = BatchedEmbeddings(embedding_model)
+        # With an EmbeddingCache, only chunks never seen before are sent to the model
+        if embedding_cache is not None:
+            embedding_model = CachedEmbeddings(
+                embedding_model, embedding_cache, model_id
+            )
         self.embedding_model = embedding_model
 
-    def retrieve_embeddings(self, contents_list: list, link_list: list, query: str):
+        # With a persist_directory, chunks go into a long-lived index that grows across
+        # queries instead of a collection built and deleted for every query
+        self.index = None
+        if persist_directory:
+            model_hash = hashlib.sha256(model_id.encode("utf-8"))
+            self.index = Chroma(
+                collection_name=f"chunks-{model_hash.hexdigest()[:16]}",
+                embedding_function=self.embedding_model,
+                persist_directory=persist_directory,
+            )
+
+    def retrieve_embeddings(
+        self, contents_list: list, link_list: list, query: str, deadline=None
+    ):
         # Retrieve embeddings for a given list of contents and a query
+        # If the embeddings are not back by the deadline, chunks are ranked by BM25 instead
         metadatas = [{"url": link} for link in link_list]
         texts = self.text_splitter.create_documents(contents_list, metadatas=metadatas)
+        if self.index is not None:
+            return self._retrieve_from_index(texts, query, deadline)
+        if self.hybrid:
+            return self._retrieve_hybrid(texts, query, deadline)
+        if not texts:
+            return []
+
+        embeddings = self._embed([text.page_content for text in texts], query, deadline)
+        if embeddings is None:
+            return self._rank_lexically(texts, query)
+        return self._search(texts, *embeddings)
+
+    def retrieve_embeddings_stream(self, pages, query: str, deadline=None):
+        """
+        Streaming counterpart of retrieve_embeddings for an iterable of (url, content) pairs,
+        such as WebContentFetcher.fetch_iter(). Each page is split and its chunks are sent
+        for embedding as soon as it arrives, so embedding overlaps with crawling.
+        Hybrid and persistent index retrieval need every chunk first, so with those
+        the pages are collected and retrieved at the end.
+        """
+        if self.index is not None or self.hybrid:
+            pages = list(pages)
+            return self.retrieve_embeddings(
+                [content for _, content in pages],
+                [url for url, _ in pages],
+                query,
+                deadline,
+            )
+
+        deadline = as_deadline(deadline)
+        texts, vector_futures = [], []
+        executor = ThreadPoolExecutor(
+            max_workers=self.STREAM_WORKERS, thread_name_prefix="embedding"
+        )
+        try:
+            query_future = executor.submit(self.embedding_model.embed_query, query)
+            for url, content in pages:
+                page_texts = self.text_splitter.create_documents(
+                    [content], metadatas=[{"url": url}]
+                )
+                texts.extend(page_texts)
+                vector_futures.append(
+                    executor.submit(
+                        self.embedding_model.embed_documents,
+                        [text.page_content for text in page_texts],
+                    )
+                )
+            vectors = [
+                vector
+                for future in vector_futures
+                for vector in future.result(timeout=deadline.remaining())
+            ]
+            query_vector = query_future.result(timeout=deadline.remaining())
+        except TimeoutError:
+            if not deadline.expired:
+                raise
+            return self._rank_lexically(texts, query)
+        finally:
+            # Embeddings still queued at the deadline are cancelled, running ones abandoned
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if not texts:
+            return []
+        return self._search(texts, vectors, query_vector)
+
+    def retrieve_embeddings_batch(
+        self,
+        contents_by_url: dict,
+        link_lists: list,
+        queries: list,
+        deadline=None,
+        query_vectors=None,
+    ):
+        """
+        Batch counterpart of retrieve_embeddings for many queries over shared pages.
+        contents_by_url maps the URL of each page to its content, and link_lists[i] lists
+        the links found for queries[i]; links and URLs are matched by canonical URL, and
+        the returned documents of each query carry that query's own links.
+        Every page is split and embedded once however many queries found it, and the
+        queries are embedded with embed_queries unless their query_vectors are given.
+        Each query is then ranked against the chunks of its own pages in-process,
+        whatever the backend. Returns the list of relevant documents of each query.
+        If the embeddings are not back by the deadline, chunks are ranked by BM25 instead.
+        """
+        texts, page_positions = [], {}  # Canonical URL -> positions of its chunks
+        for url, content in contents_by_url.items():
+            page_texts = self.text_splitter.create_documents([content])
+            page_positions[canonicalize_url(url)] = range(
+                len(texts), len(texts) + len(page_texts)
+            )
+            texts.extend(page_texts)
+
+        embeddings = self._embed_batch(
+            [text.page_content for text in texts], queries, deadline, query_vectors
+        )
+        results = []
+        for i, (query, links) in enumerate(zip(queries, link_lists)):
+            positions, query_texts = [], []
+            for link in dict.fromkeys(links):
+                for position in page_positions.get(canonicalize_url(link), ()):
+                    positions.append(position)
+                    query_texts.append(
+                        Document(
+                            page_content=texts[position].page_content,
+                            metadata={"url": link},
+                        )
+                    )
+            if not query_texts:
+                results.append([])
+            elif embeddings is None:
+                results.append(self._rank_lexically(query_texts, query))
+            else:
+                vectors, batch_query_vectors = embeddings
+                db = NumpyVectorIndex(self.embedding_model)
+                db.add_documents(query_texts, vectors[positions])
+                results.append(
+                    db.similarity_search_by_vector(batch_query_vectors[i], k=self.TOP_K)
+                )
+        return results
+
+    def _search(self, texts, vectors, query_vector):
+        # Rank embedded chunks against the query embedding with the selected backend
+        if self.backend == "numpy":
+            db = NumpyVectorIndex(self.embedding_model)
+            db.add_documents(texts, vectors)
+            return db.similarity_search_by_vector(query_vector, k=self.TOP_K)
 
-        # Create a Chroma database from the documents using specific embeddings
-        db = Chroma.from_documents(
-            texts,
-            self.embedding_model,
+        # Create a temporary Chroma collection, named uniquely so that concurrent
+        # queries never share one, and fill it with the precomputed embeddings
+        db = Chroma(
+            collection_name=f"query-{uuid.uuid4().hex}",
+            embedding_function=self.embedding_model,
+        )
+        db._collection.add(
+            ids=[str(i) for i in range(len(texts))],
+            embeddings=vectors,
+            documents=[text.page_content for text in texts],
+            metadatas=[text.metadata for text in texts],
         )
 
-        # Create a retriever from the database to find relevant documents
-        retriever = db.as_retriever(search_kwargs={"k": self.TOP_K})
-        relevant_documents = retriever.get_relevant_documents(
-            query
-        )  # Retrieve and return the relevant documents
+        # Find the relevant documents with the query embedding
+        relevant_documents = db.similarity_search_by_vector(query_vector, k=self.TOP_K)
 
         # Explicitly delete the collection
         db.delete_collection()
         del db
 
         return relevant_documents
+
+    def _retrieve_hybrid(self, texts, query, deadline=None):
+        # Embed only the BM25 candidates; with this few vectors the exact in-process
+        # search is always cheaper than a Chroma collection
+        lexical_ranking = BM25Index([text.page_content for text in texts]).rank(
+            query, self.prefilter_top_n
+        )
+        if not lexical_ranking:
+            return []
+        candidates = [texts[i] for i in lexical_ranking]
+        embeddings = self._embed(
+            [candidate.page_content for candidate in candidates], query, deadline
+        )
+        if embeddings is None:
+            return candidates[: self.TOP_K]
+        vectors, query_vector = embeddings
+
+        db = NumpyVectorIndex(self.embedding_model)
+        db.add_documents(candidates, vectors)
+        dense_ranking = db.rank_by_vector(query_vector, k=len(candidates))
+        # Positions in candidates, which are already in BM25 order
+        fused = reciprocal_rank_fusion([range(len(candidates)), dense_ranking])
+        return [candidates[i] for i in fused[: self.TOP_K]]
+
+    def _embed(self, texts, query, deadline=None):
+        # Embed the query in parallel with the documents
+        # Returns None if the embeddings are not back by the deadline
+        deadline = as_deadline(deadline)
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="embedding")
+        try:
+            query_future = executor.submit(self.embedding_model.embed_query, query)
+            vectors = []
+            if texts:
+                vectors_future = executor.submit(
+                    self.embedding_model.embed_documents, texts
+                )
+                vectors = vectors_future.result(timeout=deadline.remaining())
+            return vectors, query_future.result(timeout=deadline.remaining())
+        except TimeoutError:
+            if not deadline.expired:
+                raise
+            return None
+        finally:
+            # Calls still running at the deadline are abandoned, not waited for
+            executor.shutdown(wait=False)
+
+    def embed_queries(self, queries, deadline=None):
+        """
+        Embeds each query with embed_query, like retrieve_embeddings does, so the vectors
+        match those of single queries and of AnswerCache.get_or_compute. The queries are
+        embedded concurrently, within the embedding model's limit of requests in flight.
+        Returns their vectors in order, or None if they are not all back by the deadline.
+        """
+        if not queries:
+            return []
+        deadline = as_deadline(deadline)
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(queries), BatchedEmbeddings.MAX_CONCURRENCY),
+            thread_name_prefix="embedding",
+        )
+        try:
+            futures = [
+                executor.submit(self.embedding_model.embed_query, query)
+                for query in queries
+            ]
+            return [future.result(timeout=deadline.remaining()) for future in futures]
+        except TimeoutError:
+            if not deadline.expired:
+                raise
+            return None
+        finally:
+            # Queries still queued at the deadline are cancelled, running ones abandoned
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _embed_batch(self, texts, queries, deadline=None, query_vectors=None):
+        # Embed the documents in one call in parallel with the queries
+        # Returns float32 matrices, or None if they are not back by the deadline
+        deadline = as_deadline(deadline)
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="embedding")
+        try:
+            if query_vectors is None:
+                queries_future = executor.submit(
+                    self.embed_queries, list(queries), deadline
+                )
+            vectors = []
+            if texts:
+                vectors = executor.submit(
+                    self.embedding_model.embed_documents, texts
+                ).result(timeout=deadline.remaining())
+            if query_vectors is None:
+                query_vectors = queries_future.result(timeout=deadline.remaining())
+        except TimeoutError:
+            if not deadline.expired:
+                raise
+            return None
+        finally:
+            # Calls still running at the deadline are abandoned, not waited for
+            executor.shutdown(wait=False)
+        if query_vectors is None:
+            return None
+        return (
+            np.asarray(vectors, dtype=np.float32),
+            np.asarray(query_vectors, dtype=np.float32),
+        )
+
+    def _rank_lexically(self, texts, query):
+        # Rank the chunks by BM25 when their embeddings did not arrive in time
+        ranking = BM25Index([text.page_content for text in texts]).rank(
+            query, self.TOP_K
+        )
+        return [texts[i] for i in ranking]
+
+    def _retrieve_from_index(self, texts, query, deadline=None):
+        # Add the chunks missing from the long-lived index and search among this query's chunks
+        chunks = {}
+        for text in texts:
+            chunk_id = hashlib.sha256(
+                f"{text.metadata['url']}\n{text.page_content}".encode("utf-8")
+            ).hexdigest()
+            chunks.setdefault(chunk_id, text)
+        if not chunks:
+            return []
+
+        chunk_ids = list(chunks)
+        indexed = set(self.index.get(ids=chunk_ids, include=[])["ids"])
+        new_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in indexed]
+        new_texts = [chunks[chunk_id].page_content for chunk_id in new_ids]
+        embeddings = self._embed(new_texts, query, deadline)
+        if embeddings is None:
+            return self._rank_lexically(list(chunks.values()), query)
+        vectors, query_vector = embeddings
+        if new_ids:
+            # Upserts are idempotent, so concurrent queries adding the same chunk are harmless
+            self.index._collection.upsert(
+                ids=new_ids,
+                embeddings=vectors,
+                documents=new_texts,
+                metadatas=[
+                    {**chunks[chunk_id].metadata, "chunk_id": chunk_id}
+                    for chunk_id in new_ids
+                ],
+            )
+
+        relevant_documents = self.index.similarity_search_by_vector(
+            query_vector,
+            k=min(self.TOP_K, len(chunk_ids)),
+            filter={"chunk_id": {"$in": chunk_ids}},
+        )
+        # Hide the index bookkeeping from the returned metadata
+        for document in relevant_documents:
+            document.metadata.pop("chunk_id", None)
+        return relevant_documents
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+
+from .deadline import DeadlineExceeded, as_deadline
+
+
+class SearchCacheBackendInterface:
+    def get(self, key: str) -> str | None:
+        """Return the serialized response stored under key, or None if missing or expired."""
+        pass
+
+    def set(self, key: str, value: str, ttl: float):
+        """Store a serialized response under key for ttl seconds."""
+        pass
+
+    def clear(self):
+        """Remove every stored response."""
+        pass
+
+
+class MemorySearchCacheBackend(SearchCacheBackendInterface):
+    """In-process backend keeping the max_entries most recently used responses."""
+
+    MAX_ENTRIES = 1024
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskSearchCacheBackend(SearchCacheBackendInterface):
+    """SQLite backend in WAL mode that several threads and processes can share."""
+
+    def __init__(self, path=None):
+        if not path:
+            path = os.path.join(
+                os.path.expanduser("~"),
+                ".cache",
+                "online_research_engine",
+                "search_cache.sqlite3",
+            )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._local = threading.local()  # SQLite connections cannot cross threads
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """)
+
+    def _connect(self):
+        # Return this thread's connection, opening it on first use
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+            (key, value, now + ttl),
+        )
+        # Expired responses are never read again
+        connection.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM responses")
+
+
+class SearchCache:
+    """
+    Caches search API responses keyed on the endpoint and the normalized request settings.
+    Responses to time-restricted searches expire sooner than unrestricted ones, and
+    identical requests made while one is in flight wait for it instead of going out again,
+    but no longer than their own deadline. Only successful responses are stored.
+    """
+
+    DEFAULT_TTL = 6 * 60 * 60  # Seconds an unrestricted search stays cached
+    # TTL per Serper date range (tbs) or Bing freshness value
+    FRESHNESS_TTLS = {
+        "qdr:h": 5 * 60,
+        "qdr:d": 30 * 60,
+        "Day": 30 * 60,
+        "qdr:w": 2 * 60 * 60,
+        "Week": 2 * 60 * 60,
+        "qdr:m": 6 * 60 * 60,
+        "Month": 6 * 60 * 60,
+        "qdr:y": 24 * 60 * 60,
+    }
+
+    def __init__(self, backend=None, default_ttl=DEFAULT_TTL, freshness_ttls=None):
+        # In-memory backend unless another one is given
+        self.backend = backend or MemorySearchCacheBackend()
+        self.default_ttl = default_ttl
+        self.freshness_ttls = {**self.FRESHNESS_TTLS, **(freshness_ttls or {})}
+        self._in_flight = {}  # key -> Future of the request being made
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(["hits", "misses", "coalesced"], 0)
+
+    def make_key(self, url, settings):
+        # Normalize the settings so equivalent requests share a key: unset values are
+        # dropped, keys are sorted and values compared as the strings sent on the wire
+        normalized = {
+            key: str(value)
+            for key, value in settings.items()
+            if value is not None and value != ""
+        }
+        payload = json.dumps([url, normalized], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_ttl(self, settings):
+        # Pick the TTL from the date range or freshness restriction of the request
+        freshness = settings.get("tbs") or settings.get("freshness")
+        return self.freshness_ttls.get(freshness, self.default_ttl)
+
+    def _lookup(self, key):
+        # Return (cached response, None, False) on a hit, else (None, Future, is_leader)
+        # where only the leader makes the request and the others wait for its Future
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return None, future, False
+            # Checked under the lock so a request finishing meanwhile is never repeated
+            value = self.backend.get(key)
+            if value is not None:
+                self._counters["hits"] += 1
+                return json.loads(value), None, False
+            self._counters["misses"] += 1
+            future = self._in_flight[key] = Future()
+            return None, future, True
+
+    def _complete(self, key, future, settings, status, response):
+        # Store a successful response and hand a copy of it to the coalesced callers
+        value = json.dumps(response)
+        try:
+            if status is not None and 200 <= status < 300:
+                self.backend.set(key, value, self.get_ttl(settings))
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_result(value)
+
+    def _fail(self, key, future, exception):
+        with self._lock:
+            self._in_flight.pop(key, None)
+        future.set_exception(exception)
+
+    def fetch(self, url, settings, request, deadline=None):
+        """
+        Returns the cached response for the request, or calls request() once for all
+        concurrent identical callers. request() must return (HTTP status, JSON response).
+        A caller waiting for another caller's request raises DeadlineExceeded if the
+        response is not back by its own deadline.
+        """
+        deadline = as_deadline(deadline)
+        key = self.make_key(url, settings)
+        response, future, is_leader = self._lookup(key)
+        if future is None:
+            return response
+        if not is_leader:
+            try:
+                return json.loads(future.result(deadline.remaining()))
+            except TimeoutError:
+                raise DeadlineExceeded("the coalesced search did not finish in time")
+
+        try:
+            status, response = request()
+        except BaseException as exception:
+            self._fail(key, future, exception)
+            raise
+        self._complete(key, future, settings, status, response)
+        return response
+
+    async def afetch(self, url, settings, arequest, deadline=None):
+        # Coroutine counterpart of fetch, where arequest() is awaited instead of called
+        deadline = as_deadline(deadline)
+        key = self.make_key(url, settings)
+        response, future, is_leader = self._lookup(key)
+        if future is None:
+            return response
+        if not is_leader:
+            # Shielded, since cancelling the wrapper would cancel the leader's Future
+            try:
+                value = await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(future)), deadline.remaining()
+                )
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("the coalesced search did not finish in time")
+            return json.loads(value)
+
+        try:
+            status, response = await arequest()
+        except BaseException as exception:
+            self._fail(key, future, exception)
+            raise
+        self._complete(key, future, settings, status, response)
+        return response
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """Returns the hit, miss and coalesced request counters of this cache."""
+        with self._lock:
+            return dict(self._counters)
@@ -1,13 +1,17 @@
 import json
-import os
 import re
 from enum import Enum
 
-import requests
-import yaml
+import aiohttp
+
+from .config_registry import ConfigRegistry
+from .deadline import as_deadline
+from .http_sessions import get_async_session, get_session
 
 
 class SearchClientInterface:
+    REQUEST_TIMEOUT = 10  # Seconds a search request may take, or less near the deadline
+
     def __init__(self):
         """Initialize the Search Client"""
         pass
@@ -27,13 +31,8 @@ class SearchClientInterface:
 
 class SerperPlacesClient(SearchClientInterface):
     def __init__(self, config_path=None):
-        # Load configuration from config.yaml file
-        if not config_path:
-            config_path = os.path.join(
-                os.path.dirname(__file__), "config", "config.yaml"
-            )
-        with open(config_path, "r") as file:
-            config = yaml.safe_load(file)
+        # Load configuration from config.yaml, parsed once unless the file changes
+        config = ConfigRegistry.get_shared().get_config(config_path)
 
         # Set up the URL and headers for the Serper API
         self.url = "https://google.serper.dev/places"
@@ -72,9 +71,9 @@ class SerperPlacesClient(SearchClientInterface):
 
         payload = json.dumps(serper_settings)
 
-        # Perform the POST request to the Serper API and return the JSON response
-        response = requests.request(
-            "POST", self.url, headers=self.headers, data=payload
+        # Perform the POST request on the pooled session and return the JSON response
+        response = get_session().post(
+            self.url, headers=self.headers, data=payload, timeout=self.REQUEST_TIMEOUT
         )
         return response.json()
 
@@ -146,14 +145,9 @@ class SerperClient(SearchClientInterface):
         PAST_MONTH = "qdr:m"
         PAST_YEAR = "qdr:y"
 
-    def __init__(self, config_path=None):
-        # Load configuration from config.yaml file
-        if not config_path:
-            config_path = os.path.join(
-                os.path.dirname(__file__), "config", "config.yaml"
-            )
-        with open(config_path, "r") as file:
-            config = yaml.safe_load(file)
+    def __init__(self, config_path=None, cache=None):
+        # Load configuration from config.yaml, parsed once unless the file changes
+        config = ConfigRegistry.get_shared().get_config(config_path)
 
         # Set up the URL and headers for the Serper API
         self.url = "https://google.serper.dev/search"
@@ -161,6 +155,8 @@ class SerperClient(SearchClientInterface):
             "X-API-KEY": config["serper_api_key"],  # API key from config file
             "Content-Type": "application/json",
         }
+        # Optional SearchCache shared by clients to skip repeated paid requests
+        self.cache = cache
 
     def serper(
         self,
@@ -171,6 +167,72 @@ class SerperClient(SearchClientInterface):
         date_range: DateRanges | str = DateRanges.ANY_TIME,
         num_results=10,
         page=1,
+        deadline=None,
+    ):
+        serper_settings = self._serper_settings(
+            query, country, location, language, date_range, num_results, page
+        )
+        deadline = as_deadline(deadline)
+        if self.cache is None:
+            return self._post(serper_settings, deadline)[1]
+        return self.cache.fetch(
+            self.url,
+            serper_settings,
+            lambda: self._post(serper_settings, deadline),
+            deadline,
+        )
+
+    def _post(self, serper_settings, deadline):
+        # Perform the POST request on the pooled session and return the status and JSON
+        # The request may not outlive the deadline of the query
+        deadline.check()
+        payload = json.dumps(serper_settings)
+        response = get_session().post(
+            self.url,
+            headers=self.headers,
+            data=payload,
+            timeout=deadline.remaining(self.REQUEST_TIMEOUT),
+        )
+        return response.status_code, response.json()
+
+    async def aserper(
+        self,
+        query: str,
+        country: str = "us",
+        location: str = "us",
+        language: str = "en",
+        date_range: DateRanges | str = DateRanges.ANY_TIME,
+        num_results=10,
+        page=1,
+        session=None,
+        deadline=None,
+    ):
+        serper_settings = self._serper_settings(
+            query, country, location, language, date_range, num_results, page
+        )
+        deadline = as_deadline(deadline)
+        if self.cache is None:
+            return (await self._apost(serper_settings, session, deadline))[1]
+        return await self.cache.afetch(
+            self.url,
+            serper_settings,
+            lambda: self._apost(serper_settings, session, deadline),
+            deadline,
+        )
+
+    async def _apost(self, serper_settings, session, deadline):
+        # Perform the POST request on the pooled async session and return the status and JSON
+        deadline.check()
+        payload = json.dumps(serper_settings)
+        session = session or get_async_session()
+        timeout = aiohttp.ClientTimeout(total=deadline.remaining(self.REQUEST_TIMEOUT))
+        async with session.post(
+            self.url, headers=self.headers, data=payload, timeout=timeout
+        ) as response:
+            return response.status, await response.json(content_type=None)
+
+    def _serper_settings(
+        self, query, country, location, language, date_range, num_results, page
     ):
         # Configure the query parameters for Serper API
         serper_settings = {
@@ -201,13 +263,7 @@ class SerperClient(SearchClientInterface):
                 }
             )
 
-        payload = json.dumps(serper_settings)
-
-        # Perform the POST request to the Serper API and return the JSON response
-        response = requests.request(
-            "POST", self.url, headers=self.headers, data=payload
-        )
-        return response.json()
+        return serper_settings
 
     def _contains_chinese(self, query: str):
         # Check if a string contains Chinese characters using a regular expression
@@ -262,20 +318,17 @@ class BingWebSearchClient(SearchClientInterface):
         VIDEOS = "Videos"
         WEBPAGES = "Webpages"
 
-    def __init__(self, config_path=None):
-        # Load configuration from config.yaml file
-        if not config_path:
-            config_path = os.path.join(
-                os.path.dirname(__file__), "config", "config.yaml"
-            )
-        with open(config_path, "r") as file:
-            config = yaml.safe_load(file)
+    def __init__(self, config_path=None, cache=None):
+        # Load configuration from config.yaml, parsed once unless the file changes
+        config = ConfigRegistry.get_shared().get_config(config_path)
 
         # Set up the URL and headers for the Bing Web Search API
         self.url = config["azure_bing_search_endpoint"] + "/v7.0/search"
         self.headers = {
             "Ocp-Apim-Subscription-Key": config["azure_bing_search_api_key"]
         }
+        # Optional SearchCache shared by clients to skip repeated paid requests
+        self.cache = cache
 
     def bing_web_search(
         self,
@@ -285,6 +338,67 @@ class BingWebSearchClient(SearchClientInterface):
         freshness: Freshness | str = Freshness.ANY_TIME,
         market: str = "en-us",
         responseFilter: ResponseFilter | str = ResponseFilter.WEBPAGES,
+        deadline=None,
+    ):
+        params = self._bing_web_search_params(
+            query, country_code, count, freshness, market, responseFilter
+        )
+
+        deadline = as_deadline(deadline)
+        if self.cache is None:
+            return self._get(params, deadline)[1]
+        return self.cache.fetch(
+            self.url, params, lambda: self._get(params, deadline), deadline
+        )
+
+    def _get(self, params, deadline):
+        # Perform the GET request on the pooled session and return the status and JSON
+        # The request may not outlive the deadline of the query
+        deadline.check()
+        response = get_session().get(
+            self.url,
+            headers=self.headers,
+            params=params,
+            timeout=deadline.remaining(self.REQUEST_TIMEOUT),
+        )
+        return response.status_code, response.json()
+
+    async def abing_web_search(
+        self,
+        query: str,
+        country_code: str = "us",
+        count: int = 10,
+        freshness: Freshness | str = Freshness.ANY_TIME,
+        market: str = "en-us",
+        responseFilter: ResponseFilter | str = ResponseFilter.WEBPAGES,
+        session=None,
+        deadline=None,
+    ):
+        params = self._bing_web_search_params(
+            query, country_code, count, freshness, market, responseFilter
+        )
+
+        deadline = as_deadline(deadline)
+        if self.cache is None:
+            return (await self._aget(params, session, deadline))[1]
+        return await self.cache.afetch(
+            self.url, params, lambda: self._aget(params, session, deadline), deadline
+        )
+
+    async def _aget(self, params, session, deadline):
+        # Perform the GET request on the pooled async session and return the status and JSON
+        deadline.check()
+        # aiohttp only accepts string query values, so encode them the way requests does
+        params = {key: str(value) for key, value in params.items()}
+        session = session or get_async_session()
+        timeout = aiohttp.ClientTimeout(total=deadline.remaining(self.REQUEST_TIMEOUT))
+        async with session.get(
+            self.url, headers=self.headers, params=params, timeout=timeout
+        ) as response:
+            return response.status, await response.json(content_type=None)
+
+    def _bing_web_search_params(
+        self, query, country_code, count, freshness, market, responseFilter
     ):
         # Configure the query parameters for Bing Web Search API
         params = {"q": query, "cc": country_code, "count": count, "mkt": market}
@@ -309,9 +423,7 @@ class BingWebSearchClient(SearchClientInterface):
         elif responseFilter and isinstance(responseFilter, str):
             params["responseFilter"] = responseFilter
 
-        # Perform the GET request to the Bing Search API and return the JSON response
-        response = requests.get(self.url, headers=self.headers, params=params)
-        return response.json()
+        return params
 
     def _contains_chinese(self, query: str):
         # Check if a string contains Chinese characters using a regular expression
@@ -357,20 +469,17 @@ class BingNewsSearchClient(SearchClientInterface):
         DATE = "Date"
         RELEVANCE = "Relevance"
 
-    def __init__(self, config_path=None):
-        # Load configuration from config.yaml file
-        if not config_path:
-            config_path = os.path.join(
-                os.path.dirname(__file__), "config", "config.yaml"
-            )
-        with open(config_path, "r") as file:
-            config = yaml.safe_load(file)
+    def __init__(self, config_path=None, cache=None):
+        # Load configuration from config.yaml, parsed once unless the file changes
+        config = ConfigRegistry.get_shared().get_config(config_path)
 
         # Set up the URL and headers for the Bing Web Search API
         self.url = config["azure_bing_search_endpoint"] + "/v7.0/news/search"
         self.headers = {
             "Ocp-Apim-Subscription-Key": config["azure_bing_search_api_key"]
         }
+        # Optional SearchCache shared by clients to skip repeated paid requests
+        self.cache = cache
 
     def bing_news_search(
         self,
@@ -380,6 +489,67 @@ class BingNewsSearchClient(SearchClientInterface):
         freshness: Freshness | str = Freshness.ANY_TIME,
         market="en-us",
         sort_by: str = "",
+        deadline=None,
+    ):
+        params = self._bing_news_search_params(
+            query, country_code, count, freshness, market, sort_by
+        )
+
+        deadline = as_deadline(deadline)
+        if self.cache is None:
+            return self._get(params, deadline)[1]
+        return self.cache.fetch(
+            self.url, params, lambda: self._get(params, deadline), deadline
+        )
+
+    def _get(self, params, deadline):
+        # Perform the GET request on the pooled session and return the status and JSON
+        # The request may not outlive the deadline of the query
+        deadline.check()
+        response = get_session().get(
+            self.url,
+            headers=self.headers,
+            params=params,
+            timeout=deadline.remaining(self.REQUEST_TIMEOUT),
+        )
+        return response.status_code, response.json()
+
+    async def abing_news_search(
+        self,
+        query: str,
+        country_code: str = "us",
+        count: int = 10,
+        freshness: Freshness | str = Freshness.ANY_TIME,
+        market="en-us",
+        sort_by: str = "",
+        session=None,
+        deadline=None,
+    ):
+        params = self._bing_news_search_params(
+            query, country_code, count, freshness, market, sort_by
+        )
+
+        deadline = as_deadline(deadline)
+        if self.cache is None:
+            return (await self._aget(params, session, deadline))[1]
+        return await self.cache.afetch(
+            self.url, params, lambda: self._aget(params, session, deadline), deadline
+        )
+
+    async def _aget(self, params, session, deadline):
+        # Perform the GET request on the pooled async session and return the status and JSON
+        deadline.check()
+        # aiohttp only accepts string query values, so encode them the way requests does
+        params = {key: str(value) for key, value in params.items()}
+        session = session or get_async_session()
+        timeout = aiohttp.ClientTimeout(total=deadline.remaining(self.REQUEST_TIMEOUT))
+        async with session.get(
+            self.url, headers=self.headers, params=params, timeout=timeout
+        ) as response:
+            return response.status, await response.json(content_type=None)
+
+    def _bing_news_search_params(
+        self, query, country_code, count, freshness, market, sort_by
     ):
         # Configure the query parameters for Bing Web Search API
         params = {
@@ -410,9 +580,7 @@ class BingNewsSearchClient(SearchClientInterface):
         elif sort_by and isinstance(sort_by, str):
             params["sort_by"] = sort_by
 
-        # Perform the GET request to the Bing Search API and return the JSON response
-        response = requests.get(self.url, headers=self.headers, params=params)
-        return response.json()
+        return params
 
     def _contains_chinese(self, query: str):
         # Check if a string contains Chinese characters using a regular expression
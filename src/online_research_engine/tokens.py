@@ -0,0 +1,33 @@
+import threading
+
+import tiktoken
+
+ENCODING = "cl100k_base"  # Tokenizer of the OpenAI chat and embedding models
+
+_encoding = None  # Process-wide tokenizer, False if it could not be loaded
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    """Returns the tiktoken encoding, or False if it could not be loaded."""
+    global _encoding
+    # Load the tokenizer once; tiktoken downloads it on first use
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                _encoding = tiktoken.get_encoding(ENCODING)
+            except Exception:
+                _encoding = False
+        return _encoding
+
+
+def count_tokens(text):
+    """
+    Returns the number of tokens of the text. Without the tokenizer, e.g. offline,
+    the number of UTF-8 bytes is returned instead.
+    """
+    encoding = get_encoding()
+    if encoding is False:
+        # Byte-level BPE never yields more tokens than bytes, so this is a safe bound
+        return len(text.encode("utf-8"))
+    return len(encoding.encode(text, disallowed_special=()))
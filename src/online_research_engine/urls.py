@@ -0,0 +1,72 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from and never change the page
+TRACKING_PARAMETERS = frozenset(
+    [
+        "fbclid",
+        "gclid",
+        "dclid",
+        "msclkid",
+        "yclid",
+        "igshid",
+        "mc_cid",
+        "mc_eid",
+        "_ga",
+        "_gl",
+        "ref_src",
+        "cmpid",
+        "ocid",
+    ]
+)
+TRACKING_PREFIXES = ("utm_",)
+
+
+def canonicalize_url(url):
+    """
+    Returns a canonical form of the URL for recognizing the same page behind different links.
+    http and https, a leading "www.", default ports, trailing slashes, fragments, tracking
+    parameters and the order of query parameters make no difference.
+    The result is meant as a key: pages are still crawled with their original link.
+    """
+    parts = urlsplit(url.strip())
+    try:
+        port = parts.port
+    except ValueError:
+        return url
+    host = parts.hostname
+    if not host:
+        return url
+
+    scheme = parts.scheme.lower()
+    if scheme in ("http", "https"):
+        scheme = "https"
+        if port in (80, 443):
+            port = None
+    if host.startswith("www."):
+        host = host[len("www.") :]
+    netloc = host if port is None else f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMETERS
+            and not key.lower().startswith(TRACKING_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def index_urls(links):
+    """
+    Returns a dict mapping each link to its position in the list, so that looking up a link
+    takes constant time. Like list.index, a link listed twice maps to its first position.
+    """
+    url_index = {}
+    for i, link in enumerate(links):
+        url_index.setdefault(link, i)
+    return url_index
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+class NumpyVectorIndex:
+    """
+    Exact nearest neighbour search over an in-process float32 matrix.
+    For the few hundred chunks of a single query this is cheaper than building, querying
+    and deleting a Chroma collection. Ranking uses squared L2 distance like Chroma's
+    default, with ties broken by insertion order.
+    """
+
+    def __init__(self, embedding_model):
+        self.embedding_model = embedding_model
+        self.documents = []
+        self.vectors = None  # float32 matrix with one row per document
+        self.squared_norms = None  # Squared L2 norm of each row
+
+    @classmethod
+    def from_documents(cls, documents, embedding_model):
+        index = cls(embedding_model)
+        index.add_documents(documents)
+        return index
+
+    def add_documents(self, documents, vectors=None):
+        """Embeds the documents, unless their vectors are given, and adds them to the index."""
+        documents = list(documents)
+        if not documents:
+            return
+        if vectors is None:
+            vectors = self.embedding_model.embed_documents(
+                [document.page_content for document in documents]
+            )
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        self.documents.extend(documents)
+        if self.vectors is None:
+            self.vectors = np.ascontiguousarray(vectors)
+        else:
+            self.vectors = np.concatenate([self.vectors, vectors])
+        self.squared_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+    def rank_by_vector(self, embedding, k=4):
+        """Returns the indices of the k documents closest to the embedding, closest first."""
+        if not self.documents or k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        # |v - q|^2 = |v|^2 - 2 v.q + |q|^2, where |q|^2 does not change the ranking
+        distances = self.squared_norms - 2 * (self.vectors @ query)
+
+        k = min(k, len(self.documents))
+        candidates = np.argpartition(distances, k - 1)[:k]
+        return candidates[np.lexsort((candidates, distances[candidates]))].tolist()
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        """Returns the k documents closest to the embedding, closest first."""
+        return [self.documents[i] for i in self.rank_by_vector(embedding, k)]
+
+    def similarity_search(self, query, k=4):
+        """Embeds the query and returns the k closest documents, closest first."""
+        return self.similarity_search_by_vector(
+            self.embedding_model.embed_query(query), k
+        )
@@ -1,15 +1,54 @@
+import asyncio
+import codecs
+import functools
 import re
+import threading
 
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
-from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
-from playwright.sync_api import sync_playwright
+from playwright.async_api import Error as PlaywrightError
+
+from .browser_pool import BrowserPool
+from .content_extractors import LxmlContentExtractor, SoupContentExtractor
+from .deadline import as_deadline
+from .http_sessions import get_async_session, get_session
 
 
 class WebScraper:
-    def __init__(self, user_agent="macOS"):
+    MAX_CONTENT_BYTES = 2 * 1024 * 1024  # Bodies are never read past this many bytes
+    CHUNK_SIZE = 64 * 1024  # Size of the chunks read from a streamed response
+    SNIFF_BYTES = 1024  # Bytes inspected for a BOM or <meta charset> before decoding
+    REQUEST_TIMEOUT = 8  # Seconds a download may take in total, body included
+    HTML_CONTENT_TYPES = (
+        "text/html",
+        "application/xhtml+xml",
+        "application/xml",
+        "text/xml",
+        "text/plain",
+    )
+
+    def __init__(
+        self,
+        user_agent="macOS",
+        max_content_bytes=MAX_CONTENT_BYTES,
+        extractor=None,
+        browser_pool=None,
+        cache=None,
+        politeness=None,
+    ):
         # Initialize the scraper with a user agent (default is 'macOS')
         self.headers = self._get_headers(user_agent)
+        self.max_content_bytes = max_content_bytes
+        # Main content extraction backend, the single-pass lxml extractor by default
+        self.extractor = extractor or LxmlContentExtractor()
+        # Optional BrowserPool that renders pages whose static HTML yields too little text
+        self.browser_pool = browser_pool
+        # Optional ContentCache of extracted main content shared across scrapers
+        self.cache = cache
+        # Optional PolitenessPolicy that paces requests per host, checks robots.txt
+        # and retries requests the server asked to back off
+        self.politeness = politeness
 
     def _get_headers(self, user_agent):
         # Private method to get headers for the request based on the specified user agent
@@ -32,22 +71,261 @@ class WebScraper:
                 "sec-ch-ua-platform": '"Windows"',
             }
 
-    def get_webpage_html(self, url):
+    def get_webpage_html(self, url, headers=None, deadline=None):
         # Fetch the HTML content of a webpage from a given URL
+        # Extra headers, such as conditional request validators, override the defaults
         response = requests.Response()  # Create an empty Response object
         if url.endswith(".pdf"):
             # Skip PDF files which are time consuming
             return response
 
+        # The download is abandoned after REQUEST_TIMEOUT seconds, or sooner at the deadline
+        request_deadline = as_deadline(deadline).limit(self.REQUEST_TIMEOUT)
+        if request_deadline.expired or not self._is_allowed(url, request_deadline):
+            return response
         try:
             # Attempt to get the webpage content with specified headers and timeout
-            response = requests.get(url, headers=self.headers, timeout=8)
-            response.encoding = "utf-8"
+            streamed_response = self._send_request(
+                url, {**self.headers, **(headers or {})}, request_deadline
+            )
         except requests.exceptions.Timeout:
             # Add timeout exception handling here
             return response
+        if streamed_response is None:
+            return response
+
+        with streamed_response:
+            if not self._is_acceptable_response(streamed_response.headers):
+                return response
+
+            # Socket timeouts only bound each read, so a watchdog interrupts a body that
+            # keeps trickling in when the request deadline passes
+            watchdog = threading.Timer(
+                request_deadline.remaining(), streamed_response.raw.shutdown
+            )
+            watchdog.daemon = True
+            watchdog.start()
+            body = bytearray()
+            try:
+                for chunk in streamed_response.iter_content(self.CHUNK_SIZE):
+                    body += chunk[: self.max_content_bytes - len(body)]
+                    if len(body) >= self.max_content_bytes:
+                        break
+            except requests.exceptions.ConnectionError:
+                # Read timeouts while streaming surface as connection errors
+                return response
+            finally:
+                watchdog.cancel()
+            if request_deadline.expired:
+                # The body was cut short by the watchdog
+                return response
+
+        streamed_response._content = bytes(body)
+        streamed_response.encoding = self._detect_encoding(
+            streamed_response.headers.get("Content-Type"), body[: self.SNIFF_BYTES]
+        )
+        return streamed_response
+
+    async def aget_webpage_html(self, url, session=None, deadline=None):
+        # Asynchronously fetch the HTML content of a webpage from a given URL
+        # NOTE: unlike get_webpage_html, this coroutine returns the response text
+        try:
+            return "".join(
+                [
+                    text
+                    async for text in self._aiter_webpage_text(url, session, deadline)
+                ]
+            )
+        except asyncio.TimeoutError:
+            return ""
+
+    async def _aiter_webpage_text(
+        self, url, session=None, deadline=None, headers=None, response_info=None
+    ):
+        # Yield the decoded text of the page piece by piece as the body arrives
+        # Extra headers override the defaults, like in get_webpage_html, and the status
+        # and headers of an accepted response are stored in the response_info dict
+        # Raises asyncio.TimeoutError if the download does not finish by the deadline
+        if url.endswith(".pdf"):
+            # Skip PDF files which are time consuming
+            return
+
+        request_deadline = as_deadline(deadline).limit(self.REQUEST_TIMEOUT)
+        if request_deadline.expired:
+            return
+        if self.politeness is not None:
+            # robots.txt is downloaded with the blocking session, so keep it off the loop
+            loop = asyncio.get_running_loop()
+            allowed = await loop.run_in_executor(
+                None, self._is_allowed, url, request_deadline
+            )
+            if not allowed:
+                return
+        session = session or get_async_session()
+        response = await self._asend_request(
+            session, url, {**self.headers, **(headers or {})}, request_deadline
+        )
+        if response is None:
+            return
+        async with response:
+            if not self._is_acceptable_response(response.headers):
+                return
+            if response_info is not None:
+                response_info.update(status=response.status, headers=response.headers)
+
+            # Decode each chunk as it arrives instead of after the whole body is in
+            content_type = response.headers.get("Content-Type")
+            head, decoder, size = b"", None, 0
+            async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                chunk = chunk[: self.max_content_bytes - size]
+                size += len(chunk)
+                if decoder is None:
+                    head += chunk
+                    if len(head) < self.SNIFF_BYTES and size < self.max_content_bytes:
+                        continue
+                    decoder = self._get_decoder(content_type, head)
+                    chunk = head
+                yield decoder.decode(chunk)
+                if size >= self.max_content_bytes:
+                    break
+
+        if decoder is None:
+            # The whole body was shorter than SNIFF_BYTES
+            decoder = self._get_decoder(content_type, head)
+            yield decoder.decode(head)
+        yield decoder.decode(b"", final=True)
 
-        return response
+    async def _aparse_webpage(self, url, session=None, deadline=None, headers=None):
+        # Download the page and parse its text as it arrives when the extractor can parse
+        # chunks, so parsing overlaps the download
+        # Returns the parsed document, whether any text was received and the status and
+        # headers of the response, which are empty if the download failed
+        loop = asyncio.get_running_loop()
+        parser = self.extractor.create_chunk_parser()
+        response_info = {}
+        chunks = self._aiter_webpage_text(
+            url, session, deadline, headers, response_info
+        )
+        if parser is None:
+            try:
+                html_string = "".join([text async for text in chunks])
+            except asyncio.TimeoutError:
+                html_string, response_info = "", {}
+            document = await loop.run_in_executor(
+                None, self.extractor.parse, html_string
+            )
+            return document, bool(html_string), response_info
+
+        # A chunk parser must stay on one thread, so chunks of at most CHUNK_SIZE are fed
+        # on the event loop while indexing the finished tree runs off it
+        received = False
+        try:
+            async for text in chunks:
+                if text:
+                    received = True
+                    parser.feed(text)
+        except asyncio.TimeoutError:
+            # Like aget_webpage_html, a download cut short counts as no content
+            parser, received = self.extractor.create_chunk_parser(), False
+            response_info = {}
+        tree = parser.close()
+        document = await loop.run_in_executor(None, self.extractor.finish_chunks, tree)
+        return document, received, response_info
+
+    def _is_allowed(self, url, request_deadline):
+        # Check the URL against the host's robots.txt when crawling politely
+        return self.politeness is None or self.politeness.allowed(
+            url, self.headers["User-Agent"], request_deadline
+        )
+
+    def _send_request(self, url, headers, request_deadline):
+        # Send the GET request, waiting for the host's turn and retrying when the server
+        # answers 429 or 503 under a politeness policy
+        # The body is streamed so that useless responses are dropped before download
+        # Returns None if the host's turn does not come before the deadline
+        attempt = 0
+        while True:
+            if self.politeness is not None and not self.politeness.wait_turn(
+                url, request_deadline
+            ):
+                return None
+            streamed_response = get_session().get(
+                url,
+                headers=headers,
+                timeout=request_deadline.remaining(),
+                stream=True,
+            )
+            delay = None
+            if self.politeness is not None:
+                delay = self.politeness.retry_delay(
+                    url,
+                    streamed_response.status_code,
+                    streamed_response.headers,
+                    attempt,
+                )
+            if delay is None:
+                return streamed_response
+            streamed_response.close()
+            attempt += 1
+
+    async def _asend_request(self, session, url, headers, request_deadline):
+        # Asynchronous counterpart of _send_request
+        attempt = 0
+        while True:
+            if self.politeness is not None and not await self.politeness.await_turn(
+                url, request_deadline
+            ):
+                return None
+            timeout = aiohttp.ClientTimeout(total=request_deadline.remaining())
+            response = await session.get(url, headers=headers, timeout=timeout)
+            delay = None
+            if self.politeness is not None:
+                delay = self.politeness.retry_delay(
+                    url, response.status, response.headers, attempt
+                )
+            if delay is None:
+                return response
+            response.release()
+            attempt += 1
+
+    def _is_acceptable_response(self, headers):
+        # Reject responses that are not HTML-like or declare a body over the size cap
+        content_type = headers.get("Content-Type", "")
+        mime_type = content_type.split(";")[0].strip().lower()
+        if mime_type and mime_type not in self.HTML_CONTENT_TYPES:
+            return False
+
+        content_length = headers.get("Content-Length", "")
+        return not (
+            content_length.isdigit() and int(content_length) > self.max_content_bytes
+        )
+
+    def _detect_encoding(self, content_type, head):
+        # Pick the charset from a BOM, the Content-Type header or a <meta> tag, else UTF-8
+        # A BOM overrides the header and the <meta> tag, as in the WHATWG sniffing order
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+        candidates = []
+        match = re.search(r"charset=[\"']?([\w.:-]+)", content_type or "", re.I)
+        if match:
+            candidates.append(match.group(1))
+        match = re.search(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", bytes(head), re.I)
+        if match:
+            candidates.append(match.group(1).decode("ascii"))
+
+        for candidate in candidates:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+        return "utf-8"
+
+    def _get_decoder(self, content_type, head):
+        # Create an incremental decoder for the detected charset
+        encoding = self._detect_encoding(content_type, head)
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
 
     def convert_html_to_soup(self, html):
         # Convert the HTML string to a BeautifulSoup object for parsing
@@ -56,43 +334,216 @@ class WebScraper:
 
     def extract_main_content(self, html_soup, rule=0):
         # Extract the main content from a BeautifulSoup object
-        main_content = []
-        tag_rule = re.compile("^(h[1-6]|p|div)" if rule == 1 else "^(h[1-6]|p)")
-        # Iterate through specified tags and collect their text
-        for tag in html_soup.find_all(tag_rule):
-            tag_text = tag.get_text().strip()
-            if tag_text and len(tag_text.split()) > 10:
-                main_content.append(tag_text)
-        return "\n".join(main_content).strip()
+        return SoupContentExtractor().extract_main_content(html_soup, rule)
 
-    def scrape_url(self, url, rule=0):
+    def scrape_url(self, url, rule=0, deadline=None):
         # Public method to scrape a URL and extract its main content
-        webpage_html = self.get_webpage_html(url)
-        soup = self.convert_html_to_soup(webpage_html)
-        main_content = self.extract_main_content(soup, rule)
+        def scrape(webpage_html):
+            return self._extract_from_html_string(webpage_html.text, rule)
+
+        return self._scrape_with_cache(url, f"rule={rule}", scrape, deadline)
+
+    def scrape_url_with_fallback(
+        self, url, min_length=800, fallback_on_empty=True, deadline=None
+    ):
+        """
+        Scrapes a URL with rule 0 and, if the content is shorter than min_length, re-extracts it
+        with rule 1 from the same parsed page instead of downloading and parsing it again.
+        Empty content only triggers the fallback when fallback_on_empty is set.
+        With a browser_pool, pages that still come up short are rendered in the browser.
+        With a deadline, the download and the rendering stop when it passes.
+        """
+        deadline = as_deadline(deadline)
+
+        def scrape(webpage_html):
+            html_string = webpage_html.text
+            main_content = self._extract_with_fallback_from_html_string(
+                html_string, min_length, fallback_on_empty
+            )
+            if (
+                self._needs_browser_fallback(html_string, main_content, min_length)
+                and not deadline.expired
+            ):
+                rendered_html = self.browser_pool.render(
+                    url, timeout=deadline.remaining()
+                )
+                rendered_content = self._extract_with_fallback_from_html_string(
+                    rendered_html, min_length, fallback_on_empty
+                )
+                main_content = max(main_content, rendered_content, key=len)
+            return main_content
+
+        variant = f"fallback={min_length},{int(fallback_on_empty)}"
+        return self._scrape_with_cache(url, variant, scrape, deadline)
+
+    def _scrape_with_cache(self, url, variant, scrape, deadline=None):
+        # Download and scrape the page unless the cache holds its content for this variant
+        if self.cache is None:
+            return scrape(self.get_webpage_html(url, deadline=deadline))
+
+        key = f"{variant} {url}"
+        cached = self.cache.get(key)
+        if cached is not None and cached.fresh:
+            return cached.content
+
+        # Revalidate expired entries with a conditional request
+        validators = self._get_validators(cached)
+        webpage_html = self.get_webpage_html(url, validators, deadline)
+        if validators and webpage_html.status_code == 304:
+            self.cache.refresh(key, url)
+            return cached.content
+
+        main_content = scrape(webpage_html)
+        # Failed downloads come back as empty responses without a status and are not cached
+        if webpage_html.status_code == 200:
+            self.cache.put(
+                key,
+                url,
+                main_content,
+                etag=webpage_html.headers.get("ETag"),
+                last_modified=webpage_html.headers.get("Last-Modified"),
+            )
+        return main_content
+
+    async def _ascrape_with_cache(
+        self, url, variant, scrape, session=None, deadline=None
+    ):
+        # Asynchronous counterpart of _scrape_with_cache, sharing its cache entries
+        # scrape is a coroutine function of the parsed page and whether any text arrived
+        if self.cache is None:
+            document, received, _ = await self._aparse_webpage(url, session, deadline)
+            return await scrape(document, received)
+
+        # SQLite calls block, so they run off the event loop
+        loop = asyncio.get_running_loop()
+        key = f"{variant} {url}"
+        cached = await loop.run_in_executor(None, self.cache.get, key)
+        if cached is not None and cached.fresh:
+            return cached.content
+
+        validators = self._get_validators(cached)
+        document, received, response_info = await self._aparse_webpage(
+            url, session, deadline, validators
+        )
+        status = response_info.get("status")
+        if validators and status == 304:
+            await loop.run_in_executor(None, self.cache.refresh, key, url)
+            return cached.content
+
+        main_content = await scrape(document, received)
+        if status == 200:
+            await loop.run_in_executor(
+                None,
+                functools.partial(
+                    self.cache.put,
+                    key,
+                    url,
+                    main_content,
+                    etag=response_info["headers"].get("ETag"),
+                    last_modified=response_info["headers"].get("Last-Modified"),
+                ),
+            )
         return main_content
 
+    def _get_validators(self, cached):
+        # Conditional request headers that revalidate an expired cache entry
+        validators = {}
+        if cached is not None and cached.etag:
+            validators["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            validators["If-Modified-Since"] = cached.last_modified
+        return validators
+
+    def _needs_browser_fallback(self, downloaded, main_content, min_length):
+        # Only render pages that were downloaded as HTML but yielded too little text
+        # downloaded is the page's HTML string, or whether any of it was received
+        return (
+            self.browser_pool is not None
+            and bool(downloaded)
+            and len(main_content) < min_length
+        )
+
+    def _extract_with_fallback(self, document, min_length, fallback_on_empty):
+        # Extract with rule 0 first and extend the rules on the same document if too short
+        main_content = self.extractor.extract_main_content(document, 0)
+        if len(main_content) < min_length and (main_content or fallback_on_empty):
+            main_content = self.extractor.extract_main_content(document, 1)
+        return main_content
+
+    def _extract_from_html_string(self, html_string, rule):
+        # Parse an HTML string and extract its main content
+        document = self.extractor.parse(html_string)
+        return self.extractor.extract_main_content(document, rule)
+
+    def _extract_with_fallback_from_html_string(
+        self, html_string, min_length, fallback_on_empty
+    ):
+        # Parse an HTML string once and extract its main content with the rule fallback
+        document = self.extractor.parse(html_string)
+        return self._extract_with_fallback(document, min_length, fallback_on_empty)
+
+    async def ascrape_url(self, url, rule=0, session=None, deadline=None):
+        # Asynchronously scrape a URL and extract its main content
+        async def scrape(document, received):
+            # Extraction is CPU bound, so keep it off the event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, self.extractor.extract_main_content, document, rule
+            )
+
+        return await self._ascrape_with_cache(
+            url, f"rule={rule}", scrape, session, deadline
+        )
+
+    async def ascrape_url_with_fallback(
+        self, url, min_length=800, fallback_on_empty=True, session=None, deadline=None
+    ):
+        # Asynchronous counterpart of scrape_url_with_fallback
+        deadline = as_deadline(deadline)
+
+        async def scrape(document, received):
+            loop = asyncio.get_running_loop()
+            main_content = await loop.run_in_executor(
+                None,
+                self._extract_with_fallback,
+                document,
+                min_length,
+                fallback_on_empty,
+            )
+            if (
+                self._needs_browser_fallback(received, main_content, min_length)
+                and not deadline.expired
+            ):
+                try:
+                    rendered_html = await asyncio.wait_for(
+                        self.browser_pool.arender(url), deadline.remaining()
+                    )
+                except (asyncio.TimeoutError, PlaywrightError):
+                    # Keep the static content when the render fails or takes too long
+                    rendered_html = ""
+                rendered_content = await loop.run_in_executor(
+                    None,
+                    self._extract_with_fallback_from_html_string,
+                    rendered_html,
+                    min_length,
+                    fallback_on_empty,
+                )
+                main_content = max(main_content, rendered_content, key=len)
+            return main_content
+
+        variant = f"fallback={min_length},{int(fallback_on_empty)}"
+        return await self._ascrape_with_cache(url, variant, scrape, session, deadline)
+
 
 class PlaywrightWebScraper:
-    def __init__(self):
-        return
+    def __init__(self, browser_pool=None):
+        # Pages are rendered in a long-lived browser shared by all scrapers unless one is given
+        self.browser_pool = browser_pool or BrowserPool.get_shared()
 
     def get_webpage_html(self, url):
         # NOTE: unlike WebScraper.get_webpage_html,
         # this function returns the response text, not the response object itself
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            try:
-                response = page.goto(url)
-                response.finished()
-            except PlaywrightTimeoutError:
-                return ""
-
-            page_content = page.content()
-            browser.close()
-
-            return page_content
+        return self.browser_pool.render(url)
 
     def convert_html_to_soup(self, html):
         # Convert the HTML string to a BeautifulSoup object for parsing
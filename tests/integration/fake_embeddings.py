@@ -0,0 +1,72 @@
+import hashlib
+import threading
+import time
+
+from langchain.schema.embeddings import Embeddings
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    A deterministic stand-in for an embedding API, so tests never need a key or a network.
+    Texts sharing words get similar vectors, and every call and embedded text is recorded.
+    """
+
+    def __init__(self, size=64, model="fake-embedding"):
+        self.size = size
+        self.model = model
+        self.calls = []  # Texts of every embed_documents call
+        self.query_calls = []  # Text of every embed_query call
+        self._lock = threading.Lock()
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in text.lower().split():
+            digest = hashlib.sha256(word.encode("utf-8")).digest()
+            vector[digest[0] % self.size] += 1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    @property
+    def embedded_texts(self):
+        return [text for call in self.calls for text in call]
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        with self._lock:
+            self.query_calls.append(text)
+        return self._embed(text)
+
+
+class SlowEmbeddings(FakeEmbeddings):
+    # Fake model with API-like latency that records how many requests overlap
+    def __init__(self, delay=0.1, failures=0):
+        super().__init__()
+        self.delay = delay
+        self.failures = failures
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._counter_lock = threading.Lock()
+
+    def _request(self):
+        with self._counter_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failing = self.failures > 0
+            self.failures -= failing
+        time.sleep(self.delay)
+        with self._counter_lock:
+            self.in_flight -= 1
+        if failing:
+            raise ConnectionError("rate limited")
+
+    def embed_documents(self, texts):
+        self._request()
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self._request()
+        return super().embed_query(text)
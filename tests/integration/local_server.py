@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import yaml
+
+from online_research_engine.config_registry import DEFAULT_CONFIG_PATH
+
+
+def article_html(title, paragraphs=6, charset="utf-8"):
+    # Build a page whose paragraphs are long enough to count as main content
+    sentence = (
+        f"{title} is discussed in this paragraph with enough words to pass the filter."
+    )
+    body = "".join(f"<p>{sentence} Paragraph {i}.</p>" for i in range(paragraphs))
+    return (
+        f'<html><head><meta charset="{charset}"><title>{title}</title></head>'
+        f"<body><h1>{title}</h1><div>{body}</div></body></html>"
+    )
+
+
+class LocalHTTPServer:
+    """
+    A stand-in HTTP server on localhost, so tests never touch the internet.
+    Routes map a path to (status, headers, body) or to a callable returning that tuple.
+    The body is bytes, or an iterable of bytes sent one piece at a time, in which case the
+    headers must set the Content-Length or omit it with None.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []  # (method, path, query, headers) of every request received
+        self.connections = 0  # Number of TCP connections accepted
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._config_dir = None  # Temporary directory of the written configurations
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._config_dir is not None:
+            self._config_dir.cleanup()
+
+    def url(self, path=""):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def write_config(self):
+        """
+        Writes a copy of the packaged configuration that points the search clients at this
+        server, with empty API keys, and returns its path. It is removed with the server.
+        """
+        if self._config_dir is None:
+            self._config_dir = tempfile.TemporaryDirectory()
+        with open(DEFAULT_CONFIG_PATH) as file:
+            config = yaml.safe_load(file)
+        config.update(
+            serper_api_key="",
+            azure_bing_search_api_key="",
+            azure_bing_search_endpoint=self.url(),
+        )
+        config_path = os.path.join(self._config_dir.name, "config.yaml")
+        with open(config_path, "w") as file:
+            yaml.safe_dump(config, file)
+        return config_path
+
+    def add_page(self, path, html, content_type="text/html; charset=utf-8"):
+        body = html.encode("utf-8") if isinstance(html, str) else html
+        self.routes[path] = (200, {"Content-Type": content_type}, body)
+
+    def add_json(self, path, payload):
+        if callable(payload):
+            self.routes[path] = lambda request: (
+                200,
+                {"Content-Type": "application/json"},
+                json.dumps(payload(request)).encode("utf-8"),
+            )
+        else:
+            self.add_page(path, json.dumps(payload), "application/json")
+
+    def add_search_services(self, links):
+        # Serve Serper and Bing style responses listing the given links
+        def serper(request):
+            query = json.loads(request["body"] or b"{}").get("q", "")
+            return {
+                "searchParameters": {"q": query},
+                "organic": [
+                    {"title": f"Title {i}", "link": link, "snippet": f"Snippet {i}"}
+                    for i, link in enumerate(links)
+                ],
+            }
+
+        def bing_web(request):
+            return {
+                "queryContext": {"originalQuery": request["query"].get("q", [""])[0]},
+                "webPages": {
+                    "value": [
+                        {"name": f"Title {i}", "url": link, "snippet": f"Snippet {i}"}
+                        for i, link in enumerate(links)
+                    ]
+                },
+            }
+
+        def bing_news(request):
+            return {
+                "queryContext": {"originalQuery": request["query"].get("q", [""])[0]},
+                "value": [
+                    {"name": f"News {i}", "url": link, "description": f"Story {i}"}
+                    for i, link in enumerate(links)
+                ],
+            }
+
+        self.add_json("/search", serper)
+        self.add_json("/v7.0/search", bing_web)
+        self.add_json("/v7.0/news/search", bing_news)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, method):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                request = {
+                    "method": method,
+                    "path": parts.path,
+                    "query": parse_qs(parts.query),
+                    "headers": dict(self.headers),
+                    "body": self.rfile.read(length) if length else b"",
+                }
+                with server._lock:
+                    server.requests.append(request)
+
+                route = server.routes.get(parts.path)
+                if route is None:
+                    route = (404, {"Content-Type": "text/plain"}, b"not found")
+                elif callable(route):
+                    route = route(request)
+                status, headers, body = route
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    # A None value omits the header, e.g. to hide the Content-Length
+                    if value is not None:
+                        self.send_header(name, value)
+                if "Content-Length" not in headers:
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if method == "HEAD":
+                    return
+                if isinstance(body, bytes):
+                    self.wfile.write(body)
+                    return
+                # An iterable body is sent piece by piece, e.g. to trickle it in
+                try:
+                    for piece in body:
+                        self.wfile.write(piece)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def do_HEAD(self):
+                self._respond("HEAD")
+
+        return Handler
@@ -0,0 +1,111 @@
+import asyncio
+import time
+import unittest
+
+from online_research_engine.answer_cache import AnswerCache
+from online_research_engine.search_services import SerperClient
+
+from .fake_embeddings import FakeEmbeddings
+
+
+class TestAnswerCache(unittest.TestCase):
+    query = "what happened to silicon valley bank in march"
+    paraphrase = "what happened to the silicon valley bank in march"
+    cards = [{"url": "https://a.example", "sent": "The bank failed"}]
+
+    def setUp(self):
+        self.embeddings = FakeEmbeddings()
+        self.cache = AnswerCache(self.embeddings, threshold=0.8)
+        self.calls = 0
+
+    def _compute(self):
+        self.calls += 1
+        time.sleep(0.05)
+        return f"Answer {self.calls}", self.cards
+
+    def test_paraphrases_share_an_answer(self):
+        self.assertEqual(
+            self.cache.get_or_compute(self.query, self._compute, language="en-us"),
+            ("Answer 1", self.cards),
+        )
+        self.assertEqual(
+            self.cache.get_or_compute(self.paraphrase, self._compute, language="en-us"),
+            ("Answer 1", self.cards),
+        )
+        self.assertEqual(self.calls, 1)
+
+        cached = self.cache.lookup(self.paraphrase, language="en-us")
+        self.assertEqual(cached.query, self.query)
+        self.assertGreaterEqual(cached.similarity, 0.8)
+        self.assertLess(cached.age, 1)
+
+        # Unrelated queries and other settings do not reuse the answer
+        self.cache.get_or_compute(
+            "best pizza in naples", self._compute, language="en-us"
+        )
+        self.cache.get_or_compute(self.query, self._compute, language="zh-cn")
+        self.assertEqual(self.calls, 3)
+
+    def test_stats(self):
+        self.cache.get_or_compute(self.query, self._compute)
+        self.cache.get_or_compute(self.paraphrase, self._compute)
+        self.cache.get_or_compute(self.paraphrase, self._compute)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["stores"], 1)
+        self.assertEqual(stats["entries"], 1)
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+        self.assertGreaterEqual(stats["saved_seconds"], 0.1)
+
+    def test_recent_date_ranges_expire_sooner(self):
+        cache = AnswerCache(
+            self.embeddings,
+            threshold=0.8,
+            freshness_ttls={SerperClient.DateRanges.PAST_HOUR.value: 0.1},
+        )
+        self.assertEqual(cache.get_ttl(SerperClient.DateRanges.PAST_HOUR), 0.1)
+        self.assertEqual(cache.get_ttl("qdr:d"), 30 * 60)
+        self.assertEqual(cache.get_ttl(), AnswerCache.DEFAULT_TTL)
+
+        past_hour = SerperClient.DateRanges.PAST_HOUR
+        cache.get_or_compute(self.query, self._compute, freshness=past_hour)
+        cache.get_or_compute(self.query, self._compute)
+        # The enum member and its value are the same date range
+        cache.get_or_compute(self.query, self._compute, freshness="qdr:h")
+        self.assertEqual(self.calls, 2)
+
+        time.sleep(0.15)
+        self.assertEqual(
+            cache.get_or_compute(self.query, self._compute, freshness=past_hour),
+            ("Answer 3", self.cards),
+        )
+        self.assertEqual(cache.get_or_compute(self.query, self._compute)[0], "Answer 2")
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_oldest_answers_are_evicted(self):
+        cache = AnswerCache(self.embeddings, threshold=0.8, max_entries=2)
+        for query in ["first query about apples", "second query on pears", "third"]:
+            cache.store(query, query.upper())
+        self.assertIsNone(cache.lookup("first query about apples"))
+        self.assertEqual(cache.lookup("third").answer, "THIRD")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_aget_or_compute(self):
+        async def acompute():
+            return self._compute()
+
+        async def run():
+            first = await self.cache.aget_or_compute(self.query, acompute)
+            second = await self.cache.aget_or_compute(self.paraphrase, acompute)
+            return first, second
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import time
+import unittest
+
+from langchain.chat_models.fake import FakeListChatModel
+
+from online_research_engine.answer_cache import AnswerCache
+from online_research_engine.batch_research import BatchResearcher
+from online_research_engine.deadline import Deadline
+from online_research_engine.fetch_web_content import WebContentFetcher
+
+from .fake_embeddings import FakeEmbeddings, SlowEmbeddings
+from .local_server import LocalHTTPServer, article_html
+
+
+class TestBatchResearcher(unittest.TestCase):
+    """Runs batches against a stand-in HTTP server, with fake embeddings and LLM."""
+
+    # Answers cite an https link listed for every query, which the locator recognises
+    CITED_LINK = "https://docs.invalid/guide"
+    ANSWER = (
+        "\nLocal pages discuss the query [1].\n"
+        "\nReferences:\n"
+        f"[1] URL: {CITED_LINK}\n"
+        "    Quoted sentence: The guide discusses the query."
+    )
+
+    def setUp(self):
+        self.server = LocalHTTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+
+        # Every query finds its own page and a page shared by all queries
+        self.server.add_page("/shared", article_html("Shared"))
+        for name in ["alpha", "beta", "gamma"]:
+            self.server.add_page(f"/{name}", article_html(name.title()))
+
+        def bing_web(request):
+            query = request["query"].get("q", [""])[0]
+            links = [
+                self.server.url(f"/{query.split()[0]}"),
+                self.server.url("/shared?utm_source=search"),
+                self.CITED_LINK,
+            ]
+            return {
+                "queryContext": {"originalQuery": query},
+                "webPages": {
+                    "value": [
+                        {"name": f"Title {i}", "url": link, "snippet": f"Snippet {i}"}
+                        for i, link in enumerate(links)
+                    ]
+                },
+            }
+
+        self.server.add_json("/v7.0/search", bing_web)
+
+        self.config_path = self.server.write_config()
+
+        self.embeddings = FakeEmbeddings()
+        self.llm = FakeListChatModel(responses=[self.ANSWER])
+
+    def _make_researcher(self, **kwargs):
+        return BatchResearcher(
+            self.llm,
+            self.embeddings,
+            search_services=[WebContentFetcher.SearchServices.BING_WEB_SEARCH],
+            config_path=self.config_path,
+            **kwargs,
+        )
+
+    def _requests_to(self, path):
+        return [request for request in self.server.requests if request["path"] == path]
+
+    def test_pages_are_shared_across_queries(self):
+        queries = ["alpha news", "beta news", "gamma news", "alpha news"]
+        batch = self._make_researcher(llm_concurrency=2).run(queries)
+
+        # Results come back per query, in order, and a repeated query is answered once
+        self.assertEqual([result.query for result in batch], queries)
+        self.assertIs(batch.results[0], batch.results[3])
+        for result in batch:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.answer, self.ANSWER)
+            self.assertEqual(result.reference_cards[0]["url"], self.CITED_LINK)
+            self.assertEqual(result.reference_cards[0]["titles"], "Title 2")
+            self.assertFalse(result.cached)
+
+        # The shared page is crawled once, and embedded once, for all three queries
+        self.assertEqual(len(self._requests_to("/v7.0/search")), 3)
+        self.assertEqual(len(self._requests_to("/shared")), 1)
+        shared_chunks = [
+            text for text in self.embeddings.embedded_texts if "Shared is" in text
+        ]
+        self.assertEqual(len(shared_chunks), len(set(shared_chunks)))
+
+        # Each query keeps the links of its own search
+        self.assertEqual(
+            batch.results[1].services_response["links"][0], self.server.url("/beta")
+        )
+
+        stats = batch.stats
+        self.assertEqual(stats["queries"], 4)
+        self.assertEqual(stats["unique_queries"], 3)
+        self.assertEqual(stats["answered"], 3)
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(stats["links"], 9)
+        self.assertEqual(stats["unique_pages"], 5)
+        self.assertEqual(stats["crawled_pages"], 4)
+        self.assertGreater(stats["queries_per_second"], 0)
+
+    def test_queries_are_embedded_like_single_queries(self):
+        queries = ["alpha news", "beta news"]
+        self._make_researcher().run(queries)
+
+        # Queries go through embed_query, as in retrieve_embeddings and the AnswerCache
+        self.assertCountEqual(self.embeddings.query_calls, queries)
+        self.assertFalse(set(queries) & set(self.embeddings.embedded_texts))
+
+    def test_query_embedding_is_bounded_by_the_deadline(self):
+        researcher = BatchResearcher(self.llm, SlowEmbeddings(delay=2))
+        start = time.monotonic()
+        self.assertIsNone(researcher.retriever.embed_queries(["slow"], Deadline(0.5)))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_retrieval_is_per_query(self):
+        researcher = self._make_researcher()
+        contents = {
+            self.server.url("/alpha"): "alpha " * 50,
+            self.server.url("/shared"): "shared " * 50,
+        }
+        documents = researcher.retriever.retrieve_embeddings_batch(
+            contents,
+            [
+                [self.server.url("/alpha"), self.server.url("/shared?utm_source=x")],
+                [self.server.url("/beta")],
+            ],
+            ["alpha", "beta"],
+        )
+        self.assertEqual(
+            {document.metadata["url"] for document in documents[0]},
+            {self.server.url("/alpha"), self.server.url("/shared?utm_source=x")},
+        )
+        self.assertEqual(documents[1], [])
+
+    def test_failed_searches_are_reported(self):
+        self.server.routes["/v7.0/search"] = (500, {}, b"")
+        batch = self._make_researcher().run(["alpha news"])
+        self.assertIsNotNone(batch.results[0].error)
+        self.assertIsNone(batch.results[0].answer)
+        self.assertEqual(batch.stats["failed"], 1)
+
+    def test_unlocated_references_keep_the_answer(self):
+        # The LLM cites a URL that none of the searches returned
+        answer = self.ANSWER.replace(self.CITED_LINK, "https://elsewhere.invalid/")
+        self.llm = FakeListChatModel(responses=[answer])
+        answer_cache = AnswerCache(self.embeddings)
+        batch = self._make_researcher(answer_cache=answer_cache).run(["alpha news"])
+
+        result = batch.results[0]
+        self.assertEqual(result.answer, answer)
+        self.assertIsNone(result.error)
+        self.assertIsNone(result.reference_cards)
+        self.assertTrue(result.reference_error.startswith("KeyError"))
+        self.assertEqual(batch.stats["answered"], 1)
+        self.assertEqual(answer_cache.stats()["stores"], 1)
+
+    def test_answer_cache_skips_repeated_queries(self):
+        answer_cache = AnswerCache(self.embeddings)
+        researcher = self._make_researcher(answer_cache=answer_cache)
+        researcher.run(["alpha news", "beta news"])
+        searches = len(self._requests_to("/v7.0/search"))
+
+        batch = researcher.run(["alpha news", "gamma news"])
+        self.assertTrue(batch.results[0].cached)
+        self.assertEqual(batch.results[0].answer, self.ANSWER)
+        self.assertFalse(batch.results[1].cached)
+        self.assertEqual(batch.stats["cached"], 1)
+        self.assertEqual(len(self._requests_to("/v7.0/search")), searches + 1)
+        self.assertEqual(answer_cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import time
+import unittest
+
+from online_research_engine.batched_embeddings import BatchedEmbeddings
+from online_research_engine.retrieval import EmbeddingRetriever
+
+from .fake_embeddings import FakeEmbeddings, SlowEmbeddings
+
+
+def count_words(text):
+    return len(text.split())
+
+
+class TestBatchedEmbeddings(unittest.TestCase):
+    def test_make_batches(self):
+        embeddings = BatchedEmbeddings(
+            FakeEmbeddings(),
+            max_batch_tokens=5,
+            max_batch_size=3,
+            count_tokens=count_words,
+        )
+        texts = ["a b", "c d", "e", "f g h i j k", "l", "m", "n", "o"]
+        self.assertEqual(
+            embeddings.make_batches(texts),
+            [["a b", "c d", "e"], ["f g h i j k"], ["l", "m", "n"], ["o"]],
+        )
+        self.assertEqual(embeddings.make_batches([]), [])
+
+    def test_default_token_count_is_an_upper_bound(self):
+        embeddings = BatchedEmbeddings(FakeEmbeddings())
+        for text in ("hello world", "日本語のテキスト", ""):
+            self.assertLessEqual(
+                embeddings.count_tokens(text), len(text.encode("utf-8"))
+            )
+
+    def test_concurrent_batches_keep_order(self):
+        model = SlowEmbeddings()
+        embeddings = BatchedEmbeddings(
+            model, max_batch_tokens=2, max_concurrency=3, count_tokens=count_words
+        )
+        texts = [f"word{i} text" for i in range(9)]
+
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents(texts)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(vectors, FakeEmbeddings().embed_documents(texts))
+        self.assertEqual(len(model.calls), 9)
+        self.assertEqual(model.max_in_flight, 3)
+        self.assertLess(elapsed, 0.6)
+
+    def test_retries_failed_batches(self):
+        model = SlowEmbeddings(delay=0, failures=2)
+        embeddings = BatchedEmbeddings(model, max_retries=2, count_tokens=count_words)
+        embeddings.RETRY_DELAY = 0
+        self.assertEqual(
+            embeddings.embed_documents(["some text"]),
+            FakeEmbeddings().embed_documents(["some text"]),
+        )
+
+        model.failures = 3
+        with self.assertRaises(ConnectionError):
+            embeddings.embed_query("some text")
+
+    def test_retriever_embeds_query_in_parallel(self):
+        model = SlowEmbeddings(delay=0.3)
+        retriever = EmbeddingRetriever(
+            BatchedEmbeddings(model, count_tokens=count_words), backend="numpy"
+        )
+        contents = [f"page {i} " + "words about the topic " * 20 for i in range(3)]
+        links = [f"https://{i}.example" for i in range(3)]
+
+        start = time.perf_counter()
+        documents = retriever.retrieve_embeddings(contents, links, "topic")
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(documents), 3)
+        self.assertEqual(model.max_in_flight, 2)
+        self.assertLess(elapsed, 0.55)
+
+
+if __name__ == "__main__":
+    unittest.main()
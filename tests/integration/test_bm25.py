@@ -0,0 +1,81 @@
+import math
+import unittest
+
+from online_research_engine.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+from online_research_engine.retrieval import EmbeddingRetriever
+
+from .fake_embeddings import FakeEmbeddings
+
+
+class TestBM25(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("Silicon Valley Bank, 硅谷银行 v2.0"),
+            ["silicon", "valley", "bank", "硅", "谷", "银", "行", "v2", "0"],
+        )
+
+    def test_scores(self):
+        texts = ["apple banana", "apple apple cherry", "durian"]
+        index = BM25Index(texts, k1=1.2, b=0.75)
+        average_length = 2.0
+
+        def expected(frequency, length, document_frequency):
+            idf = math.log(
+                1 + (3 - document_frequency + 0.5) / (document_frequency + 0.5)
+            )
+            norm = 1 - 0.75 + 0.75 * length / average_length
+            return idf * frequency * 2.2 / (frequency + 1.2 * norm)
+
+        scores = index.scores("apple cherry apple")
+        self.assertAlmostEqual(scores[0], expected(1, 2, 2))
+        self.assertAlmostEqual(scores[1], expected(2, 3, 2) + expected(1, 3, 1))
+        self.assertEqual(scores[2], 0.0)
+        self.assertEqual(index.rank("apple cherry"), [1, 0, 2])
+        self.assertEqual(index.rank("unknown", n=2), [0, 1])
+        self.assertEqual(BM25Index([]).rank("apple"), [])
+
+    def test_reciprocal_rank_fusion(self):
+        self.assertEqual(
+            reciprocal_rank_fusion([["a", "b", "c"], ["c", "b", "d"]]),
+            ["c", "b", "a", "d"],
+        )
+        self.assertEqual(reciprocal_rank_fusion([["a", "b"], ["b", "a"]]), ["a", "b"])
+
+
+class TestHybridRetrieval(unittest.TestCase):
+    def test_only_prefiltered_chunks_are_embedded(self):
+        topics = ["apples", "bananas", "cherries", "dates", "elderberries"]
+        contents = [" ".join([f"{topic} grow on trees."] * 200) for topic in topics]
+        links = [f"https://{topic}.example" for topic in topics]
+
+        model = FakeEmbeddings()
+        retriever = EmbeddingRetriever(model, hybrid=True, prefilter_top_n=4)
+        documents = retriever.retrieve_embeddings(contents, links, "cherries")
+
+        self.assertEqual(len(model.embedded_texts), 4)
+        self.assertEqual(len(documents), 4)
+        self.assertEqual(
+            {document.metadata["url"] for document in documents},
+            {"https://cherries.example"},
+        )
+        self.assertEqual(retriever.retrieve_embeddings([], [], "cherries"), [])
+
+        with self.assertRaises(ValueError):
+            EmbeddingRetriever(model, hybrid=True, persist_directory="index")
+
+    def test_hybrid_is_opt_in(self):
+        # The prefilter gives up recall, so exhaustive dense retrieval stays the default
+        model = FakeEmbeddings()
+        contents = [" ".join([f"apples grow on tree {i}."] * 200) for i in range(15)]
+        links = [f"https://apples.example/{i}" for i in range(15)]
+        retriever = EmbeddingRetriever(model, backend="numpy")
+        self.assertFalse(retriever.hybrid)
+
+        retriever.retrieve_embeddings(contents, links, "apples")
+        self.assertGreater(
+            len(model.embedded_texts), EmbeddingRetriever.PREFILTER_TOP_N
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from playwright.async_api import Error as PlaywrightError
+
+from online_research_engine.browser_pool import BrowserPool
+
+from .local_server import LocalHTTPServer, article_html
+
+
+class TestBrowserPool(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalHTTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.server.add_page("/article", article_html("Rendered article"))
+        self.server.add_page("/image.png", b"\x89PNG", "image/png")
+
+        self.pool = BrowserPool(max_pages=2, navigation_timeout=10)
+        self.addCleanup(self.pool.close)
+        try:
+            self.pool.submit("about:blank").result()
+        except PlaywrightError as e:
+            self.skipTest(f"Chromium is not available: {e}")
+
+    def test_render_from_many_threads(self):
+        urls = [self.server.url("/article")] * 6
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            pages = list(executor.map(self.pool.render, urls))
+
+        self.assertTrue(all("Rendered article is discussed" in page for page in pages))
+
+    def test_blocks_images(self):
+        self.server.add_page(
+            "/with-image", '<html><body><img src="/image.png"></body></html>'
+        )
+        self.pool.render(self.server.url("/with-image"))
+
+        paths = [request["path"] for request in self.server.requests]
+        self.assertIn("/with-image", paths)
+        self.assertNotIn("/image.png", paths)
+
+    def test_closed_pool_rejects_renders(self):
+        self.pool.close()
+        with self.assertRaises(RuntimeError):
+            self.pool.render(self.server.url("/article"))
+
+
+class TestBrowserPoolLaunchFailure(unittest.TestCase):
+    def setUp(self):
+        self.pool = BrowserPool()
+        self.addCleanup(self.pool.close)
+        self.launches = 0
+
+        async def failing_launch():
+            self.launches += 1
+            raise PlaywrightError("BrowserType.launch: Executable doesn't exist")
+
+        self.pool._launch = failing_launch
+
+    def test_failed_launch_is_remembered(self):
+        self.assertEqual(self.pool.render("about:blank"), "")
+        self.assertEqual(self.pool.render("about:blank"), "")
+        self.assertEqual(self.launches, 1)
+
+        # The launch is tried again once LAUNCH_RETRY_INTERVAL has passed
+        self.pool._launch_failed_at -= BrowserPool.LAUNCH_RETRY_INTERVAL
+        self.assertEqual(self.pool.render("about:blank"), "")
+        self.assertEqual(self.launches, 2)
+
+    def test_arender_returns_empty_page(self):
+        self.assertEqual(asyncio.run(self.pool.arender("about:blank")), "")
+
+
+class TestBrowserPoolTimeout(unittest.TestCase):
+    def test_render_returns_empty_page_at_the_timeout(self):
+        pool = BrowserPool()
+        self.addCleanup(pool.close)
+
+        async def launch():
+            pass
+
+        async def slow_render(url):
+            await asyncio.sleep(30)
+
+        pool._launch, pool._render = launch, slow_render
+        self.assertEqual(pool.render("about:blank", timeout=0.1), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from langchain.chat_models.fake import FakeListChatModel
+
+from online_research_engine.config_registry import DEFAULT_CONFIG_PATH, ConfigRegistry
+from online_research_engine.llm_answer import GPTAnswer
+from online_research_engine.search_services import SerperClient
+
+
+class TestConfigRegistry(unittest.TestCase):
+    variables = ["profile", "context_str", "language", "query", "format"]
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.config_path = os.path.join(directory, "config.yaml")
+        self._write('serper_api_key: "first"\ntemplate: "First {query}"\n')
+
+    def _write(self, text, mtime=None):
+        with open(self.config_path, "w") as file:
+            file.write(text)
+        if mtime is not None:
+            os.utime(self.config_path, (mtime, mtime))
+
+    def test_files_are_parsed_once(self):
+        registry = ConfigRegistry()
+        config = registry.get_config(self.config_path)
+        self.assertEqual(config["serper_api_key"], "first")
+        self.assertIs(registry.get_config(self.config_path), config)
+
+        template = registry.get_template(["query"], self.config_path)
+        self.assertEqual(template.format(query="q"), "First q")
+        self.assertIs(registry.get_template(["query"], self.config_path), template)
+
+    def test_changed_files_are_reloaded(self):
+        registry = ConfigRegistry()
+        config = registry.get_config(self.config_path)
+        template = registry.get_template(["query"], self.config_path)
+
+        mtime = os.stat(self.config_path).st_mtime + 10
+        self._write('serper_api_key: "second"\ntemplate: "Second {query}"\n', mtime)
+        self.assertIsNot(registry.get_config(self.config_path), config)
+        self.assertEqual(
+            registry.get_config(self.config_path)["serper_api_key"], "second"
+        )
+        self.assertEqual(
+            registry.get_template(["query"], self.config_path).format(query="q"),
+            "Second q",
+        )
+        self.assertIsNot(registry.get_template(["query"], self.config_path), template)
+
+    def test_default_config(self):
+        registry = ConfigRegistry()
+        self.assertIs(registry.get_config(), registry.get_config(DEFAULT_CONFIG_PATH))
+        self.assertIn("template", registry.get_config())
+
+    def test_clients_and_answers_share_the_parsed_config(self):
+        shutil.copyfile(DEFAULT_CONFIG_PATH, self.config_path)
+        config = ConfigRegistry.get_shared().get_config(self.config_path)
+        self.assertIs(GPTAnswer(llm=None, config_path=self.config_path).config, config)
+        self.assertEqual(
+            SerperClient(config_path=self.config_path).headers["X-API-KEY"],
+            config["serper_api_key"],
+        )
+
+    def test_prompts_and_answers_are_logged_not_printed(self):
+        shutil.copyfile(DEFAULT_CONFIG_PATH, self.config_path)
+        llm = FakeListChatModel(responses=["The answer."])
+        gpt_answer = GPTAnswer(llm=llm, config_path=self.config_path)
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), self.assertLogs(
+            "online_research_engine.llm_answer", level="DEBUG"
+        ) as logs:
+            answer = gpt_answer.get_answer("the query", "context", "en-us", "", "")
+        self.assertEqual(answer.content, "The answer.")
+        self.assertEqual(stdout.getvalue(), "")
+        tokens_record, prompt_record, answer_record = logs.records
+        self.assertEqual(tokens_record.levelname, "INFO")
+        self.assertEqual(prompt_record.query, "the query")
+        self.assertIn("Query: the query", prompt_record.prompt)
+        self.assertEqual(answer_record.answer, "The answer.")
+
+
+if __name__ == "__main__":
+    unittest.main()
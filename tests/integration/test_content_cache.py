@@ -0,0 +1,147 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from online_research_engine.content_cache import ContentCache
+from online_research_engine.http_sessions import close_async_session
+from online_research_engine.web_scraper import WebScraper
+
+from .local_server import LocalHTTPServer, article_html
+
+
+class TestContentCache(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.path = os.path.join(cache_dir.name, "content.sqlite3")
+
+    def test_domain_ttls(self):
+        cache = ContentCache(
+            self.path,
+            default_ttl=60,
+            domain_ttls={"wikipedia.org": 3600, "news.example.com": 5},
+        )
+        self.assertEqual(cache.get_ttl("https://en.wikipedia.org/wiki/Apple"), 3600)
+        self.assertEqual(cache.get_ttl("https://wikipedia.org/"), 3600)
+        self.assertEqual(cache.get_ttl("https://news.example.com/today"), 5)
+        self.assertEqual(cache.get_ttl("https://example.com/"), 60)
+
+    def test_get_and_put(self):
+        cache = ContentCache(self.path)
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", "https://example.com/", "content", etag='"v1"')
+
+        cached = cache.get("key")
+        self.assertEqual(cached.content, "content")
+        self.assertEqual(cached.etag, '"v1"')
+        self.assertTrue(cached.fresh)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual((stats["entries"], stats["size_bytes"]), (1, 7))
+
+    def test_expired_entries_are_kept_for_revalidation(self):
+        cache = ContentCache(self.path, default_ttl=-1)
+        cache.put("key", "https://example.com/", "content", etag='"v1"')
+        self.assertFalse(cache.get("key").fresh)
+
+        cache.default_ttl = 60
+        cache.refresh("key", "https://example.com/")
+        self.assertTrue(cache.get("key").fresh)
+        self.assertEqual(cache.stats()["revalidations"], 1)
+
+    def test_evicts_least_recently_used_entries(self):
+        cache = ContentCache(self.path, max_size_bytes=30)
+        for key in ("a", "b", "c"):
+            cache.put(key, "https://example.com/", key * 10)
+        cache.get("a")  # "b" is now the least recently used entry
+        cache.put("d", "https://example.com/", "d" * 10)
+
+        self.assertIsNone(cache.get("b"))
+        for key in ("a", "c", "d"):
+            self.assertEqual(cache.get(key).content, key * 10)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_shared_between_threads_and_instances(self):
+        caches = [ContentCache(self.path), ContentCache(self.path)]
+
+        def store(i):
+            cache = caches[i % 2]
+            cache.put(f"key {i}", "https://example.com/", f"content {i}")
+            return cache.get(f"key {i}").content
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            contents = list(executor.map(store, range(64)))
+        self.assertEqual(contents, [f"content {i}" for i in range(64)])
+        self.assertEqual(caches[0].stats()["entries"], 64)
+
+
+class TestWebScraperContentCache(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache = ContentCache(os.path.join(cache_dir.name, "content.sqlite3"))
+
+        self.server = LocalHTTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        body = article_html("Cached article").encode("utf-8")
+
+        def article(request):
+            # Honour conditional requests like a real server
+            if request["headers"].get("If-None-Match") == '"v1"':
+                return 304, {"ETag": '"v1"'}, b""
+            return 200, {"Content-Type": "text/html", "ETag": '"v1"'}, body
+
+        self.server.routes["/article"] = article
+        self.url = self.server.url("/article")
+
+    def test_scrape_url_uses_cache(self):
+        scraper = WebScraper(cache=self.cache)
+        main_content = scraper.scrape_url(self.url)
+        self.assertIn("Cached article is discussed", main_content)
+        self.assertEqual(scraper.scrape_url(self.url), main_content)
+        self.assertEqual(len(self.server.requests), 1)
+
+        # Each extraction variant is cached separately
+        self.assertEqual(
+            scraper.scrape_url_with_fallback(self.url),
+            WebScraper().scrape_url_with_fallback(self.url),
+        )
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_revalidates_expired_content(self):
+        self.cache.default_ttl = -1
+        scraper = WebScraper(cache=self.cache)
+        main_content = scraper.scrape_url(self.url)
+
+        self.assertEqual(scraper.scrape_url(self.url), main_content)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.requests[1]["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(self.cache.stats()["revalidations"], 1)
+
+    def test_async_scrapes_share_the_cache(self):
+        async def ascrape(scraper):
+            try:
+                return await scraper.ascrape_url(self.url)
+            finally:
+                await close_async_session()
+
+        self.cache.default_ttl = -1
+        scraper = WebScraper(cache=self.cache)
+        main_content = scraper.scrape_url(self.url)
+
+        # The async scrape revalidates the entry the sync scrape stored
+        self.assertEqual(asyncio.run(ascrape(scraper)), main_content)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.requests[1]["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(self.cache.stats()["revalidations"], 1)
+
+    def test_failed_downloads_are_not_cached(self):
+        scraper = WebScraper(cache=self.cache)
+        scraper.scrape_url(self.server.url("/missing.pdf"))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
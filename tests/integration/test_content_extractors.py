@@ -0,0 +1,100 @@
+import glob
+import os
+import unittest
+
+from online_research_engine.content_extractors import (
+    LxmlContentExtractor,
+    SoupContentExtractor,
+)
+
+CORPUS_DIR = os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, "benchmarks", "corpus"
+)
+WORDS = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu"
+
+# Markup that exercises how BeautifulSoup collects text
+TRICKY_PAGES = [
+    "",
+    "   ",
+    "\ufeff<p>%s</p>" % WORDS,
+    "plain text without tags %s" % WORDS,
+    "<div>%s<script>var x = 1; %s</script> tail %s</div>" % (WORDS, WORDS, WORDS),
+    "<div><style>p {color: red} %s</style><p>%s</p>\n\n  <p>%s</p></div>"
+    % (WORDS, WORDS, WORDS),
+    "<div><template><p>%s</p></template>%s</div>" % (WORDS, WORDS),
+    "<div><ruby>漢<rp>(</rp><rt>kan %s</rt><rp>)</rp></ruby> %s</div>" % (WORDS, WORDS),
+    "<div><pre>   \n   </pre>   \n  <pre>  %s  </pre><textarea> </textarea>%s</div>"
+    % (WORDS, WORDS),
+    "<div>a<!-- comment %s -->b %s<?php echo 1; ?> c</div>" % (WORDS, WORDS),
+    "<p>%s<div>%s</div>%s</p>" % (WORDS, WORDS, WORDS),
+    "<div><p>%s<p>%s</div></p>" % (WORDS, WORDS),
+    "<table><p>%s</p><tr><td>%s</td></tr></table>" % (WORDS, WORDS),
+    "<div>&amp; &lt; &nbsp; &copy; %s</div>" % WORDS,
+    "<svg><path>%s</path></svg><picture>%s</picture><param>%s" % (WORDS, WORDS, WORDS),
+    "<div>" * 300 + WORDS + "</div>" * 300,
+    "<h1>%s</h1><h7>%s</h7><header>%s</header><hr>%s" % (WORDS, WORDS, WORDS, WORDS),
+    "<div>\t\r\n \x0c</div><div>\xa0 \xa0</div><div>%s</div>" % WORDS,
+    "<html><body><p>%s</p></body></html><p>after %s</p>" % (WORDS, WORDS),
+    "<DIV><P>%s</P></DIV>" % WORDS,
+    "<div>" + "<p>short</p>\n" * 20 + "</div>",
+]
+
+
+class TestContentExtractors(unittest.TestCase):
+    def assertSameContent(self, html_string):
+        soup_extractor = SoupContentExtractor()
+        lxml_extractor = LxmlContentExtractor()
+        soup_document = soup_extractor.parse(html_string)
+        lxml_document = lxml_extractor.parse(html_string)
+        for rule in (0, 1):
+            self.assertEqual(
+                lxml_extractor.extract_main_content(lxml_document, rule),
+                soup_extractor.extract_main_content(soup_document, rule),
+            )
+
+    def test_tricky_markup(self):
+        for html_string in TRICKY_PAGES:
+            with self.subTest(html_string=html_string[:60]):
+                self.assertSameContent(html_string)
+
+    def test_benchmark_corpus(self):
+        paths = glob.glob(os.path.join(CORPUS_DIR, "*.html"))
+        self.assertTrue(paths)
+        for path in paths:
+            with self.subTest(page=os.path.basename(path)):
+                with open(path, "r", encoding="utf-8") as file:
+                    self.assertSameContent(file.read())
+
+    def test_parse_chunks(self):
+        extractor = LxmlContentExtractor()
+        html_string = "<div><p>%s</p><p>%s</p></div>" % (WORDS, WORDS)
+        chunks = [html_string[i : i + 7] for i in range(0, len(html_string), 7)]
+
+        document = extractor.index_document(extractor.parse_chunks(chunks))
+        self.assertEqual(
+            extractor.extract_main_content(document, 1),
+            extractor.extract_main_content(extractor.parse(html_string), 1),
+        )
+
+    def test_parse_chunks_split_at_every_offset(self):
+        # Splits inside the end tags of script and style must not swallow the rest
+        extractor = LxmlContentExtractor()
+        html_string = (
+            "\ufeff<html><head><style>p {color: red}</style>"
+            "<script>if (a < b) { x(); }</script></head>"
+            "<body><div><p>%s</p><p>%s</p></div></body></html>" % (WORDS, WORDS)
+        )
+        document = extractor.parse(html_string)
+        expected = [extractor.extract_main_content(document, rule) for rule in (0, 1)]
+        for offset in range(len(html_string) + 1):
+            with self.subTest(offset=offset):
+                chunks = [html_string[:offset], html_string[offset:]]
+                document = extractor.index_document(extractor.parse_chunks(chunks))
+                self.assertEqual(
+                    [extractor.extract_main_content(document, rule) for rule in (0, 1)],
+                    expected,
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
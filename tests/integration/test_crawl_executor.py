@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+
+from online_research_engine.crawl_executor import CrawlExecutor
+
+
+class TestCrawlExecutor(unittest.TestCase):
+    def _track_concurrency(self):
+        # Build a task that records the peak number of concurrent calls per host
+        lock = threading.Lock()
+        running, peaks = {}, {}
+
+        def task(host):
+            with lock:
+                running[host] = running.get(host, 0) + 1
+                peaks[host] = max(peaks.get(host, 0), running[host])
+            time.sleep(0.02)
+            with lock:
+                running[host] -= 1
+            return host
+
+        return task, peaks
+
+    def test_limits_concurrency_per_host(self):
+        executor = CrawlExecutor(max_workers=8, max_per_host=2)
+        task, peaks = self._track_concurrency()
+        urls = [f"https://{host}.example.com/{i}" for host in "ab" for i in range(6)]
+
+        futures = [executor.submit(url, task, url.split("/")[2]) for url in urls]
+        results = [future.result(timeout=5) for future in futures]
+        executor.shutdown()
+
+        self.assertEqual(results, [url.split("/")[2] for url in urls])
+        self.assertEqual(peaks, {"a.example.com": 2, "b.example.com": 2})
+
+    def test_limits_total_workers(self):
+        executor = CrawlExecutor(max_workers=3, max_per_host=10)
+        task, peaks = self._track_concurrency()
+
+        futures = [
+            executor.submit(f"https://example.com/{i}", task, "all") for i in range(9)
+        ]
+        for future in futures:
+            future.result(timeout=5)
+        executor.shutdown()
+
+        self.assertEqual(peaks["all"], 3)
+
+    def test_exceptions_are_returned_through_futures(self):
+        executor = CrawlExecutor(max_workers=2)
+
+        def fail():
+            raise ValueError("boom")
+
+        future = executor.submit("https://example.com", fail)
+        with self.assertRaises(ValueError):
+            future.result(timeout=5)
+        executor.shutdown()
+
+    def test_shutdown_cancels_queued_tasks(self):
+        executor = CrawlExecutor(max_workers=1, max_per_host=1)
+        release = threading.Event()
+
+        running = executor.submit("https://example.com/0", release.wait, 5)
+        queued = executor.submit("https://example.com/1", time.sleep, 0)
+        executor.shutdown(wait=False, cancel_futures=True)
+        release.set()
+
+        self.assertTrue(running.result(timeout=5))
+        self.assertTrue(queued.cancelled())
+        with self.assertRaises(RuntimeError):
+            executor.submit("https://example.com/2", time.sleep, 0)
+
+    def test_shared_executor_is_reused(self):
+        shared = CrawlExecutor.get_shared()
+        self.assertIs(CrawlExecutor.get_shared(), shared)
+
+        configured = CrawlExecutor.configure_shared(max_workers=4, max_per_host=1)
+        self.assertIsNot(configured, shared)
+        self.assertEqual(CrawlExecutor.get_shared().max_workers, 4)
+        CrawlExecutor.shutdown_shared()
+
+
+if __name__ == "__main__":
+    unittest.main()
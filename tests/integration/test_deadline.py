@@ -0,0 +1,42 @@
+import time
+import unittest
+
+from online_research_engine.deadline import Deadline, DeadlineExceeded, as_deadline
+
+
+class TestDeadline(unittest.TestCase):
+    def test_no_deadline_never_expires(self):
+        deadline = Deadline()
+        self.assertFalse(deadline.expired)
+        self.assertIsNone(deadline.remaining())
+        self.assertEqual(deadline.remaining(8), 8)
+        deadline.check()
+
+    def test_remaining_and_expiry(self):
+        deadline = Deadline(0.2)
+        self.assertFalse(deadline.expired)
+        self.assertLessEqual(deadline.remaining(), 0.2)
+        self.assertEqual(deadline.remaining(0.1), 0.1)
+
+        time.sleep(0.25)
+        self.assertTrue(deadline.expired)
+        self.assertEqual(deadline.remaining(), 0.0)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.check()
+
+    def test_limit_keeps_the_sooner_deadline(self):
+        deadline = Deadline(10)
+        self.assertLessEqual(deadline.limit(1).remaining(), 1)
+        self.assertGreater(deadline.limit(60).remaining(), 9)
+        self.assertLessEqual(deadline.limit(60).remaining(), 10)
+        self.assertLessEqual(Deadline().limit(1).remaining(), 1)
+
+    def test_as_deadline(self):
+        deadline = Deadline(5)
+        self.assertIs(as_deadline(deadline), deadline)
+        self.assertIsNone(as_deadline(None).expires_at)
+        self.assertLessEqual(as_deadline(5).remaining(), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from online_research_engine.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    get_model_id,
+)
+
+from .fake_embeddings import FakeEmbeddings
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.path = os.path.join(cache_dir.name, "embeddings.sqlite3")
+
+    def test_get_and_put_many(self):
+        cache = EmbeddingCache(self.path)
+        cache.put_many("model", ["a", "b"], [[0.5, 1.0], [0.25, 2.0]])
+
+        self.assertEqual(
+            cache.get_many("model", ["b", "c", "a"]),
+            [[0.25, 2.0], None, [0.5, 1.0]],
+        )
+        self.assertEqual(cache.get_many("other model", ["a"]), [None])
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 2, "entries": 2})
+
+        # Another instance, e.g. in another process, reads the same vectors
+        self.assertEqual(
+            EmbeddingCache(self.path).get_many("model", ["a"]), [[0.5, 1.0]]
+        )
+
+    def test_cached_embeddings_only_embed_new_texts(self):
+        model = FakeEmbeddings()
+        embeddings = CachedEmbeddings(model, EmbeddingCache(self.path))
+        self.assertEqual(embeddings.model_id, "FakeEmbeddings:fake-embedding")
+        self.assertEqual(get_model_id(model), embeddings.model_id)
+
+        first = embeddings.embed_documents(["one text", "two text", "one text"])
+        second = embeddings.embed_documents(["two text", "three text"])
+        self.assertEqual(model.calls, [["one text", "two text"], ["three text"]])
+        self.assertEqual(first[0], first[2])
+        # Cached vectors come back as float32 values
+        for cached, embedded in zip(second[0], first[1]):
+            self.assertAlmostEqual(cached, embedded, places=6)
+
+        embeddings.embed_query("one text")
+        embeddings.embed_query("one text")
+        self.assertEqual(model.query_calls, ["one text"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from online_research_engine.fetch_result import FetchResult
+from online_research_engine.urls import index_urls
+
+
+class TestFetchResult(unittest.TestCase):
+    def test_unpacks_like_a_tuple(self):
+        services_response = {"links": ["https://a", "https://b"]}
+        contents, response = FetchResult(["first", "second"], services_response)
+        self.assertEqual(contents, ["first", "second"])
+        self.assertIs(response, services_response)
+
+        contents, response = FetchResult([], None)
+        self.assertEqual((contents, response), ([], None))
+
+    def test_indexes_like_a_tuple(self):
+        services_response = {"links": ["https://a"]}
+        result = FetchResult(["first"], services_response)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0], ["first"])
+        self.assertIs(result[1], services_response)
+        self.assertIs(result[-1], services_response)
+        self.assertEqual(result[:1], (["first"],))
+        self.assertEqual(tuple(result), (["first"], services_response))
+        with self.assertRaises(IndexError):
+            result[2]
+
+    def test_records_dropped_urls_and_failed_services(self):
+        result = FetchResult(["a", ""], {"links": ["https://a", "https://b"]})
+        self.assertEqual((result.dropped_urls, result.failed_services), ([], []))
+
+        result = FetchResult(
+            [], None, dropped_urls=["https://b"], failed_services=["X"]
+        )
+        self.assertEqual(result.dropped_urls, ["https://b"])
+        self.assertEqual(result.failed_services, ["X"])
+
+    def test_url_index(self):
+        links = ["https://a", "https://b", "https://a", "https://c"]
+        result = FetchResult(["a", "b", "", "c"], {"links": links})
+        self.assertEqual(
+            result.url_index, {"https://a": 0, "https://b": 1, "https://c": 3}
+        )
+        self.assertEqual(result.content_of("https://c"), "c")
+        self.assertEqual(result.content_of("https://d"), "")
+        self.assertEqual(result.position("https://a"), links.index("https://a"))
+
+    def test_explicit_links(self):
+        result = FetchResult(["page"], {"websites": ["https://a"]}, ["https://a/about"])
+        self.assertEqual(result.content_of("https://a/about"), "page")
+        self.assertFalse(hasattr(result, "__dict__"))
+
+    def test_index_urls_matches_list_index(self):
+        links = ["x", "y", "x", "z", "y"]
+        url_index = index_urls(links)
+        for link in links:
+            self.assertEqual(url_index[link], links.index(link))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,18 @@
+import asyncio
+import os
+import tempfile
+import time
 import unittest
 
+from online_research_engine.content_cache import ContentCache
+from online_research_engine.deadline import Deadline
 from online_research_engine.fetch_web_content import (
     PlacesContentFetcher,
     WebContentFetcher,
 )
+from online_research_engine.http_sessions import close_async_session
+
+from .local_server import LocalHTTPServer, article_html
 
 
 class TestWebContentFetcher(unittest.TestCase):
@@ -47,5 +56,334 @@ class TestPlacesContentFetcher(unittest.TestCase):
         contents, services_response = fetcher.fetch()
 
 
+class TestLocalWebContentFetcher(unittest.TestCase):
+    """Runs the fetch pipeline against a stand-in HTTP server instead of the real services."""
+
+    def setUp(self):
+        self.server = LocalHTTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+
+        self.links = [self.server.url(f"/page/{i}") for i in range(3)]
+        for i, link in enumerate(self.links):
+            self.server.add_page(f"/page/{i}", article_html(f"Article {i}"))
+        self.links.append(self.server.url("/missing"))
+        self.server.add_search_services(self.links)
+
+        # Point the search clients at the local server
+        self.config_path = self.server.write_config()
+
+    def _make_fetcher(self, **kwargs):
+        services = [
+            WebContentFetcher.SearchServices.BING_WEB_SEARCH,
+            WebContentFetcher.SearchServices.BING_NEWS_SEARCH,
+        ]
+        return WebContentFetcher(
+            "local query",
+            search_services=services,
+            config_path=self.config_path,
+            **kwargs,
+        )
+
+    async def _afetch(self, fetcher, **kwargs):
+        try:
+            return await fetcher.afetch(**kwargs)
+        finally:
+            await close_async_session()
+
+    def test_fetch(self):
+        contents, services_response = self._make_fetcher().fetch()
+
+        # Both services list the same links, which are crawled once
+        self.assertEqual(services_response["links"], self.links)
+        self.assertEqual(services_response["count"], 4)
+        self.assertEqual(len(contents), 4)
+        self.assertIn("Article 1 is discussed", contents[1])
+        self.assertEqual(contents[3], "")
+        self.assertEqual(
+            services_response["sources"][1],
+            [
+                {
+                    "service": "BING_WEB_SEARCH",
+                    "link": self.links[1],
+                    "title": "Title 1",
+                    "snippet": "Snippet 1",
+                },
+                {
+                    "service": "BING_NEWS_SEARCH",
+                    "link": self.links[1],
+                    "title": "News 1",
+                    "snippet": "Story 1",
+                },
+            ],
+        )
+
+    def test_fetch_deduplicates_equivalent_links(self):
+        variants = [
+            self.links[0].replace("http://", "https://") + "/",
+            self.links[1] + "?utm_source=news&utm_medium=rss",
+            self.links[2].replace("127.0.0.1", "www.127.0.0.1") + "#comments",
+            self.server.url("/page/3"),
+        ]
+        self.server.add_page("/page/3", article_html("Article 3"))
+        self.server.add_json(
+            "/v7.0/news/search",
+            {
+                "queryContext": {"originalQuery": "local query"},
+                "value": [
+                    {"name": f"News {i}", "url": link, "description": f"Story {i}"}
+                    for i, link in enumerate(variants)
+                ],
+            },
+        )
+
+        for fetch in (
+            lambda fetcher: fetcher.fetch(),
+            lambda fetcher: asyncio.run(self._afetch(fetcher)),
+        ):
+            fetcher = self._make_fetcher()
+            contents, services_response = fetch(fetcher)
+
+            self.assertEqual(services_response["links"], self.links + variants[3:])
+            self.assertEqual(
+                services_response["titles"],
+                ["Title 0", "Title 1", "Title 2", "Title 3", "News 3"],
+            )
+            self.assertEqual(
+                [len(sources) for sources in services_response["sources"]],
+                [2, 2, 2, 1, 1],
+            )
+            self.assertEqual(services_response["sources"][1][1]["link"], variants[1])
+            self.assertIn("Article 3 is discussed", contents[4])
+
+    def test_fetch_result_indexes_links(self):
+        result = self._make_fetcher().fetch()
+        contents, services_response = result
+
+        self.assertEqual(result.links, self.links)
+        self.assertEqual(result.position(self.links[2]), 2)
+        self.assertIsNone(result.position(self.server.url("/elsewhere")))
+        self.assertEqual(result.content_of(self.links[1]), contents[1])
+        self.assertEqual(result.content_of(self.links[3]), "")
+
+    def test_afetch_matches_fetch(self):
+        async def afetch():
+            try:
+                return await self._make_fetcher().afetch()
+            finally:
+                await close_async_session()
+
+        contents, services_response = asyncio.run(afetch())
+        expected_contents, expected_response = self._make_fetcher().fetch()
+
+        self.assertEqual(contents, expected_contents)
+        self.assertEqual(services_response, expected_response)
+
+    def test_afetch_uses_the_content_cache(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache = ContentCache(os.path.join(cache_dir.name, "content.sqlite3"))
+
+        contents, _ = asyncio.run(self._afetch(self._make_fetcher(content_cache=cache)))
+        page_requests = len(self.server.requests)
+        cached_contents, _ = asyncio.run(
+            self._afetch(self._make_fetcher(content_cache=cache))
+        )
+
+        # The second run only searches and retries the missing page, which was not
+        # cached, and the other pages come from the cache
+        self.assertEqual(cached_contents, contents)
+        self.assertCountEqual(
+            [request["path"] for request in self.server.requests[page_requests:]],
+            ["/v7.0/search", "/v7.0/news/search", "/missing"],
+        )
+        self.assertEqual(cache.stats()["hits"], 3)
+
+    def test_fetch_collapses_near_duplicate_pages(self):
+        mirror = self.server.url("/mirror/1")
+        self.server.add_page("/mirror/1", article_html("Article 1"))
+        self.server.add_json(
+            "/v7.0/news/search",
+            {
+                "queryContext": {"originalQuery": "local query"},
+                "value": [{"name": "Mirror", "url": mirror, "description": "Copy"}],
+            },
+        )
+
+        for fetch in (
+            lambda fetcher: fetcher.fetch(),
+            lambda fetcher: asyncio.run(self._afetch(fetcher)),
+        ):
+            fetcher = self._make_fetcher(deduplicate=True)
+            contents, services_response = fetch(fetcher)
+
+            self.assertEqual(services_response["links"], self.links + [mirror])
+            self.assertIn("Article 1 is discussed", contents[1])
+            self.assertEqual(contents[4], "")
+            self.assertEqual(
+                services_response["duplicate_of"], [None, None, None, None, 1]
+            )
+            self.assertEqual(
+                [source["link"] for source in services_response["sources"][1]],
+                [self.links[1], mirror],
+            )
+
+        fetcher = self._make_fetcher(deduplicate=True)
+        pages = dict(fetcher.fetch_iter())
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(
+            len(
+                [i for i in fetcher.services_response["duplicate_of"] if i is not None]
+            ),
+            1,
+        )
+
+    def test_fetch_iter_streams_pages(self):
+        fetcher = self._make_fetcher()
+        pages = list(fetcher.fetch_iter())
+        expected_contents, expected_response = self._make_fetcher().fetch()
+
+        self.assertEqual(fetcher.services_response, expected_response)
+        self.assertEqual(
+            sorted(pages),
+            sorted(
+                (url, content)
+                for url, content in zip(expected_response["links"], expected_contents)
+                if content
+            ),
+        )
+        self.assertEqual(fetcher.dropped_urls, [])
+
+    def test_fetch_iter_drops_slow_pages_at_the_deadline(self):
+        def slow_page(request):
+            time.sleep(3)
+            return 200, {"Content-Type": "text/html"}, b"<p>too late</p>"
+
+        self.server.routes["/page/2"] = slow_page
+        fetcher = self._make_fetcher()
+
+        start = time.perf_counter()
+        pages = list(fetcher.fetch_iter(deadline=1))
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 2)
+        self.assertEqual({url for url, _ in pages}, set(self.links[:2]))
+        self.assertEqual(fetcher.dropped_urls, [self.links[2]])
+
+    def test_fetch_drops_slow_pages_at_the_deadline(self):
+        def slow_page(request):
+            time.sleep(3)
+            return 200, {"Content-Type": "text/html"}, b"<p>too late</p>"
+
+        self.server.routes["/page/2"] = slow_page
+
+        for fetch in (
+            lambda fetcher: fetcher.fetch(deadline=Deadline(1)),
+            lambda fetcher: asyncio.run(self._afetch(fetcher, deadline=Deadline(1))),
+        ):
+            fetcher = self._make_fetcher()
+            start = time.perf_counter()
+            result = fetch(fetcher)
+            contents, services_response = result
+            elapsed = time.perf_counter() - start
+
+            self.assertLess(elapsed, 2)
+            self.assertEqual(services_response["links"], self.links)
+            self.assertIn("Article 1 is discussed", contents[1])
+            self.assertEqual(contents[2], "")
+            self.assertEqual(result.dropped_urls, [self.links[2]])
+            self.assertEqual(fetcher.dropped_urls, [self.links[2]])
+
+    def test_abandoned_crawls_do_not_leak_into_the_next_fetch(self):
+        class StuckBrowserPool:
+            # Keeps rendering the thin page well past the deadline of the first fetch
+            def render(self, url, timeout=None):
+                if not url.endswith("/page/2"):
+                    return ""
+                time.sleep(1.5)
+                return article_html("Rendered")
+
+        self.server.add_page("/page/2", "<p>thin</p>")
+        fetcher = self._make_fetcher(browser_pool=StuckBrowserPool())
+        fetcher.fetch(deadline=Deadline(0.5))
+        self.assertEqual(fetcher.dropped_urls, [self.links[2]])
+
+        # The first fetch's render finishes while the second fetch is crawling
+        fetcher.fetch()
+        self.assertCountEqual(
+            [item["url"] for item in fetcher.web_contents], self.links[:3]
+        )
+
+    def test_search_services_run_concurrently(self):
+        def slow_search(search):
+            def respond(request):
+                time.sleep(0.5)
+                return search(request)
+
+            return respond
+
+        for path in ("/v7.0/search", "/v7.0/news/search"):
+            self.server.routes[path] = slow_search(self.server.routes[path])
+        fetcher = self._make_fetcher()
+
+        start = time.perf_counter()
+        service_responses = fetcher._search_launcher()
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual(
+            [response["titles"][0] for response in service_responses.values()],
+            ["Title 0", "News 0"],
+        )
+
+    def test_failed_search_service_gives_partial_results(self):
+        self.server.routes["/v7.0/search"] = (500, {}, b"Internal Server Error")
+
+        for fetch in (
+            lambda fetcher: fetcher.fetch(),
+            lambda fetcher: asyncio.run(self._afetch(fetcher)),
+        ):
+            fetcher = self._make_fetcher()
+            result = fetch(fetcher)
+            contents, services_response = result
+
+            self.assertEqual(services_response["links"], self.links)
+            self.assertEqual(services_response["titles"][0], "News 0")
+            self.assertIn("Article 1 is discussed", contents[1])
+            self.assertEqual(
+                result.failed_services,
+                [WebContentFetcher.SearchServices.BING_WEB_SEARCH],
+            )
+            self.assertEqual(result.failed_services, fetcher.failed_services)
+
+            # Each fetch reports only its own failures
+            self.server.add_search_services(self.links)
+            result = fetch(fetcher)
+            self.assertEqual(result.failed_services, [])
+            self.assertEqual(fetcher.failed_services, [])
+            self.assertEqual(len(result.contents), len(self.links))
+            self.server.routes["/v7.0/search"] = (500, {}, b"Internal Server Error")
+
+    def test_search_times_out_at_the_deadline(self):
+        def slow_search(request):
+            time.sleep(3)
+            return 200, {"Content-Type": "application/json"}, b"{}"
+
+        self.server.routes["/v7.0/search"] = slow_search
+        fetcher = self._make_fetcher()
+
+        start = time.perf_counter()
+        contents, services_response = fetcher.fetch(deadline=1)
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(services_response["links"], self.links)
+        self.assertEqual(
+            fetcher.failed_services, [WebContentFetcher.SearchServices.BING_WEB_SEARCH]
+        )
+
+        fetcher = self._make_fetcher()
+        result = fetcher.fetch(deadline=0)
+        self.assertEqual(tuple(result), ([], None))
+        self.assertEqual(len(result.failed_services), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from online_research_engine import http_sessions
+from online_research_engine.search_services import BingWebSearchClient
+from online_research_engine.web_scraper import WebScraper
+
+from .local_server import LocalHTTPServer, article_html
+
+
+class TestSessionPool(unittest.TestCase):
+    def setUp(self):
+        http_sessions.close_session()
+        self.addCleanup(http_sessions.configure_session_pool)
+
+        self.server = LocalHTTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.server.add_page("/article", article_html("Pooled article"))
+
+    def test_session_is_shared(self):
+        self.assertIs(http_sessions.get_session(), http_sessions.get_session())
+
+    def test_scrapers_reuse_connections(self):
+        url = self.server.url("/article")
+        for _ in range(3):
+            WebScraper().scrape_url(url)
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_search_clients_reuse_connections(self):
+        self.server.add_search_services([self.server.url("/article")])
+        config_path = self.server.write_config()
+
+        for _ in range(3):
+            client = BingWebSearchClient(config_path=config_path)
+            components = client.extract_components(client.bing_web_search("pooled"))
+            self.assertEqual(components["query"], "pooled")
+
+        self.assertEqual(self.server.connections, 1)
+
+    def test_cookies_are_not_carried_between_requests(self):
+        self.server.routes["/cookie"] = (
+            200,
+            {"Content-Type": "text/html", "Set-Cookie": "tracking=1; Path=/"},
+            b"<html></html>",
+        )
+        WebScraper().get_webpage_html(self.server.url("/cookie"))
+        WebScraper().get_webpage_html(self.server.url("/article"))
+
+        self.assertNotIn("Cookie", self.server.requests[-1]["headers"])
+
+    def test_configure_host_pool_sizes(self):
+        prefix = self.server.url()
+        http_sessions.configure_session_pool(
+            pool_maxsize=4, host_pool_sizes={prefix: 2}
+        )
+        session = http_sessions.get_session()
+
+        self.assertEqual(session.get_adapter(prefix + "/article")._pool_maxsize, 2)
+        self.assertEqual(session.get_adapter("https://example.com")._pool_maxsize, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
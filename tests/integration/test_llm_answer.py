@@ -1,3 +1,4 @@
+import asyncio
 import os
 import time
 import unittest
@@ -5,7 +6,9 @@ import unittest
 import yaml
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.chat_models import AzureChatOpenAI
+from langchain.chat_models.fake import FakeListChatModel
 from langchain.embeddings import AzureOpenAIEmbeddings
+from langchain.schema import Document
 
 from online_research_engine.fetch_web_content import WebContentFetcher
 from online_research_engine.llm_answer import GPTAnswer
@@ -73,5 +76,101 @@ class TestGPTAnswer(unittest.TestCase):
         print("\n\nGPT Answer time:", end - start, "s")
 
 
+class TestLocalGPTAnswer(unittest.TestCase):
+    """Checks the prompt context formatting without calling the LLM."""
+
+    def test_format_reference(self):
+        links = ["https://a.example", "https://b.example", "https://c.example"]
+        documents = [
+            Document(page_content="From C", metadata={"url": links[2]}),
+            Document(page_content="From A", metadata={"url": links[0]}),
+            Document(page_content="More from C", metadata={"url": links[2]}),
+        ]
+        formatted_reference = GPTAnswer(llm=None)._format_reference(documents, links)
+
+        # Webpages are numbered in order of first appearance in the retrieved documents,
+        # and the chunks of a webpage are merged under its header
+        self.assertEqual(
+            formatted_reference,
+            "\nWebpage[1], url: https://c.example:\nFrom C\n\nMore from C\n\n\n"
+            "Webpage[2], url: https://a.example:\nFrom A\n\n\n",
+        )
+
+    def test_format_reference_fits_the_token_budget(self):
+        def count_words(text):
+            return len(text.split())
+
+        links = ["https://a.example", "https://b.example", "https://c.example"]
+        documents = [
+            Document(page_content=" ".join(["alpha"] * 50), metadata={"url": links[0]}),
+            Document(page_content=" ".join(["beta"] * 60), metadata={"url": links[1]}),
+            Document(page_content=" ".join(["gamma"] * 10), metadata={"url": links[2]}),
+            Document(page_content=" ".join(["delta"] * 40), metadata={"url": links[0]}),
+        ]
+        gpt_answer = GPTAnswer(llm=None, context_tokens=100, count_tokens=count_words)
+        with self.assertLogs("online_research_engine.llm_answer", "INFO") as logs:
+            formatted_reference = gpt_answer._format_reference(documents, links)
+
+        self.assertLessEqual(count_words(formatted_reference), 100)
+        self.assertEqual(
+            logs.records[0].reference_tokens, count_words(formatted_reference)
+        )
+        # The best chunk is kept whole and the next one is trimmed to the rest of the
+        # budget, which leaves no room for the others
+        self.assertEqual(formatted_reference.count("alpha"), 50)
+        self.assertEqual(formatted_reference.count("beta"), 44)
+        self.assertNotIn("gamma", formatted_reference)
+        self.assertNotIn("delta", formatted_reference)
+
+        # Without room for a meaningful part of a chunk, smaller chunks still fit
+        gpt_answer = GPTAnswer(llm=None, context_tokens=80, count_tokens=count_words)
+        formatted_reference = gpt_answer._format_reference(documents, links)
+        self.assertNotIn("beta", formatted_reference)
+        self.assertEqual(formatted_reference.count("gamma"), 10)
+        self.assertIn("Webpage[2], url: https://c.example:", formatted_reference)
+        self.assertLessEqual(count_words(formatted_reference), 80)
+
+    def test_prompt_tokens_are_logged(self):
+        gpt_answer = GPTAnswer(llm=None, count_tokens=lambda text: len(text.split()))
+        with self.assertLogs("online_research_engine.llm_answer", "INFO") as logs:
+            prompt = gpt_answer._build_prompt("query", "context", "en-us", "", "")
+
+        self.assertEqual(logs.records[0].prompt_tokens, len(prompt.split()))
+        self.assertEqual(logs.records[0].query, "query")
+
+    def test_trim_to_tokens_keeps_whole_words(self):
+        gpt_answer = GPTAnswer(llm=None, count_tokens=len)
+        gpt_answer.MIN_TRIMMED_TOKENS = 1
+        self.assertEqual(gpt_answer._trim_to_tokens("one two three", 9), "one two")
+        self.assertEqual(gpt_answer._trim_to_tokens("one two three", 7), "one two")
+        self.assertEqual(gpt_answer._trim_to_tokens("onetwothree", 5), "")
+
+    def test_stream_answer(self):
+        answer = "Streamed answer [1].\nReferences:\n[1] URL: https://a.example"
+        llm = FakeListChatModel(responses=[answer])
+        gpt_answer = GPTAnswer(llm=llm)
+
+        chunks = list(gpt_answer.stream_answer("query", "context", "en-us", "", ""))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), answer)
+
+    def test_astream_answer(self):
+        answer = "Streamed answer [1].\nReferences:\n[1] URL: https://a.example"
+        llm = FakeListChatModel(responses=[answer])
+        gpt_answer = GPTAnswer(llm=llm)
+
+        async def astream():
+            return [
+                chunk
+                async for chunk in gpt_answer.astream_answer(
+                    "query", "context", "en-us", "", ""
+                )
+            ]
+
+        chunks = asyncio.run(astream())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), answer)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,10 @@
 import json
 import unittest
 
-from online_research_engine.locate_reference import ReferenceLocator
+from online_research_engine.locate_reference import (
+    IncrementalReferenceLocator,
+    ReferenceLocator,
+)
 
 
 class TestReferenceLocator(unittest.TestCase):
@@ -94,5 +97,66 @@ class TestReferenceLocator(unittest.TestCase):
         print(json_formatted_cards)
 
 
+class TestIncrementalReferenceLocator(unittest.TestCase):
+    gpt_answer = (
+        "\nApples grow on trees in temperate climates [1]. "
+        "Most apples are harvested in autumn [2]. "
+        "Pears are a close relative of apples [1].\n"
+        "\nReferences:\n"
+        "[1] URL: https://a.example/apples\n"
+        "    Quoted sentence: Apple trees thrive where winters are cold.\n"
+        "\n"
+        "[2] URL: https://b.example/harvest\n"
+        "    Quoted sentence: The apple harvest peaks in September and October."
+    )
+    serper_response = {
+        "links": ["https://b.example/harvest", "https://a.example/apples"],
+        "titles": ["Harvest", "Apples"],
+        "snippets": ["About the harvest", "About apples"],
+    }
+
+    def test_cards_match_the_complete_answer(self):
+        locator = IncrementalReferenceLocator(self.serper_response)
+        cards = []
+        for start in range(0, len(self.gpt_answer), 7):
+            cards.extend(locator.feed(self.gpt_answer[start : start + 7]))
+        cards.extend(locator.close())
+
+        expected = ReferenceLocator(
+            self.gpt_answer + "\n", self.serper_response
+        ).locate_source()
+        self.assertEqual(len(cards), 3)
+        self.assertCountEqual(cards, expected)
+
+    def test_cards_are_emitted_as_soon_as_their_entry_is_complete(self):
+        locator = IncrementalReferenceLocator(self.serper_response)
+        first_entry_end = self.gpt_answer.index("\n", self.gpt_answer.index("Quoted"))
+
+        self.assertEqual(locator.feed(self.gpt_answer[:first_entry_end]), [])
+        cards = locator.feed(self.gpt_answer[first_entry_end : first_entry_end + 1])
+        self.assertEqual(
+            [card["sent"] for card in cards],
+            [
+                "Apples grow on trees in temperate climates",
+                " Pears are a close relative of apples",
+            ],
+        )
+        self.assertEqual(cards[0]["titles"], "Apples")
+        self.assertEqual(
+            cards[0]["source"], "Apple trees thrive where winters are cold."
+        )
+
+        # The last entry is only complete once the answer is over
+        self.assertEqual(locator.feed(self.gpt_answer[first_entry_end + 1 :]), [])
+        cards = locator.close()
+        self.assertEqual([card["url"] for card in cards], ["https://b.example/harvest"])
+        self.assertEqual(locator.close(), [])
+
+    def test_answer_without_references(self):
+        locator = IncrementalReferenceLocator(self.serper_response)
+        self.assertEqual(locator.feed("An answer that cites nothing [1]."), [])
+        self.assertEqual(locator.close(), [])
+
+
 if __name__ == "__main__":
     unittest.main()
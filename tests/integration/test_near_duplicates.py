@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from online_research_engine.near_duplicates import MinHashLSH, collapse_near_duplicates
+
+WORDS = (
+    "market shares bank rates growth report investors economy prices quarter policy "
+    "trade energy central inflation company profits losses earnings analysts"
+).split()
+
+
+def make_story(topic, sentences=60):
+    # Random but reproducible sentences, so different topics share few shingles
+    rng = random.Random(topic)
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(12)) + "." for _ in range(sentences)
+    )
+
+
+class TestMinHashLSH(unittest.TestCase):
+    def test_finds_near_duplicates(self):
+        index = MinHashLSH()
+        story = make_story("the index")
+        syndicated = "Reuters - " + story.rsplit(".", 3)[0] + "."
+
+        self.assertIsNone(index.add("original", story))
+        self.assertIsNone(index.add("other", make_story("the dollar")))
+        self.assertEqual(index.add("syndicated", syndicated), "original")
+        self.assertEqual(index.add("copy", story), "original")
+        # Duplicates are not indexed themselves
+        self.assertEqual(len(index), 2)
+
+    def test_similarity_estimate(self):
+        index = MinHashLSH()
+        story = make_story("the index")
+        self.assertEqual(
+            index.similarity(index.signature(story), index.signature(story)), 1.0
+        )
+        self.assertLess(
+            index.similarity(
+                index.signature(story), index.signature(make_story("bond yields"))
+            ),
+            0.8,
+        )
+
+    def test_texts_without_words(self):
+        index = MinHashLSH()
+        self.assertIsNone(index.signature(""))
+        self.assertIsNone(index.add("empty", ""))
+        self.assertIsNone(index.add("blank", " \n "))
+        self.assertEqual(len(index), 0)
+        # Texts shorter than a shingle are still compared
+        self.assertIsNone(index.add("short", "breaking news"))
+        self.assertEqual(index.add("same", "Breaking news!"), "short")
+
+    def test_collapse_near_duplicates_keeps_every_source(self):
+        story = make_story("the index")
+        contents = [story, make_story("the dollar"), "", story]
+        services_response = {
+            "links": ["https://a", "https://b", "https://c", "https://d"],
+            "sources": [[{"link": link}] for link in "abcd"],
+        }
+
+        collapsed = collapse_near_duplicates(contents, services_response)
+
+        self.assertEqual(collapsed, contents[:3] + [""])
+        self.assertEqual(services_response["duplicate_of"], [None, None, None, 0])
+        self.assertEqual(
+            services_response["sources"][0], [{"link": "a"}, {"link": "d"}]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+import unittest
+from email.utils import formatdate
+
+from online_research_engine.deadline import Deadline
+from online_research_engine.http_sessions import close_async_session
+from online_research_engine.politeness import PolitenessPolicy
+from online_research_engine.web_scraper import WebScraper
+
+from .local_server import LocalHTTPServer, article_html
+
+
+class TestPolitenessPolicy(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalHTTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.server.add_page("/article", article_html("Polite article"))
+        self.server.add_page("/private/page", article_html("Private page"))
+
+    def _requests_to(self, path):
+        return [request for request in self.server.requests if request["path"] == path]
+
+    def test_robots_txt_is_cached_and_respected(self):
+        self.server.add_page(
+            "/robots.txt", "User-agent: *\nDisallow: /private/\n", "text/plain"
+        )
+        politeness = PolitenessPolicy(min_interval=0)
+        scraper = WebScraper(politeness=politeness)
+
+        threads = [
+            threading.Thread(target=scraper.scrape_url, args=(self.server.url(path),))
+            for path in ["/article", "/private/page"] * 4
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self._requests_to("/robots.txt")), 1)
+        self.assertEqual(len(self._requests_to("/article")), 4)
+        self.assertEqual(self._requests_to("/private/page"), [])
+        self.assertIn(
+            "Polite article is discussed",
+            scraper.scrape_url(self.server.url("/article")),
+        )
+        self.assertEqual(scraper.scrape_url(self.server.url("/private/page")), "")
+        self.assertEqual(politeness.stats()["robots_fetches"], 1)
+        self.assertEqual(politeness.stats()["disallowed"], 5)
+
+    def test_missing_robots_txt_allows_everything(self):
+        scraper = WebScraper(politeness=PolitenessPolicy(min_interval=0))
+        self.assertIn(
+            "Private page is discussed",
+            scraper.scrape_url(self.server.url("/private/page")),
+        )
+
+    def test_requests_to_a_host_are_spaced(self):
+        politeness = PolitenessPolicy(min_interval=0.2, respect_robots=False)
+        scraper = WebScraper(politeness=politeness)
+        url = self.server.url("/article")
+
+        start = time.monotonic()
+        threads = [
+            threading.Thread(target=scraper.get_webpage_html, args=(url,))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.6)
+        self.assertEqual(len(self._requests_to("/article")), 4)
+
+        # Another host is not held back by the first one's schedule
+        other_host = url.replace("127.0.0.1", "localhost")
+        start = time.monotonic()
+        self.assertEqual(scraper.get_webpage_html(other_host).status_code, 200)
+        self.assertLess(time.monotonic() - start, 0.2)
+
+    def test_turns_past_the_deadline_are_skipped(self):
+        politeness = PolitenessPolicy(min_interval=5, respect_robots=False)
+        scraper = WebScraper(politeness=politeness)
+        url = self.server.url("/article")
+
+        self.assertEqual(scraper.get_webpage_html(url).status_code, 200)
+        start = time.monotonic()
+        response = scraper.get_webpage_html(url, deadline=Deadline(1))
+        self.assertIsNone(response.status_code)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(politeness.stats()["skipped"], 1)
+
+    def test_retry_after_is_honoured(self):
+        answers = [(429, {"Retry-After": "1"}, b"slow down")]
+
+        def throttled(request):
+            if answers:
+                return answers.pop()
+            return (
+                200,
+                {"Content-Type": "text/html"},
+                article_html("Throttled").encode(),
+            )
+
+        self.server.routes["/throttled"] = throttled
+        politeness = PolitenessPolicy(min_interval=0, respect_robots=False)
+        scraper = WebScraper(politeness=politeness)
+
+        start = time.monotonic()
+        main_content = scraper.scrape_url(self.server.url("/throttled"))
+        self.assertGreaterEqual(time.monotonic() - start, 1)
+        self.assertIn("Throttled is discussed", main_content)
+        self.assertEqual(len(self._requests_to("/throttled")), 2)
+        self.assertEqual(politeness.stats()["retries"], 1)
+
+    def test_retries_stop_after_max_retries(self):
+        self.server.routes["/unavailable"] = (503, {"Content-Type": "text/html"}, b"")
+        politeness = PolitenessPolicy(min_interval=0, backoff=0.05, max_retries=2)
+        scraper = WebScraper(politeness=politeness)
+
+        response = scraper.get_webpage_html(self.server.url("/unavailable"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self._requests_to("/unavailable")), 3)
+
+    def test_parse_retry_after(self):
+        politeness = PolitenessPolicy()
+        self.assertEqual(politeness._parse_retry_after("7"), 7)
+        self.assertIsNone(politeness._parse_retry_after("soon"))
+        self.assertIsNone(politeness._parse_retry_after(None))
+        in_ten_seconds = politeness._parse_retry_after(
+            formatdate(time.time() + 10, usegmt=True)
+        )
+        self.assertTrue(8 <= in_ten_seconds <= 10)
+
+    def test_async_download_is_polite(self):
+        self.server.add_page(
+            "/robots.txt", "User-agent: *\nDisallow: /private/\n", "text/plain"
+        )
+        answers = [(503, {"Retry-After": "0"}, b"")]
+
+        def throttled(request):
+            if answers:
+                return answers.pop()
+            return (
+                200,
+                {"Content-Type": "text/html"},
+                article_html("Throttled").encode(),
+            )
+
+        self.server.routes["/throttled"] = throttled
+        scraper = WebScraper(politeness=PolitenessPolicy(min_interval=0))
+
+        async def ascrape():
+            try:
+                return (
+                    await scraper.ascrape_url(self.server.url("/throttled")),
+                    await scraper.ascrape_url(self.server.url("/private/page")),
+                )
+            finally:
+                await close_async_session()
+
+        throttled_content, private_content = asyncio.run(ascrape())
+        self.assertIn("Throttled is discussed", throttled_content)
+        self.assertEqual(private_content, "")
+        self.assertEqual(len(self._requests_to("/throttled")), 2)
+        self.assertEqual(self._requests_to("/private/page"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
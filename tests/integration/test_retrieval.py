@@ -1,8 +1,23 @@
+import os
+import tempfile
+import time
 import unittest
 
+from online_research_engine.deadline import Deadline
+from online_research_engine.embedding_cache import EmbeddingCache
 from online_research_engine.fetch_web_content import WebContentFetcher
 from online_research_engine.retrieval import EmbeddingRetriever
 
+from .fake_embeddings import FakeEmbeddings, SlowEmbeddings
+
+
+def make_page(topic, sentences=40):
+    # Build page content long enough to be split into several chunks
+    return " ".join(
+        f"{topic} sentence {i} talks about {topic} and nothing else."
+        for i in range(sentences)
+    )
+
 
 class TestEmbeddingRetriever(unittest.TestCase):
     def test_embedding_retriever(self):
@@ -38,5 +53,107 @@ class TestEmbeddingRetriever(unittest.TestCase):
         print("\n\nRelevant Documents from VectorDB:\n", relevant_docs_list)
 
 
+class TestLocalEmbeddingRetriever(unittest.TestCase):
+    """Runs the retriever with a local fake embedding model."""
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        self.contents = [
+            make_page("apples"),
+            make_page("bananas"),
+            make_page("cherries"),
+        ]
+        self.links = ["https://a.example", "https://b.example", "https://c.example"]
+
+    def test_embedding_cache_skips_seen_chunks(self):
+        model = FakeEmbeddings()
+        cache = EmbeddingCache(os.path.join(self.cache_dir, "embeddings.sqlite3"))
+        expected = EmbeddingRetriever(FakeEmbeddings()).retrieve_embeddings(
+            self.contents, self.links, "bananas"
+        )
+
+        for _ in range(2):
+            retriever = EmbeddingRetriever(model, embedding_cache=cache)
+            documents = retriever.retrieve_embeddings(
+                self.contents, self.links, "bananas"
+            )
+            self.assertEqual(
+                [document.page_content for document in documents],
+                [document.page_content for document in expected],
+            )
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(documents[0].metadata, {"url": "https://b.example"})
+
+    def test_numpy_backend_matches_chroma(self):
+        expected = EmbeddingRetriever(FakeEmbeddings()).retrieve_embeddings(
+            self.contents, self.links, "cherries sentence"
+        )
+        retriever = EmbeddingRetriever(FakeEmbeddings(), backend="numpy")
+        documents = retriever.retrieve_embeddings(
+            self.contents, self.links, "cherries sentence"
+        )
+        self.assertEqual(
+            [(document.page_content, document.metadata) for document in documents],
+            [(document.page_content, document.metadata) for document in expected],
+        )
+
+        with self.assertRaises(ValueError):
+            EmbeddingRetriever(FakeEmbeddings(), backend="faiss")
+
+    def test_retrieve_embeddings_stream(self):
+        retriever = EmbeddingRetriever(FakeEmbeddings(), backend="numpy")
+        documents = retriever.retrieve_embeddings_stream(
+            iter(zip(self.links, self.contents)), "bananas sentence"
+        )
+        expected = retriever.retrieve_embeddings(
+            self.contents, self.links, "bananas sentence"
+        )
+        self.assertEqual(
+            [(document.page_content, document.metadata) for document in documents],
+            [(document.page_content, document.metadata) for document in expected],
+        )
+        self.assertEqual(retriever.retrieve_embeddings_stream([], "bananas"), [])
+
+    def test_deadline_falls_back_to_lexical_ranking(self):
+        model = SlowEmbeddings(delay=2)
+        retriever = EmbeddingRetriever(model, backend="numpy")
+
+        start = time.perf_counter()
+        documents = retriever.retrieve_embeddings(
+            self.contents, self.links, "bananas", deadline=Deadline(0.5)
+        )
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertTrue(documents)
+        self.assertEqual(documents[0].metadata, {"url": "https://b.example"})
+
+        start = time.perf_counter()
+        documents = retriever.retrieve_embeddings_stream(
+            iter(zip(self.links, self.contents)), "cherries", deadline=Deadline(0.5)
+        )
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertEqual(documents[0].metadata, {"url": "https://c.example"})
+
+    def test_persistent_index_grows_incrementally(self):
+        model = FakeEmbeddings()
+        retriever = EmbeddingRetriever(
+            model, persist_directory=os.path.join(self.cache_dir, "index")
+        )
+        retriever.retrieve_embeddings(self.contents[:2], self.links[:2], "apples")
+        embedded = len(model.embedded_texts)
+
+        documents = retriever.retrieve_embeddings(
+            self.contents[1:], self.links[1:], "apples"
+        )
+        # Only the cherries page was new, and the apples chunks are not part of this query
+        self.assertEqual(len(model.embedded_texts) - embedded, embedded // 2)
+        self.assertTrue(documents)
+        self.assertNotIn(
+            "https://a.example", {document.metadata["url"] for document in documents}
+        )
+        self.assertEqual(set(documents[0].metadata), {"url"})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from online_research_engine.deadline import Deadline, DeadlineExceeded
+from online_research_engine.http_sessions import close_async_session
+from online_research_engine.search_cache import (
+    DiskSearchCacheBackend,
+    MemorySearchCacheBackend,
+    SearchCache,
+)
+from online_research_engine.search_services import (
+    BingNewsSearchClient,
+    BingWebSearchClient,
+    SerperClient,
+)
+
+from .local_server import LocalHTTPServer
+
+
+class TestSearchCache(unittest.TestCase):
+    def test_key_normalizes_settings(self):
+        cache = SearchCache()
+        self.assertEqual(
+            cache.make_key("url", {"q": "query", "num": 10, "tbs": ""}),
+            cache.make_key("url", {"num": "10", "q": "query"}),
+        )
+        self.assertNotEqual(
+            cache.make_key("url", {"q": "query", "page": 1}),
+            cache.make_key("url", {"q": "query", "page": 2}),
+        )
+        self.assertNotEqual(
+            cache.make_key("url", {"q": "query"}),
+            cache.make_key("other url", {"q": "query"}),
+        )
+
+    def test_ttl_depends_on_freshness(self):
+        cache = SearchCache(default_ttl=1000, freshness_ttls={"Day": 60})
+        self.assertEqual(cache.get_ttl({"q": "query"}), 1000)
+        self.assertEqual(cache.get_ttl({"q": "query", "tbs": "qdr:h"}), 5 * 60)
+        self.assertEqual(cache.get_ttl({"q": "query", "freshness": "Day"}), 60)
+
+    def test_memory_backend_expiry_and_size(self):
+        backend = MemorySearchCacheBackend(max_entries=2)
+        backend.set("expired", "value", -1)
+        self.assertIsNone(backend.get("expired"))
+
+        for key in ("a", "b", "c"):
+            backend.set(key, key, 60)
+        self.assertIsNone(backend.get("a"))
+        self.assertEqual(backend.get("c"), "c")
+
+    def test_disk_backend_is_shared(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        path = os.path.join(cache_dir.name, "search.sqlite3")
+
+        DiskSearchCacheBackend(path).set("key", "value", 60)
+        DiskSearchCacheBackend(path).set("expired", "value", -1)
+        self.assertEqual(DiskSearchCacheBackend(path).get("key"), "value")
+        self.assertIsNone(DiskSearchCacheBackend(path).get("expired"))
+
+    def test_coalesced_callers_wait_until_their_deadline(self):
+        cache = SearchCache()
+        release = threading.Event()
+
+        def slow_request():
+            release.wait()
+            return 200, {"value": []}
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            leader = executor.submit(cache.fetch, "url", {"q": "query"}, slow_request)
+            while not cache._in_flight:
+                time.sleep(0.01)
+
+            start = time.monotonic()
+            with self.assertRaises(DeadlineExceeded):
+                cache.fetch("url", {"q": "query"}, slow_request, Deadline(0.2))
+            self.assertLess(time.monotonic() - start, 1)
+
+            async def afetch():
+                return await cache.afetch(
+                    "url", {"q": "query"}, None, deadline=Deadline(0.2)
+                )
+
+            with self.assertRaises(DeadlineExceeded):
+                asyncio.run(afetch())
+
+            # The leader's request is unaffected and its response is cached
+            release.set()
+            self.assertEqual(leader.result(), {"value": []})
+        self.assertEqual(cache.fetch("url", {"q": "query"}, None), {"value": []})
+        self.assertEqual(cache.stats()["coalesced"], 2)
+
+
+class TestSearchClientsCache(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalHTTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+
+        def search(request):
+            # Answer slowly so concurrent requests overlap
+            time.sleep(0.2)
+            query = request["query"].get("q") or [json.loads(request["body"])["q"]]
+            payload = {"queryContext": {"originalQuery": query[0]}, "value": []}
+            return (
+                200,
+                {"Content-Type": "application/json"},
+                json.dumps(payload).encode(),
+            )
+
+        for path in ("/search", "/v7.0/search", "/v7.0/news/search"):
+            self.server.routes[path] = search
+        self.server.routes["/v7.0/error/search"] = (
+            403,
+            {"Content-Type": "application/json"},
+            b'{"error": "quota exceeded"}',
+        )
+
+        self.config_path = self.server.write_config()
+
+    def test_repeated_searches_are_cached(self):
+        cache = SearchCache()
+        serper_client = SerperClient(self.config_path, cache=cache)
+        serper_client.url = self.server.url("/search")
+        web_client = BingWebSearchClient(self.config_path, cache=cache)
+        news_client = BingNewsSearchClient(self.config_path, cache=cache)
+
+        for _ in range(3):
+            serper_client.serper("query")
+            web_client.bing_web_search("query")
+            news_client.bing_news_search("query")
+        web_client.bing_web_search("query", freshness="Day")
+
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(cache.stats(), {"hits": 6, "misses": 4, "coalesced": 0})
+
+    def test_concurrent_searches_are_coalesced(self):
+        cache = SearchCache()
+        client = BingWebSearchClient(self.config_path, cache=cache)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(
+                executor.map(lambda _: client.bing_web_search("query"), range(8))
+            )
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(responses, [responses[0]] * 8)
+        self.assertEqual(cache.stats()["hits"] + cache.stats()["coalesced"], 7)
+
+    def test_concurrent_async_searches_are_coalesced(self):
+        cache = SearchCache()
+        client = BingNewsSearchClient(self.config_path, cache=cache)
+
+        async def search():
+            try:
+                return await asyncio.gather(
+                    *(client.abing_news_search("query") for _ in range(5))
+                )
+            finally:
+                await close_async_session()
+
+        responses = asyncio.run(search())
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(responses, [client.bing_news_search("query")] * 5)
+
+    def test_failed_searches_are_not_cached(self):
+        cache = SearchCache()
+        client = BingWebSearchClient(self.config_path, cache=cache)
+        client.url = self.server.url("/v7.0/error/search")
+
+        for _ in range(2):
+            self.assertEqual(
+                client.bing_web_search("query"), {"error": "quota exceeded"}
+            )
+        self.assertEqual(len(self.server.requests), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
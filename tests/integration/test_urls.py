@@ -0,0 +1,41 @@
+import unittest
+
+from online_research_engine.urls import canonicalize_url
+
+
+class TestCanonicalizeUrl(unittest.TestCase):
+    def test_equivalent_links(self):
+        canonical_url = canonicalize_url("https://example.com/news/story?id=7&page=2")
+        for link in (
+            "http://example.com/news/story?id=7&page=2",
+            "https://www.Example.com/news/story/?page=2&id=7",
+            "https://example.com:443/news/story?id=7&page=2#comments",
+            "https://example.com/news/story?utm_source=x&id=7&gclid=abc&page=2",
+        ):
+            with self.subTest(link=link):
+                self.assertEqual(canonicalize_url(link), canonical_url)
+
+    def test_different_pages(self):
+        for first, second in (
+            ("https://example.com/a", "https://example.com/b"),
+            ("https://example.com/a?id=1", "https://example.com/a?id=2"),
+            ("https://example.com/a", "https://example.com:8080/a"),
+            ("https://example.com/a", "https://news.example.com/a"),
+            ("https://example.com/A", "https://example.com/a"),
+        ):
+            with self.subTest(first=first, second=second):
+                self.assertNotEqual(canonicalize_url(first), canonicalize_url(second))
+
+    def test_root_and_invalid_links(self):
+        self.assertEqual(canonicalize_url("http://example.com"), "https://example.com/")
+        self.assertEqual(
+            canonicalize_url("https://example.com/"), "https://example.com/"
+        )
+        self.assertEqual(canonicalize_url("not a url"), "not a url")
+        self.assertEqual(
+            canonicalize_url("http://example.com:bad/"), "http://example.com:bad/"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+from langchain.schema import Document
+
+from online_research_engine.vector_index import NumpyVectorIndex
+
+from .fake_embeddings import FakeEmbeddings
+
+
+class TestNumpyVectorIndex(unittest.TestCase):
+    def test_matches_brute_force_ranking(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((300, 32)).astype(np.float32)
+        query = rng.standard_normal(32).astype(np.float32)
+        documents = [Document(page_content=str(i)) for i in range(300)]
+
+        index = NumpyVectorIndex(FakeEmbeddings())
+        index.add_documents(documents[:100], vectors[:100])
+        index.add_documents(documents[100:], vectors[100:])
+
+        expected = np.argsort(((vectors - query) ** 2).sum(axis=1), kind="stable")
+        for k in (1, 10, 300, 500):
+            with self.subTest(k=k):
+                ranked = index.similarity_search_by_vector(query, k)
+                self.assertEqual(
+                    [document.page_content for document in ranked],
+                    [str(i) for i in expected[:k]],
+                )
+
+    def test_ties_keep_insertion_order(self):
+        documents = [Document(page_content=str(i)) for i in range(5)]
+        index = NumpyVectorIndex(FakeEmbeddings())
+        index.add_documents(documents, [[1.0, 0.0]] * 5)
+        self.assertEqual(
+            index.similarity_search_by_vector([1.0, 0.0], 3), documents[:3]
+        )
+
+    def test_returns_the_indexed_documents(self):
+        model = FakeEmbeddings()
+        documents = [
+            Document(page_content="red apples", metadata={"url": "https://a.example"}),
+            Document(
+                page_content="yellow bananas", metadata={"url": "https://b.example"}
+            ),
+        ]
+        index = NumpyVectorIndex.from_documents(documents, model)
+        self.assertIs(index.similarity_search("bananas", k=1)[0], documents[1])
+        self.assertEqual(NumpyVectorIndex(model).similarity_search("bananas"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,18 @@
+import asyncio
+import codecs
+import time
 import unittest
 
+from playwright.async_api import Error as PlaywrightError
+
+from online_research_engine.browser_pool import BrowserPool
+from online_research_engine.content_extractors import LxmlContentExtractor
+from online_research_engine.deadline import Deadline
+from online_research_engine.http_sessions import close_async_session
 from online_research_engine.web_scraper import PlaywrightWebScraper, WebScraper
 
+from .local_server import LocalHTTPServer, article_html
+
 
 class TestWebScraper(unittest.TestCase):
     def test_web_scraper(self):
@@ -11,6 +22,228 @@ class TestWebScraper(unittest.TestCase):
         print(main_content)
 
 
+class TestLocalWebScraper(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalHTTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.server.add_page("/article", article_html("Local article"))
+
+    def test_ascrape_url_matches_scrape_url(self):
+        scraper = WebScraper()
+        url = self.server.url("/article")
+
+        async def ascrape():
+            try:
+                return await scraper.ascrape_url(url)
+            finally:
+                await close_async_session()
+
+        main_content = asyncio.run(ascrape())
+        self.assertIn("Local article is discussed", main_content)
+        self.assertEqual(main_content, scraper.scrape_url(url))
+
+    def test_async_download_is_parsed_as_it_arrives(self):
+        class CountingExtractor(LxmlContentExtractor):
+            # Record the size of every chunk fed to the incremental parser
+            def __init__(self):
+                self.fed = []
+
+            def create_chunk_parser(self):
+                parser = super().create_chunk_parser()
+                feed = parser.feed
+                parser.feed = lambda chunk: (self.fed.append(len(chunk)), feed(chunk))
+                return parser
+
+        self.server.add_page("/long", article_html("Long article", paragraphs=2000))
+        extractor = CountingExtractor()
+        scraper = WebScraper(extractor=extractor)
+        url = self.server.url("/long")
+
+        async def ascrape():
+            try:
+                return await scraper.ascrape_url_with_fallback(url)
+            finally:
+                await close_async_session()
+
+        main_content = asyncio.run(ascrape())
+        self.assertEqual(main_content, scraper.scrape_url_with_fallback(url))
+        self.assertGreater(len(extractor.fed), 1)
+        self.assertLessEqual(max(extractor.fed), WebScraper.CHUNK_SIZE)
+
+    def test_scrape_url_with_fallback_fetches_once(self):
+        # Only divs carry long text, so rule 0 finds nothing and rule 1 is needed
+        sentence = "This div holds the only text on the page and it is long enough."
+        self.server.add_page(
+            "/divs",
+            f"<html><body><div>{sentence}</div><div>{sentence}</div></body></html>",
+        )
+        scraper = WebScraper()
+        url = self.server.url("/divs")
+
+        expected = scraper.scrape_url(url, 0)
+        if len(expected) < 800:
+            expected = scraper.scrape_url(url, 1)
+        self.server.requests.clear()
+
+        self.assertEqual(scraper.scrape_url_with_fallback(url), expected)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(
+            scraper.scrape_url_with_fallback(url, fallback_on_empty=False), ""
+        )
+
+    def _get_text(self, scraper, path):
+        # Fetch a local page through both the sync and the async download paths
+        url = self.server.url(path)
+
+        async def aget():
+            try:
+                return await scraper.aget_webpage_html(url)
+            finally:
+                await close_async_session()
+
+        return scraper.get_webpage_html(url).text, asyncio.run(aget())
+
+    def test_rejects_non_html_content_types(self):
+        self.server.add_page("/image", b"\x89PNG" + b"\0" * 4096, "image/png")
+        self.assertEqual(self._get_text(WebScraper(), "/image"), ("", ""))
+
+    def test_rejects_declared_oversized_bodies(self):
+        self.server.add_page("/large", "<p>" + "word " * 2000 + "</p>")
+        scraper = WebScraper(max_content_bytes=1000)
+        self.assertEqual(self._get_text(scraper, "/large"), ("", ""))
+
+    def test_caps_streamed_bodies(self):
+        html = "<p>" + "word " * 2000 + "</p>"
+        # Without a Content-Length the size is only known while streaming
+        self.server.routes["/chunked"] = lambda request: (
+            200,
+            {
+                "Content-Type": "text/html",
+                "Connection": "close",
+                "Content-Length": None,
+            },
+            html.encode("utf-8"),
+        )
+        scraper = WebScraper(max_content_bytes=1000)
+        self.assertEqual(
+            self._get_text(scraper, "/chunked"), (html[:1000], html[:1000])
+        )
+
+    def test_trickling_bodies_are_abandoned(self):
+        def trickle(request):
+            def pieces():
+                for _ in range(30):
+                    yield b"<p>still coming</p>"
+                    time.sleep(0.2)
+
+            headers = {
+                "Content-Type": "text/html",
+                "Connection": "close",
+                "Content-Length": None,
+            }
+            return 200, headers, pieces()
+
+        self.server.routes["/trickle"] = trickle
+        url = self.server.url("/trickle")
+
+        start = time.monotonic()
+        response = WebScraper().get_webpage_html(url, deadline=Deadline(1))
+        self.assertIsNone(response.status_code)
+        self.assertLess(time.monotonic() - start, 2)
+
+        # REQUEST_TIMEOUT bounds the whole download without a deadline
+        scraper = WebScraper()
+        scraper.REQUEST_TIMEOUT = 1
+        start = time.monotonic()
+        self.assertEqual(scraper.scrape_url(url), "")
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_detects_charset(self):
+        text = "<p>Café crème brûlée à la française, voilà le résumé.</p>"
+        self.server.add_page(
+            "/header", text.encode("cp1252"), "text/html; charset=windows-1252"
+        )
+        self.server.add_page(
+            "/meta",
+            (
+                '<html><head><meta charset="shift_jis"></head><body>'
+                "<p>日本語のページです</p></body></html>"
+            ).encode("shift_jis"),
+            "text/html",
+        )
+        self.server.add_page("/default", text.encode("utf-8"), "text/html")
+        scraper = WebScraper()
+
+        self.assertEqual(self._get_text(scraper, "/header"), (text, text))
+        self.assertTrue(
+            all("日本語のページです" in t for t in self._get_text(scraper, "/meta"))
+        )
+        self.assertEqual(self._get_text(scraper, "/default"), (text, text))
+
+    def test_bom_overrides_declared_charset(self):
+        text = "<p>café</p>"
+        self.server.add_page(
+            "/utf-8-bom",
+            codecs.BOM_UTF8 + text.encode("utf-8"),
+            "text/html; charset=iso-8859-1",
+        )
+        self.server.add_page(
+            "/utf-16-bom",
+            codecs.BOM_UTF16_LE + text.encode("utf-16-le"),
+            "text/html; charset=utf-8",
+        )
+        scraper = WebScraper()
+
+        self.assertEqual(self._get_text(scraper, "/utf-8-bom"), (text, text))
+        self.assertEqual(self._get_text(scraper, "/utf-16-bom"), (text, text))
+
+    def test_browser_fallback_for_short_static_pages(self):
+        class RenderedPages:
+            # Stand-in for BrowserPool that serves the "rendered" version of a page
+            def __init__(self):
+                self.rendered = []
+
+            def render(self, url, timeout=None):
+                self.rendered.append(url)
+                return article_html("Rendered by the browser")
+
+        self.server.add_page("/shell", "<html><body><div id='app'></div></body></html>")
+        self.server.add_page("/image", b"\x89PNG", "image/png")
+        browser_pool = RenderedPages()
+        scraper = WebScraper(browser_pool=browser_pool)
+
+        main_content = scraper.scrape_url_with_fallback(self.server.url("/shell"))
+        self.assertIn("Rendered by the browser is discussed", main_content)
+        # Pages that were rejected before download are never rendered
+        self.assertEqual(
+            scraper.scrape_url_with_fallback(self.server.url("/image")), ""
+        )
+        self.assertEqual(browser_pool.rendered, [self.server.url("/shell")])
+
+    def test_static_content_is_kept_when_the_browser_fails(self):
+        class FailingBrowserPool(BrowserPool):
+            async def _launch(self):
+                raise PlaywrightError("BrowserType.launch: Executable doesn't exist")
+
+        # Enough text to keep, but short enough to ask for a render
+        self.server.add_page("/short", article_html("Short article", paragraphs=4))
+        browser_pool = FailingBrowserPool()
+        self.addCleanup(browser_pool.close)
+        scraper = WebScraper(browser_pool=browser_pool)
+        url = self.server.url("/short")
+        expected = WebScraper().scrape_url_with_fallback(url)
+        self.assertTrue(300 < len(expected) < 800)
+
+        async def ascrape():
+            try:
+                return await scraper.ascrape_url_with_fallback(url)
+            finally:
+                await close_async_session()
+
+        self.assertEqual(scraper.scrape_url_with_fallback(url), expected)
+        self.assertEqual(asyncio.run(ascrape()), expected)
+
+
 class TestPlaywrightWebScraper(unittest.TestCase):
     def test_get_webpage_html(self):
         scraper = PlaywrightWebScraper()